@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import List
+
+from qai_xml2ir.context_display import (
+    ContextCache,
+    NodeIndex,
+    purpose_profile_digest,
+    resolve_context_batch,
+    resolve_context_nodes,
+)
+from qai_xml2ir import load_ir
+from qai_xml2ir.models_ir import Node
+from qai_xml2ir.yaml_io import load_yaml
+
+
+def _all_nodes(root: Node) -> List[Node]:
+    out: List[Node] = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        out.append(node)
+        stack.extend(reversed(node.children))
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Resolve the context of every selectable node of the largest IR: batched, indexed, searched."
+    )
+    parser.add_argument("--root", type=Path, default=Path("data/normalized"))
+    parser.add_argument("--ir", type=Path, help="IR YAML to use instead of the largest one under --root")
+    parser.add_argument("--search-limit", type=int, default=2000, help="nids timed on the tree-search path, spread evenly over the document")
+    args = parser.parse_args()
+
+    ir_path = args.ir or max(args.root.rglob("*.regdoc_ir.yaml"), key=lambda path: path.stat().st_size)
+    regdoc_profile_path = ir_path.with_name(ir_path.name.replace(".regdoc_ir.yaml", ".regdoc_profile.yaml"))
+    with regdoc_profile_path.open("r", encoding="utf-8") as f:
+        purpose_profiles = load_yaml(f)["profiles"]
+    root = load_ir(ir_path, prefer_sidecar=False).content
+    nodes = _all_nodes(root)
+
+    started = time.perf_counter()
+    index = NodeIndex(root)
+    build_sec = time.perf_counter() - started
+    print(f"{ir_path.name}\tnodes={len(nodes)}\tindex_build={build_sec * 1000:.1f}ms")
+    for name, purpose_profile in sorted(purpose_profiles.items()):
+        kinds = set(purpose_profile.get("selectable_kinds") or [])
+        nids = [node.nid for node in nodes if node.kind in kinds]
+        started = time.perf_counter()
+        indexed = [resolve_context_nodes(root, nid, purpose_profile, index=index) for nid in nids]
+        indexed_sec = time.perf_counter() - started
+        started = time.perf_counter()
+        batched = list(resolve_context_batch(root, nids, purpose_profile))
+        batch_sec = time.perf_counter() - started
+        assert batched == [(nid, [n.nid for n in ctx]) for nid, ctx in zip(nids, indexed)]
+        cache = ContextCache()
+        profile_digest = purpose_profile_digest(purpose_profile)
+        for nid in nids:
+            cache.resolve(root, nid, purpose_profile, ir_digest=ir_path.name, profile_digest=profile_digest)
+        started = time.perf_counter()
+        for nid in nids:
+            cache.resolve(root, nid, purpose_profile, ir_digest=ir_path.name, profile_digest=profile_digest)
+        cached_sec = time.perf_counter() - started
+        # Tree search cost grows with document position, so sample evenly across the document.
+        step = max(1, -(-len(nids) // max(args.search_limit, 1)))
+        sample = nids[::step]
+        started = time.perf_counter()
+        searched = [resolve_context_nodes(root, nid, purpose_profile) for nid in sample]
+        search_sec = time.perf_counter() - started
+        assert [[n.nid for n in ctx] for ctx in searched] == [[n.nid for n in ctx] for ctx in indexed[::step]]
+        print(
+            f"  {name}\tselectable={len(nids)}\tindexed={indexed_sec * 1000:.0f}ms"
+            f" ({indexed_sec * 1e6 / max(len(nids), 1):.1f}us/nid)"
+            f"\tbatch={batch_sec * 1000:.0f}ms ({batch_sec * 1e6 / max(len(nids), 1):.1f}us/nid, incl. index)"
+            f"\tcached={cached_sec * 1e6 / max(len(nids), 1):.2f}us/nid"
+            f"\tsearch={search_sec * 1e6 / max(len(sample), 1):.0f}us/nid over {len(sample)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import List
+from unittest import mock
+
+from qai_xml2ir import egov_parser
+
+
+def build_synthetic_law(
+    article_count: int,
+    paragraphs: int,
+    items: int,
+    subitems: int,
+    table_rows: int = 0,
+) -> str:
+    # No ArticleCaption/ParagraphCaption: a linear find_first must scan each whole subtree.
+    parts: List[str] = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        "<Law><LawNum>令和元年法律第一号</LawNum><LawBody><LawTitle>ベンチマーク法</LawTitle><MainProvision>",
+    ]
+    for a in range(1, article_count + 1):
+        parts.append(f'<Article Num="{a}"><ArticleTitle>第{a}条</ArticleTitle>')
+        for p in range(1, paragraphs + 1):
+            parts.append(
+                f'<Paragraph Num="{p}"><ParagraphNum>{p}</ParagraphNum>'
+                f"<ParagraphSentence><Sentence>第{a}条第{p}項</Sentence></ParagraphSentence>"
+            )
+            for i in range(1, items + 1):
+                parts.append(
+                    f'<Item Num="{i}"><ItemTitle>{i}</ItemTitle>'
+                    f"<ItemSentence><Sentence>号{i}</Sentence></ItemSentence>"
+                )
+                for s in range(1, subitems + 1):
+                    parts.append(
+                        f'<Subitem1 Num="{s}"><Subitem1Title>イ</Subitem1Title>'
+                        f"<Subitem1Sentence><Sentence>細目{s}</Sentence></Subitem1Sentence></Subitem1>"
+                    )
+                parts.append("</Item>")
+            if table_rows:
+                parts.append("<TableStruct><Table>")
+                for r in range(table_rows):
+                    cells = "".join(
+                        f"<TableColumn><Sentence>{r}-{c}</Sentence></TableColumn>" for c in range(5)
+                    )
+                    parts.append(f"<TableRow>{cells}</TableRow>")
+                parts.append("</Table></TableStruct>")
+            parts.append("</Paragraph>")
+        parts.append("</Article>")
+    parts.append("</MainProvision></LawBody></Law>")
+    return "\n".join(parts)
+
+
+def _time_parse(path: Path, repeat: int, *, linear: bool) -> float:
+    patch = (
+        mock.patch.object(egov_parser, "tag_index_scope", lambda root: nullcontext())
+        if linear
+        else nullcontext()
+    )
+    best = float("inf")
+    with patch:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            egov_parser.parse_egov_xml(path)
+            best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark parse_egov_xml time against article count (tag index vs linear scan)."
+    )
+    parser.add_argument("--articles", type=int, nargs="+", default=[50, 100, 200, 400, 800])
+    parser.add_argument("--paragraphs", type=int, default=3)
+    parser.add_argument("--items", type=int, default=4)
+    parser.add_argument("--subitems", type=int, default=3)
+    parser.add_argument("--table-rows", type=int, default=20, help="Rows of a 5-column table per paragraph.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-linear", action="store_true", help="Skip the linear-scan baseline.")
+    args = parser.parse_args()
+
+    print("articles\tindexed_ms\tindexed_ms_per_article\tlinear_ms\tspeedup")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.articles:
+            path = Path(tmp) / f"bench_{count}.xml"
+            path.write_text(
+                build_synthetic_law(count, args.paragraphs, args.items, args.subitems, args.table_rows),
+                encoding="utf-8",
+            )
+            indexed = _time_parse(path, args.repeat, linear=False)
+            row = [str(count), f"{indexed * 1000:.1f}", f"{indexed * 1000 / count:.3f}"]
+            if args.no_linear:
+                row.extend(["-", "-"])
+            else:
+                linear = _time_parse(path, args.repeat, linear=True)
+                row.extend([f"{linear * 1000:.1f}", f"{linear / indexed:.2f}x"])
+            print("\t".join(row))
+
+
+if __name__ == "__main__":
+    main()
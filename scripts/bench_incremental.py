@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from qai_text2ir.incremental import parse_text_to_ir_incremental
+from qai_text2ir.profile_loader import compile_parser_profile, load_parser_profile
+from qai_text2ir.text_parser import parse_text_to_ir
+
+DEFAULT_CASES = [
+    ("who_lbm_3rd_default_v4", Path("data/human-readable/who/WHO_LBM_3rd.txt")),
+    ("pics_annexes_default_v3", Path("data/human-readable/pics/pe009-17_annexes_2023-08-25_en.txt")),
+    ("pics_part1_default_v3", Path("data/human-readable/pics/pe009-17_part1_2023-08-25_en.txt")),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time incremental text2ir re-parses after one-line edits.")
+    parser.add_argument("--profile-id")
+    parser.add_argument("--input", type=Path)
+    parser.add_argument("--edits", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    cases = [(args.profile_id, args.input)] if args.profile_id and args.input else DEFAULT_CASES
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile_id, input_path in cases:
+            if not input_path.exists():
+                continue
+            compiled = compile_parser_profile(load_parser_profile(profile_id=profile_id))
+            lines = input_path.read_text(encoding="utf-8").splitlines()
+            edited = Path(tmp) / input_path.name
+            edited.write_text("\n".join(lines), encoding="utf-8")
+            _, state, _ = parse_text_to_ir_incremental(input_path=edited, doc_id="bench", parser_profile=compiled)
+            full_total = incremental_total = 0.0
+            parsed = reused = regions = 0
+            for _ in range(args.edits):
+                pos = rng.randrange(len(lines))
+                lines[pos] = lines[pos] + " amended"
+                edited.write_text("\n".join(lines), encoding="utf-8")
+                started = time.perf_counter()
+                parse_text_to_ir(input_path=edited, doc_id="bench", parser_profile=compiled)
+                full_total += time.perf_counter() - started
+                started = time.perf_counter()
+                _, state, stats = parse_text_to_ir_incremental(
+                    input_path=edited, doc_id="bench", parser_profile=compiled, previous=state
+                )
+                incremental_total += time.perf_counter() - started
+                parsed += stats["parsed_lines"]
+                reused += stats["reused"]
+                regions += stats["regions"]
+            print(
+                f"{profile_id}\t{input_path.name}\tfull={full_total * 1000 / args.edits:.0f}ms"
+                f"\tincremental={incremental_total * 1000 / args.edits:.0f}ms"
+                f"\treused={reused}/{regions}\tparsed_lines={parsed // args.edits}/{len(lines)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
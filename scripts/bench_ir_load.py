@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from qai_xml2ir import load_ir, serialize
+from qai_xml2ir.ir_sidecar import sidecar_path_for, write_ir_jsonl
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare load_ir from YAML against the JSON Lines sidecar.")
+    parser.add_argument("--root", type=Path, default=Path("data/normalized"))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    serialize._OVERWRITE_APPROVED = True
+    print("file\tnodes\tyaml_ms\tjsonl_ms\tspeedup\tsame_tree")
+    with tempfile.TemporaryDirectory() as tmp:
+        for source in sorted(args.root.rglob("*.regdoc_ir.yaml")):
+            ir_path = Path(tmp) / source.name
+            ir_path.write_bytes(source.read_bytes())
+            ir_doc = load_ir(ir_path, prefer_sidecar=False)
+            jsonl_path = sidecar_path_for(ir_path)
+            write_ir_jsonl(jsonl_path, ir_doc, ir_yaml_path=ir_path)
+
+            yaml_sec = _best(lambda: load_ir(ir_path, prefer_sidecar=False), args.repeat)
+            jsonl_sec = _best(lambda: load_ir(jsonl_path), args.repeat)
+            same = load_ir(jsonl_path).to_dict() == ir_doc.to_dict()
+            node_count = sum(1 for _ in jsonl_path.open("r", encoding="utf-8")) - 1
+            print(
+                f"{source.name}\t{node_count}\t{yaml_sec * 1000:.0f}\t{jsonl_sec * 1000:.0f}\t"
+                f"{yaml_sec / jsonl_sec:.1f}x\t{same}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from qai_xml2ir import load_ir, serialize
+from qai_xml2ir.ir_offsets import IRIndexReader, index_path_for, write_ir_index
+from qai_xml2ir.ir_sidecar import sidecar_path_for, write_ir_jsonl
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare fetching one node with its ancestors via the offset index against a full load_ir."
+    )
+    parser.add_argument("--root", type=Path, default=Path("data/normalized"))
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    serialize._OVERWRITE_APPROVED = True
+    rng = random.Random(args.seed)
+    print("file\tnodes\tfull_load_ms\tindexed_us_per_lookup\topen_us\tspeedup")
+    with tempfile.TemporaryDirectory() as tmp:
+        for source in sorted(args.root.rglob("*.regdoc_ir.yaml")):
+            ir_path = Path(tmp) / source.name
+            ir_path.write_bytes(source.read_bytes())
+            ir_doc = load_ir(ir_path, prefer_sidecar=False)
+            jsonl_path = sidecar_path_for(ir_path)
+            write_ir_jsonl(jsonl_path, ir_doc, ir_yaml_path=ir_path)
+            write_ir_index(index_path_for(ir_path), jsonl_path)
+
+            started = time.perf_counter()
+            load_ir(jsonl_path)
+            full_sec = time.perf_counter() - started
+
+            started = time.perf_counter()
+            reader = IRIndexReader(jsonl_path)
+            open_sec = time.perf_counter() - started
+            with reader:
+                stack = [ir_doc.content]
+                all_nids = []
+                while stack:
+                    node = stack.pop()
+                    all_nids.append(node.nid)
+                    stack.extend(node.children)
+                nids = [rng.choice(all_nids) for _ in range(args.lookups)]
+                started = time.perf_counter()
+                for nid in nids:
+                    reader.with_ancestors(nid)
+                per_lookup = (time.perf_counter() - started) / len(nids)
+            print(
+                f"{source.name}\t{len(all_nids)}\t{full_sec * 1000:.1f}\t{per_lookup * 1e6:.0f}\t"
+                f"{open_sec * 1e6:.0f}\t{full_sec / (per_lookup + open_sec):.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
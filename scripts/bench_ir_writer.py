@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Tuple
+
+import yaml
+
+from qai_xml2ir import serialize
+from qai_xml2ir.models_ir import IRDocument
+
+
+def _measure(fn: Callable[[], None], repeat: int) -> Tuple[float, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / (1024 * 1024)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare write_ir_yaml against write_yaml(ir.to_dict()) on existing IR files."
+    )
+    parser.add_argument("--root", type=Path, default=Path("data/normalized"))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    serialize._OVERWRITE_APPROVED = True
+    print("file\tlines\tdump_ms\tdump_peak_mb\tstream_ms\tstream_peak_mb\tspeedup\tidentical")
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dump = Path(tmp) / "dump.yaml"
+        out_stream = Path(tmp) / "stream.yaml"
+        for path in sorted(args.root.rglob("*.regdoc_ir.yaml")):
+            with path.open("r", encoding="utf-8") as f:
+                ir_doc = IRDocument.from_dict(yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)))
+            dump_sec, dump_mb = _measure(lambda: serialize.write_yaml(out_dump, ir_doc.to_dict()), args.repeat)
+            stream_sec, stream_mb = _measure(lambda: serialize.write_ir_yaml(out_stream, ir_doc), args.repeat)
+            identical = out_dump.read_bytes() == out_stream.read_bytes() == path.read_bytes()
+            lines = path.read_text(encoding="utf-8").count("\n")
+            print(
+                f"{path.name}\t{lines}\t{dump_sec * 1000:.0f}\t{dump_mb:.1f}\t"
+                f"{stream_sec * 1000:.0f}\t{stream_mb:.1f}\t{dump_sec / stream_sec:.2f}x\t{identical}"
+            )
+
+
+if __name__ == "__main__":
+    main()
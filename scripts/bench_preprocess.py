@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from pathlib import Path
+
+from qai_text2ir.profile_loader import compile_parser_profile, load_parser_profile
+from qai_text2ir.text_parser import parse_text_to_ir
+
+DEFAULT_CASES = [
+    ("who_lbm_3rd_default_v4", Path("data/human-readable/who/WHO_LBM_3rd.txt")),
+    ("pics_annexes_default_v3", Path("data/human-readable/pics/pe009-17_annexes_2023-08-25_en.txt")),
+    ("pics_part1_default_v3", Path("data/human-readable/pics/pe009-17_part1_2023-08-25_en.txt")),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time text2ir parsing and report per-stage preprocessing stats.")
+    parser.add_argument("--profile-id")
+    parser.add_argument("--input", type=Path)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    cases = [(args.profile_id, args.input)] if args.profile_id and args.input else DEFAULT_CASES
+    for profile_id, input_path in cases:
+        if not input_path.exists():
+            continue
+        compiled = compile_parser_profile(load_parser_profile(profile_id=profile_id))
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            parse_text_to_ir(input_path=input_path, doc_id="bench", parser_profile=compiled, finalize=False)
+            best = min(best, time.perf_counter() - started)
+        stats: list = []
+        parse_text_to_ir(
+            input_path=input_path, doc_id="bench", parser_profile=compiled, finalize=False, preprocess_stats=stats
+        )
+        print(f"{profile_id}\t{input_path.name}\tparse={best * 1000:.0f}ms")
+        for entry in stats:
+            counters = " ".join(f"{key}={value}" for key, value in sorted(entry.counters.items()))
+            print(f"  {entry.name}\tlines={entry.lines}\t{entry.seconds * 1000:.1f}ms\t{counters}")
+
+
+if __name__ == "__main__":
+    main()
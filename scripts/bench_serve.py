@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import List, Tuple
+from urllib.parse import quote
+
+from qai_xml2ir.serve import BundleStore, LookupHandler, LookupServer
+
+
+def _targets(store: BundleStore, rng: random.Random, count: int) -> List[Tuple[str, str]]:
+    """(kind, target) pairs over random nodes of every bundle."""
+    out: List[Tuple[str, str]] = []
+    bundles = sorted(store.bundles.values(), key=lambda b: b.doc_id)
+    for _ in range(count):
+        bundle = rng.choice(bundles)
+        node = rng.choice(bundle.index.nodes)
+        base = f"/docs/{quote(bundle.doc_id, safe='')}/nodes/{quote(node.nid, safe='')}"
+        kind = rng.choice(["node", "ancestors", "context"])
+        if kind == "node":
+            out.append((kind, base))
+        elif kind == "ancestors":
+            out.append((kind, base + "/ancestors"))
+        else:
+            purpose = sorted(bundle.purpose_profiles)[0] if bundle.purpose_profiles else ""
+            out.append((kind, f"{base}/context?purpose={quote(purpose)}"))
+    return out
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _start_server(store: BundleStore) -> int:
+    """Serve ``store`` on an ephemeral port from a background thread; returns the port."""
+    ready: "list[int]" = []
+    started = threading.Event()
+
+    def run() -> None:
+        async def serve() -> None:
+            server = await LookupServer(store, poll_interval=0).start("127.0.0.1", 0)
+            ready.append(server.sockets[0].getsockname()[1])
+            started.set()
+            async with server:
+                await server.serve_forever()
+
+        asyncio.run(serve())
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    return ready[0]
+
+
+async def _client(port: int, targets: List[Tuple[str, str]], latencies: List[float]) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for _, target in targets:
+        started = time.perf_counter()
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - started)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def _load(port: int, targets: List[Tuple[str, str]], connections: int) -> List[float]:
+    latencies: List[float] = []
+    await asyncio.gather(*(_client(port, targets[i::connections], latencies) for i in range(connections)))
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Load-test regdoc-serve: per-lookup handler time, then keep-alive HTTP clients."
+    )
+    parser.add_argument("--root", type=Path, action="append", help="bundle root (repeatable)")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    store = BundleStore(args.root or [Path("data/normalized"), Path("out")])
+    started = time.perf_counter()
+    summary = store.refresh()
+    print(
+        f"loaded={len(store.bundles)} nodes={sum(len(b.index) for b in store.bundles.values())}"
+        f" failed={len(summary['failed'])} in {time.perf_counter() - started:.2f}s"
+    )
+    if not store.bundles:
+        return
+    rng = random.Random(args.seed)
+    targets = _targets(store, rng, args.requests)
+
+    handler = LookupHandler(store)
+    for label in ("cold", "warm"):
+        by_kind: dict = {}
+        for kind, target in targets:
+            t0 = time.perf_counter()
+            status, _ = handler("GET", target)
+            by_kind.setdefault(kind, []).append(time.perf_counter() - t0)
+            assert status == 200, target
+        print(
+            f"  handler {label}\t"
+            + "\t".join(
+                f"{kind}: p50={_percentile(v, 0.5) * 1e6:.0f}us p99={_percentile(v, 0.99) * 1e6:.0f}us"
+                for kind, v in sorted(by_kind.items())
+            )
+        )
+
+    port = _start_server(store)
+    started = time.perf_counter()
+    latencies = asyncio.run(_load(port, targets, args.connections))
+    wall = time.perf_counter() - started
+    print(
+        f"  http\t{len(latencies)} requests over {args.connections} connections: {len(latencies) / wall:.0f} req/s"
+        f"\tp50={_percentile(latencies, 0.5) * 1e6:.0f}us\tp99={_percentile(latencies, 0.99) * 1e6:.0f}us"
+        f"\tmean={statistics.fmean(latencies) * 1e6:.0f}us"
+    )
+
+
+if __name__ == "__main__":
+    main()
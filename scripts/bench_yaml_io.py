@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import argparse
+import io
+import time
+from pathlib import Path
+from typing import Any, Callable, Tuple
+
+import yaml
+
+from qai_xml2ir import yaml_io
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def _dump(data: Any, use_libyaml: bool) -> str:
+    buf = io.StringIO()
+    yaml_io.dump_yaml(data, buf, use_libyaml=use_libyaml)
+    return buf.getvalue()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare pure-Python and libyaml YAML I/O on normalized bundles.")
+    parser.add_argument("--root", type=Path, default=Path("data/normalized"))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not yaml_io.HAS_LIBYAML:
+        raise SystemExit("PyYAML was built without libyaml; nothing to compare.")
+
+    print("file\tlines\tload_py_ms\tload_c_ms\tload_x\tdump_py_ms\tdump_c_ms\tdump_x\tidentical")
+    for path in sorted(args.root.rglob("*.yaml")):
+        text = path.read_text(encoding="utf-8")
+        try:
+            load_py, data = _best(lambda: yaml_io.load_yaml(text, use_libyaml=False), args.repeat)
+        except yaml.YAMLError as exc:
+            print(f"{path.name}\tskipped: {type(exc).__name__}")
+            continue
+        load_c, data_c = _best(lambda: yaml_io.load_yaml(text, use_libyaml=True), args.repeat)
+        dump_py, out_py = _best(lambda: _dump(data, use_libyaml=False), args.repeat)
+        dump_c, out_c = _best(lambda: _dump(data, use_libyaml=True), args.repeat)
+        identical = data == data_c and out_py == out_c
+        print(
+            f"{path.name}\t{text.count(chr(10))}\t{load_py * 1000:.0f}\t{load_c * 1000:.0f}\t{load_py / load_c:.1f}x\t"
+            f"{dump_py * 1000:.0f}\t{dump_c * 1000:.0f}\t{dump_py / dump_c:.1f}x\t{identical}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from qai_text2ir.hyphen_vocab import corpus_sources, load_hyphen_vocabulary, refresh_hyphen_vocabulary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Build or incrementally refresh the corpus hyphenation vocabulary used by text2ir --hyphen-vocab."
+    )
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument(
+        "--root",
+        type=Path,
+        action="append",
+        help="Source texts or IR outputs to scan (repeatable; default: data/human-readable and data/normalized).",
+    )
+    args = parser.parse_args()
+
+    roots = args.root or [Path("data/human-readable"), Path("data/normalized")]
+    sources = corpus_sources(roots)
+    started = time.perf_counter()
+    vocabulary, stats = refresh_hyphen_vocabulary(args.out, sources, roots=roots)
+    refresh_sec = time.perf_counter() - started
+
+    started = time.perf_counter()
+    load_hyphen_vocabulary(args.out)
+    load_sec = time.perf_counter() - started
+    print(
+        f"{args.out}: {len(vocabulary.hyphen_words)} hyphenated / {len(vocabulary.plain_words)} plain words "
+        f"from {len(sources)} sources (scanned={stats['scanned']} kept={stats['kept']} removed={stats['removed']}) "
+        f"digest={vocabulary.corpus_digest[:12]} refresh={refresh_sec * 1000:.0f}ms load={load_sec * 1000:.1f}ms "
+        f"size={args.out.stat().st_size} bytes"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,20 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 import typer
-import yaml
 
+from qai_xml2ir.bundle_cache import BundleCache, build_cache_key
+from qai_xml2ir.digest import sha256_data, sha256_file
+from qai_xml2ir.ir_contexts import contexts_path_for, load_ir_contexts, write_ir_contexts
+from qai_xml2ir.ir_offsets import index_path_for, write_ir_index
+from qai_xml2ir.ir_sidecar import SIDECAR_FORMATS, sidecar_path_for, write_ir_jsonl
 from qai_xml2ir.models_meta import build_meta
-from qai_xml2ir.serialize import sha256_file, write_yaml
-from qai_xml2ir.verify import verify_document
+from qai_xml2ir.models_ir import Node
+from qai_xml2ir.serialize import write_ir_yaml, write_yaml
+from qai_xml2ir.verify import raise_for_problems, verify_contexts, verify_document
+from qai_xml2ir.yaml_io import dump_yaml, load_yaml
 
+from .hyphen_vocab import load_hyphen_vocabulary, stale_hyphen_sources
+from .incremental import load_incremental_state, parse_text_to_ir_incremental, save_incremental_state
 from .profile_loader import load_parser_profile_with_provenance
 from .text_parser import parse_text_to_ir, qualitycheck_document
 
@@ -22,7 +30,7 @@ app = typer.Typer(add_completion=False)
 
 def _read_yaml(path: Path) -> Dict[str, Any]:
     with path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
+        data = load_yaml(f)
     if not isinstance(data, dict):
         raise typer.BadParameter(f"Invalid YAML content: {path}")
     return data
@@ -134,13 +142,7 @@ def _safe_meta_input_path(input_path: Path) -> str:
 def _write_yaml_no_prompt(path: Path, data: Dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("w", encoding="utf-8", newline="\n") as f:
-        yaml.safe_dump(
-            data,
-            f,
-            allow_unicode=True,
-            sort_keys=False,
-            width=float("inf"),
-        )
+        dump_yaml(data, f)
 
 
 def _git_info() -> Tuple[Optional[str], Optional[str]]:
@@ -173,21 +175,27 @@ def _extract_tag_value(tags: List[str], prefix: str) -> Optional[str]:
     return None
 
 
-def _extract_refine_summary(ir_doc: Dict[str, Any]) -> Dict[str, Any]:
-    root = ir_doc.get("content") or {}
-    children = root.get("children") or []
+def _field(obj: Any, key: str) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(key)
+    return getattr(obj, key, None)
+
+
+def _extract_refine_summary(ir_doc: Any) -> Dict[str, Any]:
+    root = _field(ir_doc, "content") or {}
+    children = _field(root, "children") or []
     applied: List[Dict[str, str]] = []
     refine_kind: Optional[str] = None
     for node in children:
-        if not isinstance(node, dict):
+        if not isinstance(node, (dict, Node)):
             continue
-        tags = node.get("tags") or []
+        tags = _field(node, "tags") or []
         if not isinstance(tags, list):
             continue
         used_profile_id = _extract_tag_value(tags, "refined_by")
         if not used_profile_id:
             continue
-        key = str(node.get("num") or _extract_tag_value(tags, "refine_key") or "")
+        key = str(_field(node, "num") or _extract_tag_value(tags, "refine_key") or "")
         node_refine_kind = _extract_tag_value(tags, "refine_kind")
         if node_refine_kind and refine_kind is None:
             refine_kind = node_refine_kind
@@ -283,6 +291,15 @@ def _build_text_meta(
     return meta
 
 
+def _report_qualitycheck(qc_warnings: List[str], *, strict: bool) -> None:
+    for msg in qc_warnings:
+        typer.echo(f"[qualitycheck] {msg}", err=True)
+    if strict and qc_warnings:
+        raise typer.BadParameter(
+            f"qualitycheck found {len(qc_warnings)} warning(s); re-run with --no-qualitycheck or fix input/profile."
+        )
+
+
 @app.command()
 def bundle(
     input: Path = typer.Option(..., "--input", exists=True, dir_okay=False),
@@ -311,6 +328,13 @@ def bundle(
     strict: bool = typer.Option(False, "--strict"),
     write_manifest: bool = typer.Option(True, "--write-manifest/--no-write-manifest"),
     overwrite_manifest: bool = typer.Option(False, "--overwrite-manifest"),
+    cache_dir: Optional[Path] = typer.Option(None, "--cache-dir", file_okay=False),
+    cache_hardlink: bool = typer.Option(False, "--cache-hardlink/--cache-copy"),
+    sidecar: Optional[str] = typer.Option(None, "--sidecar"),
+    refine_workers: Optional[int] = typer.Option(None, "--refine-workers", min=0),
+    hyphen_vocab_path: Optional[Path] = typer.Option(None, "--hyphen-vocab", exists=True, dir_okay=False),
+    incremental_state_path: Optional[Path] = typer.Option(None, "--incremental-state", dir_okay=False),
+    contexts: bool = typer.Option(False, "--contexts/--no-contexts"),
 ) -> None:
     if not isinstance(doc_id, str):
         doc_id = None
@@ -350,6 +374,42 @@ def bundle(
         language = None
     if not isinstance(family, str):
         family = None
+    if not isinstance(cache_dir, Path):
+        cache_dir = None
+    if not isinstance(cache_hardlink, bool):
+        cache_hardlink = False
+    if not isinstance(sidecar, str):
+        sidecar = None
+    if sidecar is not None and sidecar not in SIDECAR_FORMATS:
+        raise typer.BadParameter(f"--sidecar must be one of: {'|'.join(SIDECAR_FORMATS)}")
+    if not isinstance(refine_workers, int):
+        refine_workers = None
+    if not isinstance(hyphen_vocab_path, Path):
+        hyphen_vocab_path = None
+    hyphen_vocabulary = None
+    if hyphen_vocab_path is not None:
+        try:
+            hyphen_vocabulary = load_hyphen_vocabulary(hyphen_vocab_path)
+            stale_sources = stale_hyphen_sources(hyphen_vocab_path)
+        except ValueError as exc:
+            raise typer.BadParameter(str(exc)) from exc
+        if stale_sources:
+            shown = ", ".join(stale_sources[:3]) + (", ..." if len(stale_sources) > 3 else "")
+            typer.echo(
+                f"[hyphen-vocab] {len(stale_sources)} source(s) changed since {hyphen_vocab_path} was built ({shown}); "
+                f"refresh it with scripts/build_hyphen_vocab.py --out {hyphen_vocab_path}",
+                err=True,
+            )
+    if not isinstance(contexts, bool):
+        contexts = False
+    if not isinstance(incremental_state_path, Path):
+        incremental_state_path = None
+    previous_state = None
+    if incremental_state_path is not None and incremental_state_path.exists():
+        try:
+            previous_state = load_incremental_state(incremental_state_path)
+        except ValueError as exc:
+            raise typer.BadParameter(str(exc)) from exc
 
     if emit_only not in {"all", "meta", "parser_profile", "regdoc_ir", "regdoc_profile"}:
         raise typer.BadParameter(
@@ -374,21 +434,6 @@ def bundle(
     resolved_jurisdiction = jurisdiction or applies_to.get("jurisdiction") or "US"
     resolved_language = language or _infer_default_language(resolved_jurisdiction, parser_profile)
     source_label = _infer_source_label(parser_profile)
-    ir_doc = parse_text_to_ir(
-        input_path=input,
-        doc_id=resolved_doc_id,
-        parser_profile=parser_profile,
-    )
-    qc_warnings: List[str] = []
-    if qualitycheck:
-        qc_warnings = qualitycheck_document(ir_doc.content)
-        for msg in qc_warnings:
-            typer.echo(f"[qualitycheck] {msg}", err=True)
-        if strict and qc_warnings:
-            raise typer.BadParameter(
-                f"qualitycheck found {len(qc_warnings)} warning(s); re-run with --no-qualitycheck or fix input/profile."
-            )
-    verify_document(ir_doc.to_dict())
 
     if regdoc_profile_path:
         regdoc_profile = _read_yaml(regdoc_profile_path)
@@ -403,38 +448,124 @@ def bundle(
     parser_profile_path = out_dir / f"{stem}.parser_profile.yaml"
     regdoc_profile_path = out_dir / f"{stem}.regdoc_profile.yaml"
     meta_path = out_dir / f"{stem}.meta.yaml"
+    jsonl_path = sidecar_path_for(ir_path) if sidecar is not None else None
+    index_path = index_path_for(ir_path) if sidecar == "index" else None
+    derived_paths = [p for p in (jsonl_path, index_path) if p is not None]
+    contexts_path = contexts_path_for(ir_path) if contexts and emit_only == "all" else None
+    if contexts_path is not None:
+        derived_paths.append(contexts_path)
+
+    meta_fields: Dict[str, Any] = {
+        "doc_id": resolved_doc_id,
+        "title": resolved_title,
+        "short_title": resolved_short_title,
+        "cfr_title": cfr_title,
+        "cfr_part": cfr_part,
+        "doc_type": doc_type,
+        "source_url": source_url,
+        "source_format": inferred_source_format,
+        "retrieved_at": retrieved_at,
+        "jurisdiction": resolved_jurisdiction,
+        "language": resolved_language,
+        "source_label": source_label,
+        "eu_volume": eu_volume,
+        "pics_doc_id": pics_doc_id,
+        "who_publication_id": who_publication_id,
+    }
 
-    if emit_only in {"all", "regdoc_ir"}:
-        write_yaml(ir_path, ir_doc.to_dict())
-    if emit_only in {"all", "parser_profile"}:
-        write_yaml(parser_profile_path, parser_profile)
-    if emit_only in {"all", "regdoc_profile"}:
-        write_yaml(regdoc_profile_path, regdoc_profile)
-    if emit_only in {"all", "meta"}:
-        meta = _build_text_meta(
-            doc_id=resolved_doc_id,
-            title=resolved_title,
-            short_title=resolved_short_title,
-            cfr_title=cfr_title,
-            cfr_part=cfr_part,
-            doc_type=doc_type,
-            source_url=source_url,
-            source_format=inferred_source_format,
-            retrieved_at=retrieved_at,
-            jurisdiction=resolved_jurisdiction,
-            language=resolved_language,
-            source_label=source_label,
-            eu_volume=eu_volume,
-            pics_doc_id=pics_doc_id,
-            who_publication_id=who_publication_id,
-            parser_profile_id=parser_profile["id"],
-            ir_path=ir_path.name,
-            parser_profile_path=parser_profile_path.name,
-            regdoc_profile_path=regdoc_profile_path.name,
-            input_path=_safe_meta_input_path(input),
+    # Only complete bundles are cached; partial --emit-only runs always convert.
+    cache = BundleCache(cache_dir) if cache_dir is not None and emit_only == "all" else None
+    cache_key: Optional[str] = None
+    cache_entry: Optional[Dict[str, Any]] = None
+    if cache is not None:
+        cache_key = build_cache_key(
+            tool="qai_text2ir",
             input_checksum=sha256_file(input),
+            parser_profile_sha256=sha256_data(parser_profile),
+            tool_version=None,
+            options={
+                **meta_fields,
+                "regdoc_profile_sha256": sha256_data(regdoc_profile),
+                "input_path": _safe_meta_input_path(input),
+                "qualitycheck": bool(qualitycheck),
+                "sidecar": sidecar,
+                "contexts": contexts,
+                "hyphen_vocab_digest": hyphen_vocabulary.corpus_digest if hyphen_vocabulary else None,
+            },
         )
-        write_yaml(meta_path, meta)
+        cache_entry = cache.lookup(cache_key)
+
+    if cache is not None and cache_key is not None and cache_entry is not None:
+        cached = cache_entry.get("extra") or {}
+        qc_warnings: List[str] = list(cached.get("qualitycheck_warnings") or [])
+        refine_summary: Dict[str, Any] = cached.get("refine") or {}
+        _report_qualitycheck(qc_warnings, strict=strict)
+        cache.materialize(cache_key, cache_entry, out_dir, hardlink=cache_hardlink)
+        typer.echo(f"[cache] hit {cache_key[:12]} -> {out_dir}", err=True)
+    else:
+        if incremental_state_path is not None:
+            ir_doc, state, stats = parse_text_to_ir_incremental(
+                input_path=input,
+                doc_id=resolved_doc_id,
+                parser_profile=parser_profile,
+                previous=previous_state,
+                refine_workers=refine_workers,
+                hyphen_vocabulary=hyphen_vocabulary,
+            )
+            save_incremental_state(incremental_state_path, state)
+            typer.echo(
+                f"[incremental] reused {stats['reused']}/{stats['regions']} regions, "
+                f"parsed {stats['parsed_lines']} lines -> {incremental_state_path}",
+                err=True,
+            )
+        else:
+            ir_doc = parse_text_to_ir(
+                input_path=input,
+                doc_id=resolved_doc_id,
+                parser_profile=parser_profile,
+                refine_workers=refine_workers,
+                hyphen_vocabulary=hyphen_vocabulary,
+            )
+        qc_warnings = qualitycheck_document(ir_doc.content) if qualitycheck else []
+        _report_qualitycheck(qc_warnings, strict=strict)
+        verify_document(ir_doc)
+        refine_summary = _extract_refine_summary(ir_doc)
+
+        if emit_only in {"all", "regdoc_ir"}:
+            write_ir_yaml(ir_path, ir_doc)
+            if jsonl_path is not None:
+                write_ir_jsonl(jsonl_path, ir_doc, ir_yaml_path=ir_path)
+            if index_path is not None:
+                write_ir_index(index_path, jsonl_path)
+        if emit_only in {"all", "parser_profile"}:
+            write_yaml(parser_profile_path, parser_profile)
+        if emit_only in {"all", "regdoc_profile"}:
+            write_yaml(regdoc_profile_path, regdoc_profile)
+        if contexts_path is not None:
+            write_ir_contexts(contexts_path, ir_doc, regdoc_profile, ir_yaml_path=ir_path)
+            written_contexts = load_ir_contexts(contexts_path, ir_yaml_path=ir_path, regdoc_profile=regdoc_profile)
+            raise_for_problems(
+                verify_contexts(ir_doc.content, written_contexts, regdoc_profile),
+                error=typer.BadParameter,
+            )
+        if emit_only in {"all", "meta"}:
+            meta = _build_text_meta(
+                **meta_fields,
+                parser_profile_id=parser_profile["id"],
+                ir_path=ir_path.name,
+                parser_profile_path=parser_profile_path.name,
+                regdoc_profile_path=regdoc_profile_path.name,
+                input_path=_safe_meta_input_path(input),
+                input_checksum=sha256_file(input),
+            )
+            write_yaml(meta_path, meta)
+        if cache is not None and cache_key is not None:
+            cache.store(
+                cache_key,
+                doc_id=resolved_doc_id,
+                files=[ir_path, parser_profile_path, regdoc_profile_path, meta_path, *derived_paths],
+                extra={"qualitycheck_warnings": qc_warnings, "refine": refine_summary},
+            )
 
     if write_manifest:
         manifest_path = out_dir / "manifest.yaml"
@@ -447,7 +578,6 @@ def bundle(
         commit, branch = _git_info()
         command_argv = " ".join(shlex.quote(v) for v in sys.argv)
         parser_profile_sha = sha256_file(parser_profile_path) if parser_profile_path.exists() else None
-        ir_dict = ir_doc.to_dict()
         manifest: Dict[str, Any] = {
             "schema": "qai.run_manifest.v1",
             "run_id": out_dir.name,
@@ -465,7 +595,8 @@ def bundle(
                     f"{stem}.parser_profile.yaml",
                     f"{stem}.regdoc_profile.yaml",
                     f"{stem}.meta.yaml",
-                ],
+                ]
+                + [p.name for p in derived_paths],
             },
             "parser_profile": {
                 "id": str(parser_profile.get("id") or ""),
@@ -478,7 +609,7 @@ def bundle(
                 "warnings_count": len(qc_warnings),
                 "warnings": qc_warnings[:20],
             },
-            "refine": _extract_refine_summary(ir_dict),
+            "refine": refine_summary,
         }
         _write_yaml_no_prompt(manifest_path, manifest)
 
@@ -0,0 +1,238 @@
+"""Corpus-level hyphenation vocabulary shared across text2ir runs.
+
+Hyphen-wrap repair decides between ``word-part`` and ``wordpart`` from the
+words a document already uses; short inputs such as single PIC/S annex slices
+see too few of them.  This store collects hyphenated and plain words from a
+corpus of source texts (``*.txt``/``*.md``) and prior IR outputs
+(``*.regdoc_ir.yaml``) once, so each run only loads a word list.
+
+The file is UTF-8 text.  Line 1 is a JSON header with the corpus digest, the
+corpus base directory (relative to the file), the scanned roots and the sha256
+of every source, all keyed relative to the base; each following line is
+``<h|p>\\t<word>\\t<ids>`` in sorted order, where ``ids`` lists the sources
+the word was seen in.  The postings let ``refresh_hyphen_vocabulary`` rescan
+only added or changed sources and drop removed ones, and the recorded digests
+let ``stale_hyphen_sources`` tell a loader that the corpus moved on.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, TextIO, Tuple
+
+from qai_xml2ir.digest import sha256_data, sha256_file
+from qai_xml2ir.ir_sidecar import YAML_SUFFIX, load_ir
+
+VOCAB_SCHEMA = "qai.hyphen_vocab.v2"
+TEXT_SUFFIXES = (".txt", ".md")
+_HYPHEN = "h"
+_PLAIN = "p"
+
+
+@dataclass(frozen=True)
+class HyphenVocabulary:
+    corpus_digest: str
+    hyphen_words: FrozenSet[str]
+    plain_words: FrozenSet[str]
+
+
+def corpus_sources(roots: Iterable[Path]) -> List[Path]:
+    """Source texts and IR YAML files under ``roots``, sorted and de-duplicated."""
+    found: Set[Path] = set()
+    for root in roots:
+        root = Path(root)
+        candidates = [root] if root.is_file() else root.rglob("*")
+        for path in candidates:
+            if path.is_file() and (path.suffix in TEXT_SUFFIXES or path.name.endswith(YAML_SUFFIX)):
+                found.add(path)
+    return sorted(found)
+
+
+def corpus_digest(source_digests: Dict[str, str]) -> str:
+    return sha256_data(sorted(source_digests.items()))
+
+
+def _relative_key(path: Path, base: Path) -> str:
+    try:
+        return Path(os.path.relpath(Path(path).resolve(), base.resolve())).as_posix()
+    except ValueError:  # another drive on Windows
+        return Path(path).resolve().as_posix()
+
+
+def _base_dir(path: Path, header: Dict[str, Any]) -> Path:
+    return Path(path).parent / header.get("base", ".")
+
+
+def scan_source(path: Path) -> Tuple[Set[str], Set[str]]:
+    """Lower-cased (hyphenated, plain) words of one source text or IR file."""
+    from .text_parser import HYPHEN_WORD_PATTERN, PLAIN_WORD_PATTERN, _collect_word_sets
+
+    if path.name.endswith(YAML_SUFFIX):
+        return _collect_word_sets(load_ir(path).content)
+    text = path.read_text(encoding="utf-8", errors="ignore")
+    hyphen_words = {word.lower() for word in HYPHEN_WORD_PATTERN.findall(text)}
+    plain_words = {word.lower() for word in PLAIN_WORD_PATTERN.findall(text)}
+    return hyphen_words, plain_words
+
+
+def _read_header(f: TextIO, path: Path) -> Dict[str, Any]:
+    try:
+        header = json.loads(f.readline())
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        header = None
+    if not isinstance(header, dict) or header.get("schema") != VOCAB_SCHEMA:
+        raise ValueError(f"Not a hyphenation vocabulary: {path}")
+    return header
+
+
+def _read_store(path: Path) -> Tuple[Dict[str, Any], Dict[str, str], Dict[Tuple[str, str], Set[str]]]:
+    with path.open("r", encoding="utf-8") as f:
+        header = _read_header(f, path)
+        sources: Dict[str, str] = dict(header.get("sources") or [])
+        keys = list(sources)
+        postings: Dict[Tuple[str, str], Set[str]] = {}
+        for line in f:
+            kind, word, ids = line.rstrip("\n").split("\t")
+            postings[(kind, word)] = {keys[int(i)] for i in ids.split(",")}
+    return header, sources, postings
+
+
+def _write_store(
+    path: Path,
+    base: Path,
+    roots: List[str],
+    sources: Dict[str, str],
+    postings: Dict[Tuple[str, str], Set[str]],
+) -> str:
+    keys = sorted(sources)
+    position = {key: idx for idx, key in enumerate(keys)}
+    digest = corpus_digest(sources)
+    header = {
+        "schema": VOCAB_SCHEMA,
+        "corpus_digest": digest,
+        "base": _relative_key(base, path.parent),
+        "roots": roots,
+        "sources": [[key, sources[key]] for key in keys],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}-", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+            f.write(json.dumps(header, ensure_ascii=False, separators=(",", ":")) + "\n")
+            for kind, word in sorted(postings):
+                ids = ",".join(str(i) for i in sorted(position[key] for key in postings[(kind, word)]))
+                f.write(f"{kind}\t{word}\t{ids}\n")
+        os.replace(tmp_name, path)
+    except OSError:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return digest
+
+
+def load_hyphen_vocabulary(path: Path) -> HyphenVocabulary:
+    """Load the word sets of a vocabulary file without touching its sources."""
+    with Path(path).open("r", encoding="utf-8") as f:
+        header = _read_header(f, path)
+        hyphen_words: List[str] = []
+        plain_words: List[str] = []
+        for line in f:
+            kind, word, _ = line.split("\t", 2)
+            (hyphen_words if kind == _HYPHEN else plain_words).append(word)
+    return HyphenVocabulary(
+        corpus_digest=header["corpus_digest"],
+        hyphen_words=frozenset(hyphen_words),
+        plain_words=frozenset(plain_words),
+    )
+
+
+def stale_hyphen_sources(path: Path) -> List[str]:
+    """Sources of the vocabulary at ``path`` that changed, vanished or appeared since it was built.
+
+    Recorded sources are re-hashed and the recorded roots re-listed, relative
+    to the recorded base, so the answer does not depend on the working
+    directory.  An empty list means ``corpus_digest`` still describes the corpus.
+    """
+    path = Path(path)
+    with path.open("r", encoding="utf-8") as f:
+        header = _read_header(f, path)
+    recorded: Dict[str, str] = dict(header.get("sources") or [])
+    base = _base_dir(path, header)
+    current = {
+        _relative_key(source, base): source
+        for source in corpus_sources(base / root for root in header.get("roots") or [])
+    }
+    stale = set(current) - set(recorded)
+    for key, digest in recorded.items():
+        source = base / key
+        if not source.is_file() or sha256_file(source) != digest:
+            stale.add(key)
+    return sorted(stale)
+
+
+def refresh_hyphen_vocabulary(
+    path: Path,
+    sources: Iterable[Path],
+    *,
+    roots: Optional[Iterable[Path]] = None,
+    base: Optional[Path] = None,
+) -> Tuple[HyphenVocabulary, Dict[str, int]]:
+    """Bring the vocabulary at ``path`` in line with ``sources`` and return it.
+
+    Sources are keyed relative to ``base`` (default: the working directory,
+    i.e. the repository root for ``scripts/build_hyphen_vocab.py``); ``roots``
+    are recorded so ``stale_hyphen_sources`` can spot added files.  Only
+    sources whose sha256 is new or changed are rescanned; words seen only in
+    removed sources are dropped.  The file is rewritten only when the corpus
+    digest or the recorded layout changed.  The returned stats count scanned,
+    kept and removed sources.
+    """
+    path = Path(path)
+    base = Path.cwd() if base is None else Path(base)
+    root_keys = sorted(_relative_key(root, base) for root in roots or [])
+    current = {_relative_key(source, base): sha256_file(source) for source in sources}
+    previous: Dict[str, str] = {}
+    postings: Dict[Tuple[str, str], Set[str]] = {}
+    same_layout = False
+    if path.exists():
+        try:
+            header, previous, postings = _read_store(path)
+            same_layout = _base_dir(path, header).resolve() == base.resolve() and header.get("roots") == root_keys
+        except (OSError, ValueError, KeyError, IndexError):
+            previous, postings = {}, {}
+
+    stale = {key for key, digest in previous.items() if current.get(key) != digest}
+    rescan = [key for key, digest in current.items() if previous.get(key) != digest]
+    stats = {
+        "scanned": len(rescan),
+        "kept": len(current) - len(rescan),
+        "removed": len(set(previous) - set(current)),
+    }
+    if same_layout and not stale and not rescan:
+        return load_hyphen_vocabulary(path), stats
+
+    if stale:
+        for entry in list(postings):
+            owners = postings[entry] - stale
+            if owners:
+                postings[entry] = owners
+            else:
+                del postings[entry]
+    for key in rescan:
+        hyphen_words, plain_words = scan_source(base / key)
+        for kind, words in ((_HYPHEN, hyphen_words), (_PLAIN, plain_words)):
+            for word in words:
+                postings.setdefault((kind, word), set()).add(key)
+
+    digest = _write_store(path, base, root_keys, current, postings)
+    return (
+        HyphenVocabulary(
+            corpus_digest=digest,
+            hyphen_words=frozenset(word for kind, word in postings if kind == _HYPHEN),
+            plain_words=frozenset(word for kind, word in postings if kind == _PLAIN),
+        ),
+        stats,
+    )
@@ -0,0 +1,556 @@
+"""Incremental text2ir re-parse of an edited input, region by region.
+
+A tracked parse cuts the document at the lines that open a root-level node
+(part/chapter/annex, preamble).  Each region records the parser state on
+entering it, how far the parser read ahead while in it together with a digest
+of those preprocessed lines, and its raw root-level nodes from before the
+finalize steps.  The regions give the line-to-node map of the document.
+
+``parse_text_to_ir_incremental`` preprocesses the new text in full, reuses
+every region whose lines are unchanged, and restarts the main loop at the
+first changed region from its recorded state.  The loop stops again at the
+first root-level line whose entry state and following lines match a recorded
+region, so the raw tree is the one a full parse builds.  Refined subtrees are
+cached by slice digest.  Hyphen repair, ordering and the display-name index
+depend on the whole document, so they run on the full tree every time.
+
+The state is saved as UTF-8 JSON; ``load_incremental_state`` rejects other files.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from qai_xml2ir.bundle_cache import source_digest
+from qai_xml2ir.digest import sha256_data
+from qai_xml2ir.models_ir import IRDocument, Node, build_root
+
+from .hyphen_vocab import HyphenVocabulary
+from .preprocess import PreprocessPipeline
+from .profile_loader import CompiledProfile, compile_parser_profile
+from .text_parser import (
+    AppendState,
+    LastSeen,
+    ParseResume,
+    _finalize_document,
+    _LineBuffer,
+    _LineSource,
+    _parse_into,
+    _shift_line_locators,
+)
+
+INCREMENTAL_SCHEMA = "qai.text2ir_incremental.v1"
+
+
+@dataclass
+class Region:
+    """Lines ``[start, reach)`` as read while parsing from ``start`` up to the next region.
+
+    ``entry`` is the parser state on entering line ``start`` (``None`` for the
+    head region at line 0) and ``key`` its digest.  ``nodes`` are the raw
+    root-level nodes the region produced; their line numbers are off by
+    ``line_shift``.
+    """
+
+    start: int
+    reach: int
+    eof: bool
+    digest: str
+    key: Optional[str]
+    entry: Optional[Dict[str, Any]]
+    nodes: List[Dict[str, Any]]
+    line_shift: int = 0
+
+    @property
+    def nids(self) -> List[str]:
+        return [node["nid"] for node in self.nodes]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "start": self.start,
+            "reach": self.reach,
+            "eof": self.eof,
+            "digest": self.digest,
+            "key": self.key,
+            "entry": self.entry,
+            "nodes": self.nodes,
+            "line_shift": self.line_shift,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "Region":
+        return cls(**payload)
+
+
+@dataclass
+class IncrementalState:
+    profile_digest: str
+    source_digest: str
+    source_label: str
+    line_count: int
+    regions: List[Region]
+    refined: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def region_at(self, line_no: int) -> Optional[Region]:
+        """The region whose lines include 1-based ``line_no``."""
+        found: Optional[Region] = None
+        for region in self.regions:
+            if region.start >= line_no:
+                break
+            found = region
+        return found
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "schema": INCREMENTAL_SCHEMA,
+            "profile_digest": self.profile_digest,
+            "source_digest": self.source_digest,
+            "source_label": self.source_label,
+            "line_count": self.line_count,
+            "regions": [region.to_dict() for region in self.regions],
+            "refined": self.refined,
+        }
+
+
+def save_incremental_state(path: Path, state: IncrementalState) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}-", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+            json.dump(state.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_name, path)
+    except OSError:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def load_incremental_state(path: Path) -> IncrementalState:
+    try:
+        with Path(path).open("r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        payload = None
+    if not isinstance(payload, dict) or payload.get("schema") != INCREMENTAL_SCHEMA:
+        raise ValueError(f"Not a text2ir incremental state: {path}")
+    return IncrementalState(
+        profile_digest=payload["profile_digest"],
+        source_digest=payload["source_digest"],
+        source_label=payload["source_label"],
+        line_count=payload["line_count"],
+        regions=[Region.from_dict(region) for region in payload["regions"]],
+        refined=payload.get("refined") or {},
+    )
+
+
+def _lines_digest(texts: Sequence[str], start: int, reach: int, eof: bool) -> str:
+    h = hashlib.sha256("\n".join(texts[start:reach]).encode("utf-8"))
+    if eof:
+        h.update(b"\0eof")
+    return h.hexdigest()
+
+
+def _unchanged(region: Region, texts: Sequence[str], shift: int) -> bool:
+    start = region.start + shift
+    reach = region.reach + shift
+    if start < 0 or reach > len(texts) or region.eof != (reach == len(texts)):
+        return False
+    return _lines_digest(texts, start, reach, region.eof) == region.digest
+
+
+def _seen_to_json(seen: Optional[Dict[str, LastSeen]], line: int) -> Optional[Dict[str, List[Any]]]:
+    if not seen:
+        return None
+    return {
+        marker_id: [last.value, last.raw, line + 1 - last.line_no, last.sibling_index]
+        for marker_id, last in sorted(seen.items())
+    }
+
+
+def _seen_from_json(payload: Optional[Dict[str, List[Any]]], line: int) -> Optional[Dict[str, LastSeen]]:
+    if not payload:
+        return None
+    return {
+        marker_id: LastSeen(value=value, raw=raw, line_no=line + 1 - offset, sibling_index=sibling_index)
+        for marker_id, (value, raw, offset, sibling_index) in payload.items()
+    }
+
+
+@dataclass
+class _Boundary:
+    line: int
+    root_count: int
+    reach_before: int
+    entry: Dict[str, Any]
+    key: str
+
+
+class _RegionRecorder:
+    """Collects region boundaries for ``_parse_into`` and decides where it may stop.
+
+    A boundary is a line that opened a root-level node as its first node while
+    no leading probe was pending.  Its entry state is everything later lines
+    can observe apart from the tree itself; the nids, counters and repeated
+    header index are derived from the tree when resuming.  Root children only
+    change at boundaries, so they enter the state as a rolling digest.
+    """
+
+    def __init__(
+        self,
+        root: Node,
+        *,
+        root_sig: str = "",
+        root_seen: Optional[Dict[str, LastSeen]] = None,
+        resync: Optional[Callable[[_Boundary], Optional[Tuple[int, int]]]] = None,
+    ) -> None:
+        self._root = root
+        self._root_sig = root_sig
+        self._signed = len(root.children)
+        self._root_seen = dict(root_seen or {})
+        self._resync = resync
+        self._region_roots = len(root.children)
+        self.boundaries: List[_Boundary] = []
+        # (root nid of a node written to, number of boundaries at that time)
+        self.taints: List[Tuple[str, int]] = []
+        self.stop: Optional[Tuple[_Boundary, int, int]] = None
+        self.end_reach = 0
+
+    def boundary(
+        self,
+        *,
+        line: int,
+        root: Node,
+        root_count: int,
+        resumable: bool,
+        stack: List[Node],
+        last_attachable: Optional[Node],
+        node_indent: Dict[str, int],
+        parent_last_seen: Dict[str, Dict[str, LastSeen]],
+        append_states: Dict[Tuple[str, str], AppendState],
+        pipeline: PreprocessPipeline,
+        probe_idx: int,
+        buffer: _LineBuffer,
+        reach: int,
+    ) -> bool:
+        for child in root.children[self._signed : root_count]:
+            self._root_sig = sha256_data([self._root_sig, child.nid, child.kind, child.num, child.heading])
+        self._signed = root_count
+        root_seen = self._root_seen
+        self._root_seen = dict(parent_last_seen.get(root.nid) or {})
+        if not resumable:
+            return False
+
+        prev = buffer.nonblank_before(line)
+        entry = {
+            "root_sig": self._root_sig,
+            "root_seen": _seen_to_json(root_seen, line),
+            "stack": [
+                [
+                    node.nid,
+                    node.kind,
+                    node.num,
+                    node.heading,
+                    node_indent.get(node.nid, 0),
+                    _seen_to_json(parent_last_seen.get(node.nid), line),
+                    {
+                        name: [state.pending_paragraph_break, state.in_pre]
+                        for name in ("heading", "text")
+                        if (state := append_states.get((node.nid, name))) is not None
+                    },
+                ]
+                for node in stack[1:]
+            ],
+            "attach": last_attachable.nid if last_attachable is not None else None,
+            "filters": pipeline.checkpoint(),
+            "probe": None if probe_idx == line else probe_idx,
+            "prev": [line - prev[0], prev[1]] if prev is not None else None,
+            "pinned": [idx for idx in range(buffer.pinned) if buffer.is_consumed(idx)],
+        }
+        found = _Boundary(
+            line=line, root_count=root_count, reach_before=reach, entry=entry, key=sha256_data(entry)
+        )
+        if self._resync is not None:
+            matched = self._resync(found)
+            if matched is not None:
+                self.stop = (found, *matched)
+                return True
+        self.boundaries.append(found)
+        self._region_roots = root_count
+        return False
+
+    def attached(self, node: Node) -> None:
+        """Note that text or children went to ``node``, which may predate the current region."""
+        root_nid = node.nid.split(".", 1)[0]
+        if node is self._root or any(child.nid == root_nid for child in self._root.children[self._region_roots :]):
+            return
+        self.taints.append((root_nid, len(self.boundaries)))
+
+    def finish(self, *, reach: int) -> None:
+        self.end_reach = reach
+
+
+@dataclass
+class _Segment:
+    start: int
+    reach: int
+    key: Optional[str]
+    entry: Optional[Dict[str, Any]]
+    root_start: int
+    nodes: Optional[List[Dict[str, Any]]] = None
+    line_shift: int = 0
+    digest: Optional[str] = None
+    eof: bool = False
+
+
+def _find_node(root: Node, nid: str) -> Optional[Node]:
+    pending = [root]
+    while pending:
+        node = pending.pop()
+        if node.nid == nid:
+            return node
+        pending.extend(node.children)
+    return None
+
+
+def _resume_at(entry: Dict[str, Any], line: int, root: Node, pinned: int) -> ParseResume:
+    stack = [root]
+    node_indent: Dict[str, int] = {}
+    parent_last_seen: Dict[str, Dict[str, LastSeen]] = {}
+    append_states: Dict[Tuple[str, str], AppendState] = {}
+    root_seen = _seen_from_json(entry["root_seen"], line)
+    if root_seen is not None:
+        parent_last_seen[root.nid] = root_seen
+    for nid, _kind, _num, _heading, indent, seen, appends in entry["stack"]:
+        node = next(child for child in reversed(stack[-1].children) if child.nid == nid)
+        stack.append(node)
+        node_indent[nid] = indent
+        restored = _seen_from_json(seen, line)
+        if restored is not None:
+            parent_last_seen[nid] = restored
+        for name, (pending_break, in_pre) in appends.items():
+            append_states[(nid, name)] = AppendState(pending_paragraph_break=pending_break, in_pre=in_pre)
+    prev = entry["prev"]
+    released = (line - prev[0], prev[1]) if prev is not None and line - prev[0] >= pinned else None
+    return ParseResume(
+        line=line,
+        stack=stack,
+        last_attachable=_find_node(root, entry["attach"]) if entry["attach"] is not None else None,
+        node_indent=node_indent,
+        parent_last_seen=parent_last_seen,
+        append_states=append_states,
+        filter_states=list(entry["filters"]),
+        probe_idx=line if entry["probe"] is None else entry["probe"],
+        consumed=list(entry["pinned"]),
+        released_nonblank=released,
+    )
+
+
+def _merge_segments(segments: List[_Segment], first: int, last: int) -> None:
+    if first >= last:
+        return
+    merged = segments[first]
+    merged.reach = segments[last].reach
+    merged.nodes = None
+    merged.digest = None
+    del segments[first + 1 : last + 1]
+
+
+def parse_text_to_ir_incremental(
+    *,
+    input_path: Path,
+    doc_id: str,
+    parser_profile: Union[Dict[str, Any], CompiledProfile],
+    previous: Optional[IncrementalState] = None,
+    profiles_dir_override: Optional[Path] = None,
+    refine_workers: Optional[int] = None,
+    hyphen_vocabulary: Optional[HyphenVocabulary] = None,
+) -> Tuple[IRDocument, IncrementalState, Dict[str, int]]:
+    """Parse ``input_path`` like ``parse_text_to_ir``, reusing the regions of ``previous``.
+
+    ``previous`` is ignored when it was made with another profile, source label
+    or converter version.  Returns the document, the state for the next run and
+    counts of regions, reused regions, parsed lines and reused refinements.
+    """
+    compiled = (
+        parser_profile if isinstance(parser_profile, CompiledProfile) else compile_parser_profile(parser_profile)
+    )
+    source_label = compiled.source_label or input_path.name
+    source = _LineSource(input_path, list(_LineSource(input_path)))
+    prepared = list(PreprocessPipeline(compiled.preprocess_stages).run(source))
+    texts = [line.raw for line in prepared]
+    pinned = len(compiled.skip_block_rules)
+    if previous is not None and (
+        previous.profile_digest != compiled.digest
+        or previous.source_digest != source_digest()
+        or previous.source_label != source_label
+    ):
+        previous = None
+    old = previous.regions if previous is not None else []
+    by_key: Dict[str, List[int]] = defaultdict(list)
+    for pos, region in enumerate(old):
+        if region.key is not None:
+            by_key[region.key].append(pos)
+
+    def _resync(found: _Boundary) -> Optional[Tuple[int, int]]:
+        for pos in by_key.get(found.key, ()):
+            shift = found.line - old[pos].start
+            if _unchanged(old[pos], texts, shift):
+                return pos, shift
+        return None
+
+    root = build_root([])
+    segments: List[_Segment] = []
+    stats = {"regions": 0, "reused": 0, "parsed_lines": 0, "refined_reused": 0}
+    pos, shift = 0, 0
+    while True:
+        while pos < len(old) and _unchanged(old[pos], texts, shift):
+            region = old[pos]
+            segments.append(
+                _Segment(
+                    start=region.start + shift,
+                    reach=region.reach + shift,
+                    key=region.key,
+                    entry=region.entry,
+                    root_start=len(root.children),
+                    nodes=region.nodes,
+                    line_shift=region.line_shift + shift,
+                    digest=region.digest,
+                    eof=region.eof,
+                )
+            )
+            for payload in region.nodes:
+                node = Node.from_dict(payload)
+                _shift_line_locators(node, region.line_shift + shift)
+                root.children.append(node)
+            stats["reused"] += 1
+            pos += 1
+        if old and pos >= len(old):
+            break
+
+        entry = old[pos].entry if old else None
+        start = old[pos].start + shift if entry is not None else 0
+        if entry is None:
+            # The head region (or no usable state): parse from the top.
+            del root.children[:]
+            segments.clear()
+            stats["reused"] = 0
+            recorder = _RegionRecorder(root, resync=_resync if old else None)
+            resume = None
+        else:
+            recorder = _RegionRecorder(
+                root,
+                root_sig=entry["root_sig"],
+                root_seen=_seen_from_json(entry["root_seen"], start),
+                resync=_resync,
+            )
+            resume = _resume_at(entry, start, root, pinned)
+        owners_before = len(segments)
+        _parse_into(
+            root,
+            compiled=compiled,
+            pipeline=PreprocessPipeline(compiled.preprocess_stages),
+            lines=prepared,
+            source_label=source_label,
+            resume=resume,
+            regions=recorder,
+        )
+
+        ends = [found.reach_before for found in recorder.boundaries[1:]]
+        end_reach = recorder.stop[0].reach_before if recorder.stop is not None else recorder.end_reach
+        ends.append(end_reach)
+        firsts = recorder.boundaries
+        if not firsts or firsts[0].line != start:
+            # Lines before the first boundary continue the region in front of them.
+            head_reach = firsts[0].reach_before if firsts else end_reach
+            if segments:
+                segments[-1].reach = head_reach
+                segments[-1].nodes = None
+                segments[-1].digest = None
+            else:
+                segments.append(_Segment(start=0, reach=head_reach, key=None, entry=None, root_start=0))
+        for found, reach in zip(firsts, ends):
+            segments.append(
+                _Segment(
+                    start=found.line,
+                    reach=reach,
+                    key=found.key,
+                    entry=found.entry,
+                    root_start=found.root_count,
+                )
+            )
+        offset = owners_before - (1 if not firsts or firsts[0].line != start else 0)
+        for root_nid, count in sorted(recorder.taints, key=lambda taint: -taint[1]):
+            current = offset + count - (1 if firsts and firsts[0].line == start else 0)
+            current = max(current, 0)
+            owner = _owner_segment(segments, root, root_nid)
+            if owner is not None:
+                _merge_segments(segments, min(owner, current), current)
+
+        stop_line = recorder.stop[0].line if recorder.stop is not None else len(texts)
+        stats["parsed_lines"] += stop_line - start
+        if recorder.stop is None:
+            break
+        _, pos, shift = recorder.stop
+
+    refined = dict(previous.refined) if previous is not None else {}
+    earlier = set(refined)
+    regions: List[Region] = []
+    for idx, segment in enumerate(segments):
+        root_end = segments[idx + 1].root_start if idx + 1 < len(segments) else len(root.children)
+        if segment.nodes is None or segment.digest is None:
+            segment.eof = segment.reach == len(texts)
+            segment.digest = _lines_digest(texts, segment.start, segment.reach, segment.eof)
+            segment.nodes = [child.to_dict() for child in root.children[segment.root_start : root_end]]
+            segment.line_shift = 0
+        regions.append(
+            Region(
+                start=segment.start,
+                reach=segment.reach,
+                eof=segment.eof,
+                digest=segment.digest,
+                key=segment.key,
+                entry=segment.entry,
+                nodes=segment.nodes,
+                line_shift=segment.line_shift,
+            )
+        )
+
+    index = _finalize_document(
+        root,
+        compiled=compiled,
+        source=source,
+        line_no_offset=0,
+        input_path=input_path,
+        doc_id=doc_id,
+        profiles_dir_override=profiles_dir_override,
+        refine_workers=refine_workers,
+        hyphen_vocabulary=hyphen_vocabulary,
+        refine_cache=refined,
+    )
+    stats["regions"] = len(regions)
+    stats["refined_reused"] = len(earlier & set(refined))
+    state = IncrementalState(
+        profile_digest=compiled.digest,
+        source_digest=source_digest(),
+        source_label=source_label,
+        line_count=len(texts),
+        regions=regions,
+        refined=refined,
+    )
+    return IRDocument(doc_id=doc_id, content=root, index=index), state, stats
+
+
+def _owner_segment(segments: List[_Segment], root: Node, root_nid: str) -> Optional[int]:
+    for idx in range(len(segments) - 1, -1, -1):
+        segment = segments[idx]
+        root_end = segments[idx + 1].root_start if idx + 1 < len(segments) else len(root.children)
+        if any(child.nid == root_nid for child in root.children[segment.root_start : root_end]):
+            return idx
+    return None
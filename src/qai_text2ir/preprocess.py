@@ -0,0 +1,313 @@
+"""Preprocessing pipeline for text2ir.
+
+The ``preprocess`` options of a parser profile compile into an ordered tuple of
+``StageSpec``s that is cached on the ``CompiledProfile``; every parse builds
+fresh stages from it.  There are two kinds of stage:
+
+* rewrite stages are generators over ``PreparedLine`` records, chained so the
+  input is read, inline-stripped and rewritten in one streaming pass;
+* filter stages run at the parse cursor and decide whether the current line
+  is dropped.  They need what only the parse loop knows: lines already
+  consumed by table/note blocks and the stack of open nodes.
+
+Each stage keeps a ``StageStats`` with its own counters; elapsed time is only
+measured when the pipeline is built with ``timed=True``.  A new profile-driven
+stage is a subclass registered with ``register_stage`` whose ``compile``
+classmethod turns the compiled profile into constructor options (or ``None``
+when the stage is disabled).
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type
+
+try:  # Python 3.11+
+    from re import _constants as _sre_constants
+    from re import _parser as _sre_parse
+except ImportError:  # pragma: no cover - Python 3.10
+    import sre_constants as _sre_constants  # type: ignore[no-redef]
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+
+if TYPE_CHECKING:
+    from qai_xml2ir.models_ir import Node
+
+    from .profile_loader import CompiledProfile
+
+
+def strip_inline_patterns(text: str, strip_inline_regexes: Sequence[re.Pattern[str]]) -> str:
+    cleaned = text
+    for pat in strip_inline_regexes:
+        cleaned = pat.sub("", cleaned)
+    return cleaned
+
+
+# Letters whose ignore-case matches are exactly their ASCII upper/lower forms, so
+# ``literal in text.lower()`` cannot miss a match (unlike k, s and i).
+_FOLD_SAFE = frozenset("abcdefghjlmnopqrtuvwxyz")
+
+
+def _required_literal(pattern: re.Pattern[str]) -> Optional[Tuple[str, bool]]:
+    """A substring every match of ``pattern`` contains, and whether to look for it case-folded."""
+    try:
+        parsed = _sre_parse.parse(pattern.pattern, pattern.flags)
+    except (re.error, TypeError):
+        return None
+    folded = bool(pattern.flags & re.IGNORECASE)
+    best = ""
+    run: List[str] = []
+    # Only top-level literals are mandatory; any other item ends the current run.
+    for op, av in list(parsed) + [(None, None)]:
+        char = chr(av) if op is _sre_constants.LITERAL else None
+        if char is not None and folded and char.isalpha() and char.lower() not in _FOLD_SAFE:
+            char = None
+        if char is not None:
+            run.append(char.lower() if folded else char)
+            continue
+        if len(run) > len(best):
+            best = "".join(run)
+        run = []
+    return (best, folded) if best else None
+
+
+class InlineStripper:
+    """Removes the profile's inline patterns in order.
+
+    Most lines contain none of them, so each pattern's required literal is
+    looked up first and the substitution only runs when it is present.
+    """
+
+    __slots__ = ("regexes", "_steps")
+
+    def __init__(self, regexes: Sequence[re.Pattern[str]]) -> None:
+        self.regexes = tuple(regexes)
+        self._steps = [(pat, _required_literal(pat)) for pat in self.regexes]
+
+    def __call__(self, text: str) -> str:
+        cleaned = text
+        lowered: Optional[str] = None
+        for pat, required in self._steps:
+            if required is not None:
+                literal, folded = required
+                if folded:
+                    if lowered is None:
+                        lowered = cleaned.lower()
+                    if literal not in lowered:
+                        continue
+                elif literal not in cleaned:
+                    continue
+            replaced = pat.sub("", cleaned)
+            if replaced != cleaned:
+                cleaned = replaced
+                lowered = None
+        return cleaned
+
+
+class PreparedLine:
+    """One input line and its inline-stripped forms, computed once per text.
+
+    ``cleaned`` is ``raw`` with the inline patterns removed and ``stripped`` is
+    ``cleaned.strip()``.  ``lead_cleaned`` strips the patterns from
+    ``raw.lstrip()`` instead, which only differs for indented lines.
+    """
+
+    __slots__ = ("raw", "cleaned", "stripped", "_stripper", "_lead_cleaned")
+
+    def __init__(self, raw: str, stripper: Optional[InlineStripper] = None) -> None:
+        self._stripper = stripper
+        self._assign(raw)
+
+    def _assign(self, raw: str) -> None:
+        self.raw = raw
+        self.cleaned = self._stripper(raw) if self._stripper is not None else raw
+        self.stripped = self.cleaned.strip()
+        self._lead_cleaned: Optional[str] = None
+
+    def rewrite(self, raw: str) -> None:
+        self._assign(raw)
+
+    def set_stripper(self, stripper: InlineStripper) -> None:
+        self._stripper = stripper
+        self._assign(self.raw)
+
+    @property
+    def lead_cleaned(self) -> str:
+        if self._lead_cleaned is None:
+            lead = self.raw.lstrip()
+            if len(lead) == len(self.raw):
+                self._lead_cleaned = self.cleaned
+            else:
+                self._lead_cleaned = self._stripper(lead) if self._stripper is not None else lead
+        return self._lead_cleaned
+
+
+@dataclass
+class StageStats:
+    name: str
+    lines: int = 0
+    seconds: float = 0.0
+    counters: Dict[str, int] = field(default_factory=dict)
+
+    def count(self, key: str, amount: int = 1) -> None:
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "lines": self.lines, "seconds": self.seconds, "counters": dict(self.counters)}
+
+
+class LineCursor:
+    """The parse loop's view of the current line, shared with the filter stages.
+
+    ``probe_idx`` is where the table/note probes start; filters may move it.
+    """
+
+    __slots__ = ("idx", "line_no", "stripped", "probe_idx", "stack")
+
+    def __init__(self, stack: List["Node"]) -> None:
+        self.idx = 0
+        self.line_no = 0
+        self.stripped = ""
+        self.probe_idx = 0
+        self.stack = stack
+
+    def at(self, idx: int, line_no: int, stripped: str, stack: List["Node"]) -> "LineCursor":
+        self.idx = idx
+        self.line_no = line_no
+        self.stripped = stripped
+        self.probe_idx = idx
+        self.stack = stack
+        return self
+
+
+class PreprocessStage:
+    """Base class; ``name`` is the ``preprocess`` option the stage implements."""
+
+    name = "stage"
+
+    def __init__(self) -> None:
+        self.stats = StageStats(self.name)
+
+    @classmethod
+    def compile(cls, compiled: "CompiledProfile") -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class RewriteStage(PreprocessStage):
+    """Rewrites lines in place while streaming; the line count must not change."""
+
+    def process(self, lines: Iterator[PreparedLine]) -> Iterator[PreparedLine]:
+        raise NotImplementedError
+
+
+class FilterStage(PreprocessStage):
+    """Keeps (True) or drops (False) the line under the cursor.
+
+    Stages that do not see blank lines are skipped for them; filter order is
+    registration order.
+    """
+
+    sees_blank_lines = False
+
+    def admit(self, cursor: LineCursor) -> bool:
+        raise NotImplementedError
+
+    def checkpoint(self) -> Any:
+        """JSON-serializable state carried into the next line; ``None`` when there is none."""
+        return None
+
+    def restore(self, state: Any) -> None:
+        """Resume from a ``checkpoint`` taken by a stage of the same spec."""
+
+
+@dataclass(frozen=True)
+class StageSpec:
+    stage: Type[PreprocessStage]
+    options: Dict[str, Any]
+
+    def build(self) -> PreprocessStage:
+        return self.stage(**self.options)
+
+
+_REGISTERED_STAGES: List[Type[PreprocessStage]] = []
+
+
+def register_stage(stage: Type[PreprocessStage]) -> Type[PreprocessStage]:
+    if stage not in _REGISTERED_STAGES:
+        _REGISTERED_STAGES.append(stage)
+    return stage
+
+
+def compile_preprocess_stages(compiled: "CompiledProfile") -> Tuple[StageSpec, ...]:
+    specs: List[StageSpec] = []
+    for stage in _REGISTERED_STAGES:
+        options = stage.compile(compiled)
+        if options is not None:
+            specs.append(StageSpec(stage=stage, options=options))
+    return tuple(specs)
+
+
+class PreprocessPipeline:
+    """Fresh stages for one parse, built from a profile's compiled specs."""
+
+    def __init__(self, specs: Iterable[StageSpec], *, timed: bool = False) -> None:
+        self.stages = [spec.build() for spec in specs]
+        self.rewrites = [stage for stage in self.stages if isinstance(stage, RewriteStage)]
+        self.filters = [stage for stage in self.stages if isinstance(stage, FilterStage)]
+        self.timed = timed
+        # Rewrite timings are inclusive of upstream stages until ``stats`` subtracts them.
+        self._inclusive = [0.0] * len(self.rewrites)
+        self._filter_calls = [(stage.admit, stage.sees_blank_lines, stage.stats) for stage in self.filters]
+
+    def run(self, raw_lines: Iterable[str]) -> Iterator[PreparedLine]:
+        lines: Iterator[PreparedLine] = (PreparedLine(raw) for raw in raw_lines)
+        for pos, stage in enumerate(self.rewrites):
+            lines = stage.process(lines)
+            if self.timed:
+                lines = self._timed(lines, pos)
+        return lines
+
+    def _timed(self, lines: Iterator[PreparedLine], pos: int) -> Iterator[PreparedLine]:
+        clock = time.perf_counter
+        inclusive = self._inclusive
+        while True:
+            started = clock()
+            line = next(lines, None)
+            inclusive[pos] += clock() - started
+            if line is None:
+                return
+            yield line
+
+    def admit(self, cursor: LineCursor) -> bool:
+        blank = not cursor.stripped
+        timed = self.timed
+        for admit, sees_blank_lines, stats in self._filter_calls:
+            if blank and not sees_blank_lines:
+                return True
+            stats.lines += 1
+            if timed:
+                started = time.perf_counter()
+                keep = admit(cursor)
+                stats.seconds += time.perf_counter() - started
+            else:
+                keep = admit(cursor)
+            if not keep:
+                stats.count("dropped")
+                return False
+        return True
+
+    def checkpoint(self) -> List[Any]:
+        return [stage.checkpoint() for stage in self.filters]
+
+    def restore(self, states: Sequence[Any]) -> None:
+        for stage, state in zip(self.filters, states):
+            stage.restore(state)
+
+    @property
+    def stats(self) -> List[StageStats]:
+        upstream = 0.0
+        for stage, inclusive in zip(self.rewrites, self._inclusive):
+            stage.stats.seconds = max(0.0, inclusive - upstream)
+            upstream = inclusive
+        return [stage.stats for stage in self.stages]
@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import re
+import threading
+from collections import OrderedDict
 from copy import deepcopy
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, List, Optional, Tuple
 
-import yaml
-from qai_xml2ir.serialize import sha256_file
+from qai_xml2ir.digest import sha256_data, sha256_file
+from qai_xml2ir.yaml_io import load_yaml
+
+if TYPE_CHECKING:
+    from .preprocess import StageSpec
+    from .text_parser import SkipBlockRule, _MarkerMatcher
 
 CONCAT_UNIQ_LIST_PATHS: set[Tuple[str, ...]] = {
     ("structural_kinds",),
@@ -19,7 +27,7 @@ CONCAT_UNIQ_LIST_PATHS: set[Tuple[str, ...]] = {
 
 def _load_yaml(path: Path) -> Dict[str, Any]:
     with path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
+        data = load_yaml(f)
     if not isinstance(data, dict):
         raise ValueError(f"Invalid parser profile YAML: {path}")
     return data
@@ -240,3 +248,137 @@ def load_parser_profile(
         profiles_dir_override=profiles_dir_override,
     )
     return profile
+
+
+COMPILED_PROFILE_CACHE_SIZE = 32
+
+
+@dataclass(frozen=True)
+class CompiledProfile:
+    """A resolved parser profile with every pattern and lookup table prepared.
+
+    ``profile`` is a private copy of the resolved dict and must be treated as
+    read-only; ``digest`` is the sha256 of its canonical JSON form.
+    """
+
+    digest: str
+    profile: Dict[str, Any]
+    source_label: Optional[str]
+    marker_matcher: "_MarkerMatcher"
+    structure_children: Dict[str, FrozenSet[str]]
+    structural_kinds: FrozenSet[str]
+    compound_enabled: bool
+    max_depth: int
+    drop_line_regexes: Tuple[re.Pattern[str], ...]
+    drop_line_exact: FrozenSet[str]
+    strip_inline_regexes: Tuple[re.Pattern[str], ...]
+    use_indent_dedent: bool
+    dedent_pop_kinds: FrozenSet[str]
+    skip_block_rules: Tuple["SkipBlockRule", ...]
+    drop_repeated_structural_headers: bool
+    repeated_header_kinds: FrozenSet[str]
+    heading_continuation_cfg: Dict[str, Any]
+    join_mid_sentence_cfg: Dict[str, Any]
+    extract_notes_enabled: bool
+    note_start_patterns: Tuple[re.Pattern[str], ...]
+    note_max_lines: int
+    preprocess_stages: Tuple["StageSpec", ...] = ()
+
+    def child_kinds(self, parent_kind: str) -> FrozenSet[str]:
+        key = "root" if parent_kind == "document" else parent_kind
+        return self.structure_children.get(key, frozenset())
+
+
+_COMPILED_PROFILES: "OrderedDict[str, CompiledProfile]" = OrderedDict()
+_COMPILED_PROFILES_LOCK = threading.Lock()
+
+
+def _build_compiled_profile(profile: Dict[str, Any], digest: str) -> CompiledProfile:
+    from .preprocess import compile_preprocess_stages
+    from .text_parser import DEFAULT_NOTE_START_REGEXES, _compile_markers, _compile_skip_blocks, _MarkerMatcher
+
+    structure = profile.get("structure") or {}
+    compound = profile.get("compound_prefix") or {}
+    structural_kinds = set(profile.get("structural_kinds") or ["part", "subpart", "section"])
+    structural_kinds.update({"table", "table_header"})
+    preprocess = profile.get("preprocess") or {}
+    repeated_header_cfg = preprocess.get("drop_repeated_structural_headers") or {}
+    extract_notes_cfg = preprocess.get("extract_notes") or {}
+    note_start_regexes = extract_notes_cfg.get("start_regexes") or DEFAULT_NOTE_START_REGEXES
+    note_max_lines_raw = extract_notes_cfg.get("max_lines", 50)
+    note_max_lines = int(note_max_lines_raw) if str(note_max_lines_raw).strip() else 50
+    if note_max_lines <= 0:
+        note_max_lines = 50
+    compiled = CompiledProfile(
+        digest=digest,
+        profile=profile,
+        source_label=profile.get("source_label"),
+        marker_matcher=_MarkerMatcher(_compile_markers(profile)),
+        structure_children={
+            str(key): frozenset(str(v) for v in ((row or {}).get("children") or []))
+            for key, row in structure.items()
+        },
+        structural_kinds=frozenset(structural_kinds),
+        compound_enabled=bool(compound.get("enabled")),
+        max_depth=int(compound.get("max_depth", 1)),
+        drop_line_regexes=tuple(re.compile(p) for p in (preprocess.get("drop_line_regexes") or [])),
+        drop_line_exact=frozenset(
+            v for v in (preprocess.get("drop_line_exact") or []) if isinstance(v, str) and v
+        ),
+        strip_inline_regexes=tuple(re.compile(p) for p in (preprocess.get("strip_inline_regexes") or [])),
+        use_indent_dedent=bool(preprocess.get("use_indent_dedent")),
+        dedent_pop_kinds=frozenset(preprocess.get("dedent_pop_kinds") or []),
+        skip_block_rules=tuple(_compile_skip_blocks(preprocess)),
+        drop_repeated_structural_headers=bool(repeated_header_cfg.get("enabled")),
+        repeated_header_kinds=frozenset(
+            str(v).strip().lower() for v in (repeated_header_cfg.get("kinds") or []) if str(v).strip()
+        ),
+        heading_continuation_cfg=preprocess.get("merge_structural_heading_continuations") or {},
+        join_mid_sentence_cfg=preprocess.get("join_mid_sentence_marker_refs_into_prev") or {},
+        extract_notes_enabled=bool(extract_notes_cfg.get("enabled")),
+        note_start_patterns=tuple(
+            re.compile(p, flags=re.IGNORECASE)
+            for p in note_start_regexes
+            if isinstance(p, str) and p.strip()
+        ),
+        note_max_lines=note_max_lines,
+    )
+    return replace(compiled, preprocess_stages=compile_preprocess_stages(compiled))
+
+
+def compile_parser_profile(profile: Dict[str, Any]) -> CompiledProfile:
+    """Compile a resolved profile, reusing the process-wide LRU keyed by its digest."""
+    digest = sha256_data(profile)
+    with _COMPILED_PROFILES_LOCK:
+        cached = _COMPILED_PROFILES.get(digest)
+        if cached is not None:
+            _COMPILED_PROFILES.move_to_end(digest)
+            return cached
+    compiled = _build_compiled_profile(deepcopy(profile), digest)
+    with _COMPILED_PROFILES_LOCK:
+        _COMPILED_PROFILES[digest] = compiled
+        while len(_COMPILED_PROFILES) > COMPILED_PROFILE_CACHE_SIZE:
+            _COMPILED_PROFILES.popitem(last=False)
+    return compiled
+
+
+def load_compiled_profile(
+    *,
+    profile_id: Optional[str] = None,
+    path: Optional[Path] = None,
+    family: str = "US_CFR",
+    profiles_dir_override: Optional[Path] = None,
+) -> CompiledProfile:
+    return compile_parser_profile(
+        load_parser_profile(
+            profile_id=profile_id,
+            path=path,
+            family=family,
+            profiles_dir_override=profiles_dir_override,
+        )
+    )
+
+
+def clear_compiled_profiles() -> None:
+    with _COMPILED_PROFILES_LOCK:
+        _COMPILED_PROFILES.clear()
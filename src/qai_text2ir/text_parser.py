@@ -1,16 +1,41 @@
 from __future__ import annotations
 
 import logging
+import os
 import re
-from collections import defaultdict
-from dataclasses import dataclass
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Deque, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
+from qai_xml2ir.digest import sha256_data
 from qai_xml2ir.models_ir import IRDocument, Node, build_root
 from qai_xml2ir.nid import NidBuilder
 from qai_xml2ir.ord_key import assign_document_order
 
+from .hyphen_vocab import HyphenVocabulary
+from .preprocess import (
+    FilterStage,
+    InlineStripper,
+    LineCursor,
+    PreparedLine,
+    PreprocessPipeline,
+    RewriteStage,
+    StageStats,
+    register_stage,
+    strip_inline_patterns,
+)
+from .profile_loader import CompiledProfile, compile_parser_profile, load_compiled_profile
+
+try:  # Python 3.11+
+    from re import _constants as _sre_constants
+    from re import _parser as _sre_parse
+except ImportError:  # pragma: no cover - Python 3.10
+    import sre_constants as _sre_constants  # type: ignore[no-redef]
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+
 LOGGER = logging.getLogger(__name__)
 
 GAP_WARN_MAX_BY_FAMILY = {
@@ -20,6 +45,7 @@ GAP_WARN_MAX_BY_FAMILY = {
 }
 
 HYPHEN_WRAP_PATTERN = re.compile(r"([A-Za-z]{2,})[-\u2010\u2011]\s+([A-Za-z]{2,})")
+HYPHEN_WRAP_TAIL_PATTERN = re.compile(r"[-\u2010\u2011]\s+[A-Za-z]{2,}")
 HYPHEN_WORD_PATTERN = re.compile(r"\b[A-Za-z]+-[A-Za-z]+\b")
 PLAIN_WORD_PATTERN = re.compile(r"\b[A-Za-z]{3,}\b")
 PAGE_NUMBER_LINE_PATTERN = re.compile(r"^\s*\d{1,3}\s*$")
@@ -33,6 +59,14 @@ TABLE_NOTE_TRIGGER_PATTERN = re.compile(
     r"^(?:Note|Notes|NOTE|NB)\b|^(?:注|注記|備考|※|（注）)\s*[:：]?\s*|^[*†‡•]+\s*|^\([a-z0-9ivxlcdm]+\)\s+",
     re.IGNORECASE,
 )
+REPEATED_PART_HEADER_PATTERN = re.compile(r"(?i)^PART\s+(?P<n>[IVXLCDM]+)\.?\s*(?P<title>.*)$")
+REPEATED_CHAPTER_HEADER_PATTERN = re.compile(r"^(?P<n>\d{1,2})\.\s+(?P<title>.+)$")
+REPEATED_CHAPTER_WORD_HEADER_PATTERN = re.compile(r"(?i)^chapter\s+(?P<n>\d{1,2})\b\s*(?P<title>.*)$")
+REPEATED_ANNEX_HEADER_PATTERN = re.compile(r"(?i)^annex\s+(?P<n>\d+)\b")
+NORM_PUNCT_PATTERN = re.compile(r"[\(\)\[\]\{\}:;,.]")
+NORM_SPACE_PATTERN = re.compile(r"\s+")
+STREAM_READ_CHUNK_CHARS = 1 << 16
+LINE_BUFFER_RELEASE_BATCH = 1024
 DEFAULT_NOTE_START_REGEXES = [
     r"^(?:Note|Notes|NB)\b[:：]?\s*",
     r"^(注|注記|備考|※)\s*[:：]?\s*",
@@ -112,6 +146,13 @@ class AttachCandidate:
     rare_roman_penalized: bool
 
 
+@dataclass(frozen=True)
+class HyphenRepair:
+    text: str
+    # (start, end, replacement) spans of the input text that were rewritten.
+    changes: Tuple[Tuple[int, int, str], ...] = ()
+
+
 @dataclass
 class SkipBlockRule:
     start_pattern: re.Pattern[str]
@@ -146,6 +187,18 @@ class _NodeFactory:
             "preamble": "pre",
         }
         self._kind_counters: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.created = 0
+
+    def seed(self, root: Node) -> None:
+        """Register the nids and unnumbered-kind counters of an already built tree."""
+        pending = [root]
+        while pending:
+            parent = pending.pop()
+            for child in parent.children:
+                self._nid_builder.unique(child.nid)
+                if not self._slug(child.num):
+                    self._kind_counters[(parent.nid, child.kind)] += 1
+                pending.append(child)
 
     @staticmethod
     def _slug(value: Optional[str]) -> str:
@@ -181,6 +234,7 @@ class _NodeFactory:
         else:
             role = "structural" if kind in self._structural_kinds else "normative"
             normativity = None if role == "structural" else "must"
+        self.created += 1
         token = self._token(kind, num, parent_nid)
         base_nid = token if parent_nid == "root" else f"{parent_nid}.{token}"
         nid = self._nid_builder.unique(base_nid)
@@ -205,28 +259,180 @@ def _compile_markers(parser_profile: Dict[str, Any]) -> List[Tuple[Dict[str, Any
     return compiled
 
 
-def _starts_with_any_marker(
-    text: str,
-    compiled_markers: List[Tuple[Dict[str, Any], re.Pattern[str]]],
-) -> bool:
-    for _, pattern in compiled_markers:
-        if pattern.match(text):
-            return True
-    return False
+_CATEGORY_CLASSES = {
+    _sre_constants.CATEGORY_DIGIT: r"\d",
+    _sre_constants.CATEGORY_NOT_DIGIT: r"\D",
+    _sre_constants.CATEGORY_SPACE: r"\s",
+    _sre_constants.CATEGORY_NOT_SPACE: r"\S",
+    _sre_constants.CATEGORY_WORD: r"\w",
+    _sre_constants.CATEGORY_NOT_WORD: r"\W",
+}
+_REPEAT_OPS = {
+    op
+    for op in (
+        _sre_constants.MAX_REPEAT,
+        _sre_constants.MIN_REPEAT,
+        getattr(_sre_constants, "POSSESSIVE_REPEAT", None),
+    )
+    if op is not None
+}
+_ZERO_WIDTH_OPS = {_sre_constants.AT, _sre_constants.ASSERT, _sre_constants.ASSERT_NOT}
+
+
+def _scoped_class(char_class: str, flags: int) -> str:
+    inline = ("i" if flags & re.IGNORECASE else "") + ("a" if flags & re.ASCII else "")
+    return f"(?{inline}:{char_class})" if inline else char_class
+
+
+def _render_char_class(items: List[Tuple[Any, Any]]) -> Optional[str]:
+    parts: List[str] = []
+    negate = False
+    for op, av in items:
+        if op is _sre_constants.NEGATE:
+            negate = True
+        elif op is _sre_constants.LITERAL:
+            parts.append(re.escape(chr(av)))
+        elif op is _sre_constants.RANGE:
+            parts.append(f"{re.escape(chr(av[0]))}-{re.escape(chr(av[1]))}")
+        elif op is _sre_constants.CATEGORY and av in _CATEGORY_CLASSES:
+            parts.append(_CATEGORY_CLASSES[av])
+        else:
+            return None
+    return "[" + ("^" if negate else "") + "".join(parts) + "]"
+
+
+def _head_classes(items: List[Tuple[Any, Any]], flags: int) -> Tuple[Optional[List[str]], bool]:
+    """Character classes one of which the first consumed character must match.
+
+    Returns ``(None, _)`` when the first character is unconstrained, and
+    ``nullable=True`` when the sequence may consume nothing at all.
+    """
+    classes: List[str] = []
+    for op, av in items:
+        if op in _ZERO_WIDTH_OPS:
+            continue
+        if op is _sre_constants.LITERAL:
+            return classes + [_scoped_class(f"[{re.escape(chr(av))}]", flags)], False
+        if op is _sre_constants.NOT_LITERAL:
+            return classes + [_scoped_class(f"[^{re.escape(chr(av))}]", flags)], False
+        if op is _sre_constants.IN:
+            rendered = _render_char_class(list(av))
+            if rendered is None:
+                return None, False
+            return classes + [_scoped_class(rendered, flags)], False
+        if op in _REPEAT_OPS or op is _sre_constants.SUBPATTERN:
+            if op is _sre_constants.SUBPATTERN:
+                _, add_flags, del_flags, sub = av
+                sub_flags = (flags | add_flags) & ~del_flags
+                min_count = 1
+            else:
+                min_count, _, sub = av
+                sub_flags = flags
+            sub_classes, sub_nullable = _head_classes(list(sub), sub_flags)
+            if sub_classes is None:
+                return None, False
+            classes.extend(sub_classes)
+            if min_count > 0 and not sub_nullable:
+                return classes, False
+            continue
+        if op is _sre_constants.BRANCH:
+            nullable = False
+            for alternative in av[1]:
+                alt_classes, alt_nullable = _head_classes(list(alternative), flags)
+                if alt_classes is None:
+                    return None, False
+                classes.extend(alt_classes)
+                nullable = nullable or alt_nullable
+            if not nullable:
+                return classes, False
+            continue
+        return None, False
+    return classes, True
+
+
+def _first_char_pattern(pattern: re.Pattern[str]) -> Optional[re.Pattern[str]]:
+    """A one-character pattern that every text matched by ``pattern`` starts with, if derivable."""
+    try:
+        parsed = _sre_parse.parse(pattern.pattern, pattern.flags)
+        classes, nullable = _head_classes(list(parsed), parsed.state.flags)
+        if classes is None or nullable:
+            return None
+        return re.compile("|".join(classes))
+    except Exception:
+        return None
+
+
+class _MarkerMatcher:
+    """``marker_types`` compiled once per parse, dispatched on the line's first character.
+
+    Each marker regex is only tried on lines whose first character it can
+    match; the per-character candidate lists keep profile order, so results
+    are identical to trying every marker in turn.
+    """
+
+    def __init__(self, compiled_markers: List[Tuple[Dict[str, Any], re.Pattern[str]]]) -> None:
+        self.markers = compiled_markers
+        self._heads = [_first_char_pattern(pattern) for _, pattern in compiled_markers]
+        self._all = tuple(range(len(compiled_markers)))
+        self._by_first_char: Dict[str, Tuple[int, ...]] = {}
+
+    def _candidates(self, text: str) -> Tuple[int, ...]:
+        if not text:
+            return self._all
+        first = text[0]
+        hit = self._by_first_char.get(first)
+        if hit is None:
+            hit = tuple(
+                order for order, head in enumerate(self._heads) if head is None or head.match(first)
+            )
+            self._by_first_char[first] = hit
+        return hit
+
+    def match_all(self, text: str) -> List[MarkerMatch]:
+        matches: List[MarkerMatch] = []
+        for order in self._candidates(text):
+            marker, pattern = self.markers[order]
+            m = pattern.match(text)
+            if not m:
+                continue
+            matches.append(
+                MarkerMatch(
+                    marker_id=str(marker.get("id") or f"marker_{order}"),
+                    kind=marker["kind"],
+                    kind_raw=marker.get("kind_raw"),
+                    num=_extract_num(marker, m),
+                    raw_token=m.group(0).strip(),
+                    span_end=m.end(),
+                    order=order,
+                )
+            )
+        return matches
+
+    def starts_with_any(self, text: str) -> bool:
+        markers = self.markers
+        return any(markers[order][1].match(text) for order in self._candidates(text))
+
+    def structural_end(self, text: str, structural_kinds: Set[str]) -> Optional[Tuple[str, int]]:
+        for order in self._candidates(text):
+            marker, pattern = self.markers[order]
+            if marker.get("kind") not in structural_kinds:
+                continue
+            matched = pattern.match(text)
+            if matched:
+                return str(marker.get("kind")), matched.end()
+        return None
+
+
+def _starts_with_any_marker(text: str, marker_matcher: _MarkerMatcher) -> bool:
+    return marker_matcher.starts_with_any(text)
 
 
 def _find_structural_marker_end(
     text: str,
-    compiled_markers: List[Tuple[Dict[str, Any], re.Pattern[str]]],
+    marker_matcher: _MarkerMatcher,
     structural_kinds: Set[str],
 ) -> Optional[Tuple[str, int]]:
-    for marker, pattern in compiled_markers:
-        if marker.get("kind") not in structural_kinds:
-            continue
-        matched = pattern.match(text)
-        if matched:
-            return str(marker.get("kind")), matched.end()
-    return None
+    return marker_matcher.structural_end(text, structural_kinds)
 
 
 def _looks_like_heading_line(text: str) -> bool:
@@ -240,13 +446,6 @@ def _looks_like_heading_line(text: str) -> bool:
     return True
 
 
-def _strip_inline_patterns(text: str, strip_inline_regexes: List[re.Pattern[str]]) -> str:
-    cleaned = text
-    for pat in strip_inline_regexes:
-        cleaned = pat.sub("", cleaned)
-    return cleaned
-
-
 def _is_md_table_separator(line: str) -> bool:
     candidate = line.strip()
     if not candidate:
@@ -273,28 +472,296 @@ def _looks_like_md_table_header(line: str) -> bool:
     return candidate.count("|") >= 2 and not _is_md_table_separator(candidate)
 
 
-def _collect_md_table_block(
-    lines: List[str],
-    start_idx: int,
-    strip_inline_regexes: List[re.Pattern[str]],
-) -> Optional[Dict[str, Any]]:
-    if start_idx + 2 >= len(lines):
+class _LineSource:
+    """Input lines, streamed from ``path`` in chunks or taken from ``lines``.
+
+    Iteration splits exactly like ``read_text().splitlines()``; ``line_count``
+    is known once a full pass has finished.
+    """
+
+    def __init__(self, path: Path, lines: Optional[List[str]] = None) -> None:
+        self.path = path
+        self._lines = lines
+        self.line_count: Optional[int] = len(lines) if lines is not None else None
+
+    def __iter__(self) -> Iterator[str]:
+        if self._lines is not None:
+            yield from self._lines
+            return
+        count = 0
+        with self.path.open("r", encoding="utf-8") as f:
+            carry = ""
+            while True:
+                chunk = f.read(STREAM_READ_CHUNK_CHARS)
+                if not chunk:
+                    break
+                # The last piece may continue in the next chunk, so it is always carried over.
+                pieces = (carry + chunk).splitlines(keepends=True)
+                carry = pieces.pop()
+                for piece in pieces:
+                    count += 1
+                    yield piece.splitlines()[0]
+            if carry:
+                count += 1
+                yield carry.splitlines()[0]
+        self.line_count = count
+
+    def slices(self, ranges: List[Tuple[int, int]]) -> List[List[str]]:
+        """Lines ``[start, end)`` for each range, reading the input at most once more."""
+        if self._lines is not None:
+            return [self._lines[start:end] for start, end in ranges]
+        out: List[List[str]] = [[] for _ in ranges]
+        pending = sorted(range(len(ranges)), key=lambda k: ranges[k][0])
+        active: List[int] = []
+        nxt = 0
+        last_end = max((end for _, end in ranges), default=0)
+        for idx, line in enumerate(islice(self, last_end)):
+            while nxt < len(pending) and ranges[pending[nxt]][0] <= idx:
+                active.append(pending[nxt])
+                nxt += 1
+            if active:
+                active = [k for k in active if ranges[k][1] > idx]
+                for k in active:
+                    out[k].append(line)
+        return out
+
+
+class _LineWindow:
+    """Lookahead over a line stream for the rewriting stages; offset 0 is the current line."""
+
+    __slots__ = ("_lines", "_ahead")
+
+    def __init__(self, lines: Iterable[PreparedLine]) -> None:
+        self._lines = iter(lines)
+        self._ahead: Deque[PreparedLine] = deque()
+
+    def has(self, offset: int) -> bool:
+        while len(self._ahead) <= offset:
+            line = next(self._lines, None)
+            if line is None:
+                return False
+            self._ahead.append(line)
+        return True
+
+    def __getitem__(self, offset: int) -> PreparedLine:
+        return self._ahead[offset]
+
+    def advance(self) -> PreparedLine:
+        return self._ahead.popleft()
+
+
+class _LineBuffer:
+    """Sliding window over the preprocessed lines.
+
+    Lines are pulled on demand, so the table and note collectors look ahead as
+    far as they need, and ``release`` drops lines the main loop has passed
+    (except the first ``pinned``). Consumed table/note lines are tracked in a
+    bitmap and read back as blank. Table-separator/header flags and the marker
+    probe are computed on first use and cached.
+    """
+
+    __slots__ = (
+        "_lines",
+        "_marker_matcher",
+        "_pinned",
+        "_base",
+        "_size",
+        "_raw",
+        "_cleaned",
+        "_stripped",
+        "_separator",
+        "_header",
+        "_marker",
+        "_consumed",
+        "_released_nonblank",
+    )
+
+    def __init__(
+        self,
+        lines: Iterable[PreparedLine],
+        marker_matcher: _MarkerMatcher,
+        *,
+        pinned: int = 0,
+    ) -> None:
+        self._lines = iter(lines)
+        self._marker_matcher = marker_matcher
+        self._pinned = pinned
+        # Absolute index of the first windowed line; entries before it (after the pinned prefix) are released.
+        self._base = pinned
+        self._size = 0
+        self._raw: List[str] = []
+        self._cleaned: List[str] = []
+        self._stripped: List[str] = []
+        self._separator: List[Optional[bool]] = []
+        self._header: List[Optional[bool]] = []
+        self._marker: List[Optional[bool]] = []
+        self._consumed = bytearray()
+        self._released_nonblank: Optional[Tuple[int, str]] = None
+
+    def has(self, idx: int) -> bool:
+        while self._size <= idx:
+            line = next(self._lines, None)
+            if line is None:
+                return False
+            self._raw.append(line.raw)
+            self._cleaned.append(line.cleaned)
+            self._stripped.append(line.stripped)
+            self._separator.append(None)
+            self._header.append(None)
+            self._marker.append(None)
+            if self._size % 8 == 0:
+                self._consumed.append(0)
+            self._size += 1
+        return True
+
+    @property
+    def pinned(self) -> int:
+        return self._pinned
+
+    @property
+    def pulled(self) -> int:
+        """Lines read from the input so far (one past the highest index looked at)."""
+        return self._size
+
+    def seek(
+        self,
+        start: int,
+        *,
+        consumed: Iterable[int] = (),
+        released_nonblank: Optional[Tuple[int, str]] = None,
+    ) -> None:
+        """Continue at line ``start`` as if the lines between the pinned prefix and it were released.
+
+        The underlying line stream must yield the pinned lines followed by line
+        ``start``; ``consumed`` marks lines taken by blocks and ``released_nonblank`` is
+        what ``nonblank_before`` reports for the released stretch.
+        """
+        self.has(self._pinned - 1)
+        self._base = self._size = start
+        consumed = list(consumed)
+        upto = max([start, *consumed]) + 8
+        self._consumed.extend(bytes(max(0, upto // 8 - len(self._consumed))))
+        for idx in consumed:
+            self.consume(idx)
+        self._released_nonblank = released_nonblank
+
+    def _pos(self, idx: int) -> int:
+        if idx >= self._size and not self.has(idx):
+            raise IndexError(f"line {idx} is past the end of input")
+        if idx < self._pinned:
+            return idx
+        if idx < self._base:
+            raise IndexError(f"line {idx} was released")
+        return self._pinned + idx - self._base
+
+    def is_consumed(self, idx: int) -> bool:
+        return bool(self._consumed[idx >> 3] & (1 << (idx & 7)))
+
+    def consume(self, idx: int) -> None:
+        self._consumed[idx >> 3] |= 1 << (idx & 7)
+
+    def raw(self, idx: int) -> str:
+        pos = self._pos(idx)
+        return "" if self.is_consumed(idx) else self._raw[pos]
+
+    def cleaned(self, idx: int) -> str:
+        pos = self._pos(idx)
+        return "" if self.is_consumed(idx) else self._cleaned[pos]
+
+    def stripped(self, idx: int) -> str:
+        pos = self._pos(idx)
+        return "" if self.is_consumed(idx) else self._stripped[pos]
+
+    def texts(self, idx: int) -> Tuple[str, str, str]:
+        """``(raw, cleaned, stripped)`` for one line, all blank once it is consumed."""
+        pos = self._pos(idx)
+        if self.is_consumed(idx):
+            return "", "", ""
+        return self._raw[pos], self._cleaned[pos], self._stripped[pos]
+
+    def is_blank(self, idx: int) -> bool:
+        return not self.raw(idx).strip()
+
+    def raw_indent(self, idx: int) -> int:
+        return _leading_space_count(self.raw(idx))
+
+    def is_indented(self, idx: int) -> bool:
+        return self.raw(idx).startswith((" ", "\t"))
+
+    def is_table_separator(self, idx: int) -> bool:
+        pos = self._pos(idx)
+        if self.is_consumed(idx):
+            return False
+        flag = self._separator[pos]
+        if flag is None:
+            flag = self._separator[pos] = _is_md_table_separator(self._stripped[pos])
+        return flag
+
+    def is_table_header(self, idx: int) -> bool:
+        pos = self._pos(idx)
+        if self.is_consumed(idx):
+            return False
+        flag = self._header[pos]
+        if flag is None:
+            flag = self._header[pos] = self._stripped[pos].count("|") >= 2 and not self.is_table_separator(idx)
+        return flag
+
+    def starts_with_marker(self, idx: int) -> bool:
+        pos = self._pos(idx)
+        if self.is_consumed(idx):
+            return False
+        flag = self._marker[pos]
+        if flag is None:
+            flag = self._marker[pos] = self._marker_matcher.starts_with_any(self._stripped[pos])
+        return flag
+
+    def nonblank_before(self, idx: int) -> Optional[Tuple[int, str]]:
+        """The closest earlier line with text, looking through released lines too."""
+        idx -= 1
+        while idx >= 0:
+            if self._pinned <= idx < self._base:
+                if self._released_nonblank is not None:
+                    return self._released_nonblank
+                idx = self._pinned - 1
+                continue
+            stripped = self.stripped(idx)
+            if stripped:
+                return idx, stripped
+            idx -= 1
         return None
-    header_line = _strip_inline_patterns(lines[start_idx], strip_inline_regexes).strip()
-    separator_line = _strip_inline_patterns(lines[start_idx + 1], strip_inline_regexes).strip()
-    if not _looks_like_md_table_header(header_line):
+
+    def release(self, upto: int) -> None:
+        """Allow lines before ``upto`` to be dropped; they are compacted in batches."""
+        if upto - self._base < LINE_BUFFER_RELEASE_BATCH:
+            return
+        for idx in range(upto - 1, self._base - 1, -1):
+            stripped = self.stripped(idx)
+            if stripped:
+                self._released_nonblank = (idx, stripped)
+                break
+        start = self._pinned
+        stop = self._pinned + upto - self._base
+        for entries in (self._raw, self._cleaned, self._stripped, self._separator, self._header, self._marker):
+            del entries[start:stop]
+        self._base = upto
+
+
+def _collect_md_table_block(buffer: _LineBuffer, start_idx: int) -> Optional[Dict[str, Any]]:
+    if not buffer.has(start_idx + 2):
+        return None
+    if not buffer.is_table_header(start_idx):
         return None
-    if not _is_md_table_separator(separator_line):
+    if not buffer.is_table_separator(start_idx + 1):
         return None
     row_entries: List[Tuple[int, str]] = []
     idx = start_idx + 2
-    while idx < len(lines):
-        row_line = _strip_inline_patterns(lines[idx], strip_inline_regexes).strip()
+    while buffer.has(idx):
+        row_line = buffer.stripped(idx)
         if not row_line:
             break
         if "|" not in row_line:
             break
-        if _is_md_table_separator(row_line):
+        if buffer.is_table_separator(idx):
             break
         row_entries.append((idx, row_line))
         idx += 1
@@ -302,54 +769,50 @@ def _collect_md_table_block(
         return None
     return {
         "header_idx": start_idx,
-        "header_line": header_line,
+        "header_line": buffer.stripped(start_idx),
         "separator_idx": start_idx + 1,
-        "separator_line": separator_line,
+        "separator_line": buffer.stripped(start_idx + 1),
         "rows": row_entries,
         "end_idx": idx,
     }
 
 
 def _collect_table_notes(
-    lines: List[str],
+    buffer: _LineBuffer,
     start_idx: int,
-    strip_inline_regexes: List[re.Pattern[str]],
     drop_line_regexes: List[re.Pattern[str]],
     drop_line_exact: Set[str],
-    compiled_markers: List[Tuple[Dict[str, Any], re.Pattern[str]]],
 ) -> Tuple[List[Tuple[int, str]], int]:
-    if start_idx >= len(lines):
+    if not buffer.has(start_idx):
         return [], start_idx
     first_idx = start_idx
     blanks = 0
-    while first_idx < len(lines):
-        probe = _strip_inline_patterns(lines[first_idx], strip_inline_regexes).strip()
-        if probe:
+    while buffer.has(first_idx):
+        if buffer.stripped(first_idx):
             break
         blanks += 1
         if blanks > 2:
             return [], start_idx
         first_idx += 1
-    if first_idx >= len(lines):
+    if not buffer.has(first_idx):
         return [], start_idx
-    first = _strip_inline_patterns(lines[first_idx], strip_inline_regexes).strip()
+    first = buffer.stripped(first_idx)
     if not first or not TABLE_NOTE_TRIGGER_PATTERN.match(first):
         return [], start_idx
     note_entries: List[Tuple[int, str]] = []
     idx = first_idx
-    while idx < len(lines):
-        raw = lines[idx]
-        cleaned = _strip_inline_patterns(raw, strip_inline_regexes).strip()
+    while buffer.has(idx):
+        cleaned = buffer.stripped(idx)
         if not cleaned:
             break
         if cleaned in drop_line_exact or any(pat.match(cleaned) for pat in drop_line_regexes):
             break
-        if _starts_with_any_marker(cleaned, compiled_markers):
+        if buffer.starts_with_marker(idx):
             break
         if idx > start_idx:
             if TABLE_NOTE_TRIGGER_PATTERN.match(cleaned):
                 pass
-            elif raw.startswith(" ") or raw.startswith("\t"):
+            elif buffer.is_indented(idx):
                 pass
             else:
                 break
@@ -358,39 +821,30 @@ def _collect_table_notes(
     return note_entries, idx
 
 
-def _find_table_caption(
-    lines: List[str],
-    header_idx: int,
-    strip_inline_regexes: List[re.Pattern[str]],
-) -> Optional[Tuple[int, str]]:
-    idx = header_idx - 1
-    while idx >= 0:
-        candidate = _strip_inline_patterns(lines[idx], strip_inline_regexes).strip()
-        if not candidate:
-            idx -= 1
-            continue
-        candidate_plain = re.sub(r"^\*{1,2}(.*?)\*{1,2}$", r"\1", candidate).strip()
-        candidate_plain = re.sub(r"^_{1,2}(.*?)_{1,2}$", r"\1", candidate_plain).strip()
-        if TABLE_CAPTION_PATTERN.match(candidate_plain):
-            return idx, candidate_plain
+def _find_table_caption(buffer: _LineBuffer, header_idx: int) -> Optional[Tuple[int, str]]:
+    previous = buffer.nonblank_before(header_idx)
+    if previous is None:
         return None
+    idx, candidate = previous
+    candidate_plain = re.sub(r"^\*{1,2}(.*?)\*{1,2}$", r"\1", candidate).strip()
+    candidate_plain = re.sub(r"^_{1,2}(.*?)_{1,2}$", r"\1", candidate_plain).strip()
+    if TABLE_CAPTION_PATTERN.match(candidate_plain):
+        return idx, candidate_plain
     return None
 
 
 def _collect_note_block(
-    lines: List[str],
+    buffer: _LineBuffer,
     start_idx: int,
     *,
-    strip_inline_regexes: List[re.Pattern[str]],
     drop_line_regexes: List[re.Pattern[str]],
     drop_line_exact: Set[str],
-    compiled_markers: List[Tuple[Dict[str, Any], re.Pattern[str]]],
     start_patterns: List[re.Pattern[str]],
     max_lines: int,
 ) -> Tuple[List[Tuple[int, str]], int]:
-    if start_idx >= len(lines):
+    if not buffer.has(start_idx):
         return [], start_idx
-    first = _strip_inline_patterns(lines[start_idx], strip_inline_regexes).strip()
+    first = buffer.stripped(start_idx)
     if not first:
         return [], start_idx
     if not any(pat.match(first) for pat in start_patterns):
@@ -398,16 +852,15 @@ def _collect_note_block(
 
     note_entries: List[Tuple[int, str]] = []
     idx = start_idx
-    while idx < len(lines) and len(note_entries) < max_lines:
-        raw = lines[idx]
-        cleaned = _strip_inline_patterns(raw, strip_inline_regexes).strip()
+    while buffer.has(idx) and len(note_entries) < max_lines:
+        cleaned = buffer.stripped(idx)
         if not cleaned:
             break
         if cleaned in drop_line_exact or any(pat.match(cleaned) for pat in drop_line_regexes):
             break
-        if idx > start_idx and _starts_with_any_marker(cleaned, compiled_markers):
+        if idx > start_idx and buffer.starts_with_marker(idx):
             break
-        if idx > start_idx and not (raw.startswith(" ") or raw.startswith("\t")):
+        if idx > start_idx and not buffer.is_indented(idx):
             if any(pat.match(cleaned) for pat in start_patterns):
                 pass
             else:
@@ -417,6 +870,21 @@ def _collect_note_block(
     return note_entries, idx
 
 
+def _leading_probe_lines(
+    buffer: _LineBuffer,
+    pinned: int,
+    note_start_patterns: List[re.Pattern[str]],
+) -> List[int]:
+    """Pinned lines that may still open a table or note block when probed."""
+    probes: List[int] = []
+    for idx in range(pinned):
+        if buffer.is_table_header(idx) and buffer.is_table_separator(idx + 1):
+            probes.append(idx)
+        elif any(pat.match(buffer.stripped(idx)) for pat in note_start_patterns):
+            probes.append(idx)
+    return probes
+
+
 def _is_punctuation_only(value: str) -> bool:
     return bool(value) and not re.sub(r"[\s\.\:\-–—]", "", value)
 
@@ -451,166 +919,246 @@ def _looks_like_heading_continuation(remainder: str, next_stripped: str) -> bool
     return False
 
 
-def _join_mid_sentence_marker_refs_into_prev(
-    lines: List[str],
-    *,
-    strip_inline_regexes: List[re.Pattern[str]],
-    join_cfg: Dict[str, Any],
-) -> List[str]:
-    if not bool(join_cfg.get("enabled")):
-        return lines
-    kinds = {
-        str(v).strip().lower()
-        for v in (join_cfg.get("kinds") or [])
-        if str(v).strip()
-    }
-    if not kinds:
-        return lines
-    max_ref_line_len_raw = join_cfg.get("max_ref_line_len", 40)
-    max_ref_line_len = int(max_ref_line_len_raw) if str(max_ref_line_len_raw).strip() else 40
-    if max_ref_line_len <= 0:
-        max_ref_line_len = 40
-    prev_must_not_end = re.compile(str(join_cfg.get("prev_must_not_end_regex") or r"[.!?]\s*$"))
-    prev_prefer_endwords = [
-        str(v).strip().lower()
-        for v in (join_cfg.get("prev_prefer_endwords") or [])
-        if str(v).strip()
-    ]
-
-    merged = list(lines)
-    bare_patterns: List[re.Pattern[str]] = []
-    if "annex" in kinds:
-        bare_patterns.append(re.compile(r"(?i)^annex\s+\d+\.?\s*$"))
-    if not bare_patterns:
-        return merged
-
-    for idx in range(1, len(merged)):
-        raw = merged[idx]
-        cleaned = _strip_inline_patterns(raw.lstrip(), strip_inline_regexes).strip()
-        if not cleaned or len(cleaned) > max_ref_line_len:
-            continue
-        if not any(pat.match(cleaned) for pat in bare_patterns):
-            continue
-        prev_raw = merged[idx - 1]
-        prev_cleaned = _strip_inline_patterns(prev_raw, strip_inline_regexes).strip()
+@register_stage
+class _StripInlineStage(RewriteStage):
+    name = "strip_inline_regexes"
+
+    def __init__(self, *, stripper: InlineStripper) -> None:
+        super().__init__()
+        self._stripper = stripper
+
+    @classmethod
+    def compile(cls, compiled: CompiledProfile) -> Optional[Dict[str, Any]]:
+        if not compiled.strip_inline_regexes:
+            return None
+        return {"stripper": InlineStripper(compiled.strip_inline_regexes)}
+
+    def process(self, lines: Iterator[PreparedLine]) -> Iterator[PreparedLine]:
+        stats = self.stats
+        for line in lines:
+            stats.lines += 1
+            line.set_stripper(self._stripper)
+            if line.cleaned != line.raw:
+                stats.count("changed")
+            yield line
+
+
+@register_stage
+class _JoinMidSentenceRefsStage(RewriteStage):
+    """Join a bare ``Annex N`` line into the sentence it interrupts."""
+
+    name = "join_mid_sentence_marker_refs_into_prev"
+
+    def __init__(
+        self,
+        *,
+        bare_patterns: Tuple[re.Pattern[str], ...],
+        max_ref_line_len: int,
+        prev_must_not_end: re.Pattern[str],
+        prev_prefer_endwords: Tuple[str, ...],
+    ) -> None:
+        super().__init__()
+        self._bare_patterns = bare_patterns
+        self._max_ref_line_len = max_ref_line_len
+        self._prev_must_not_end = prev_must_not_end
+        self._prev_prefer_endwords = prev_prefer_endwords
+
+    @classmethod
+    def compile(cls, compiled: CompiledProfile) -> Optional[Dict[str, Any]]:
+        join_cfg = compiled.join_mid_sentence_cfg
+        if not bool(join_cfg.get("enabled")):
+            return None
+        kinds = {
+            str(v).strip().lower()
+            for v in (join_cfg.get("kinds") or [])
+            if str(v).strip()
+        }
+        if not kinds:
+            return None
+        max_ref_line_len_raw = join_cfg.get("max_ref_line_len", 40)
+        max_ref_line_len = int(max_ref_line_len_raw) if str(max_ref_line_len_raw).strip() else 40
+        if max_ref_line_len <= 0:
+            max_ref_line_len = 40
+        prev_must_not_end = re.compile(str(join_cfg.get("prev_must_not_end_regex") or r"[.!?]\s*$"))
+        prev_prefer_endwords = tuple(
+            str(v).strip().lower()
+            for v in (join_cfg.get("prev_prefer_endwords") or [])
+            if str(v).strip()
+        )
+        bare_patterns: List[re.Pattern[str]] = []
+        if "annex" in kinds:
+            bare_patterns.append(re.compile(r"(?i)^annex\s+\d+\.?\s*$"))
+        if not bare_patterns:
+            return None
+        return {
+            "bare_patterns": tuple(bare_patterns),
+            "max_ref_line_len": max_ref_line_len,
+            "prev_must_not_end": prev_must_not_end,
+            "prev_prefer_endwords": prev_prefer_endwords,
+        }
+
+    def process(self, lines: Iterator[PreparedLine]) -> Iterator[PreparedLine]:
+        # One line of lookbehind: a joined reference line is replaced with an empty line.
+        previous = next(lines, None)
+        if previous is None:
+            return
+        self.stats.lines += 1
+        for line in lines:
+            self.stats.lines += 1
+            joined = self._join(previous, line)
+            if joined is not None:
+                previous.rewrite(joined)
+                line.rewrite("")
+                self.stats.count("joined")
+            yield previous
+            previous = line
+        yield previous
+
+    def _join(self, prev: PreparedLine, line: PreparedLine) -> Optional[str]:
+        cleaned = line.lead_cleaned.strip()
+        if not cleaned or len(cleaned) > self._max_ref_line_len:
+            return None
+        if not any(pat.match(cleaned) for pat in self._bare_patterns):
+            return None
+        prev_cleaned = prev.stripped
         if not prev_cleaned:
-            continue
-        if prev_must_not_end.search(prev_cleaned):
-            continue
-        if prev_prefer_endwords:
+            return None
+        if self._prev_must_not_end.search(prev_cleaned):
+            return None
+        if self._prev_prefer_endwords:
             words = re.findall(r"[A-Za-z]+", prev_cleaned.lower())
-            if words and words[-1] not in prev_prefer_endwords:
-                continue
-        merged[idx - 1] = f"{prev_raw.rstrip()} {cleaned}"
-        merged[idx] = ""
-    return merged
+            if words and words[-1] not in self._prev_prefer_endwords:
+                return None
+        return f"{prev.raw.rstrip()} {cleaned}"
 
 
-def _merge_structural_marker_heading_lines(
-    lines: List[str],
-    compiled_markers: List[Tuple[Dict[str, Any], re.Pattern[str]]],
-    structural_kinds: Set[str],
-    *,
-    strip_inline_regexes: List[re.Pattern[str]],
-    continuation_cfg: Dict[str, Any],
-) -> List[str]:
-    # Keep line count stable: merged next line is replaced with an empty line.
-    merged = list(lines)
-    continuation_enabled = bool(continuation_cfg.get("enabled"))
-    continuation_kinds = {
-        str(v).strip().lower()
-        for v in (continuation_cfg.get("kinds") or [])
-        if str(v).strip()
-    }
-    max_next_line_len_raw = continuation_cfg.get("max_next_line_len", 60)
-    max_next_line_len = int(max_next_line_len_raw) if str(max_next_line_len_raw).strip() else 60
-    max_merge_lines_raw = continuation_cfg.get("max_merge_lines", 2)
-    max_merge_lines = int(max_merge_lines_raw) if str(max_merge_lines_raw).strip() else 2
-    max_blank_lookahead_raw = continuation_cfg.get("max_blank_lookahead", 2)
-    max_blank_lookahead = (
-        int(max_blank_lookahead_raw) if str(max_blank_lookahead_raw).strip() else 2
-    )
-    if max_next_line_len <= 0:
-        max_next_line_len = 60
-    if max_merge_lines <= 0:
-        max_merge_lines = 1
-    if max_blank_lookahead < 0:
-        max_blank_lookahead = 0
-    idx = 0
-    while idx < len(merged) - 1:
-        current = merged[idx]
-        if not current.strip():
-            idx += 1
-            continue
-        current_stripped = current.lstrip()
-        current_cleaned = _strip_inline_patterns(current_stripped, strip_inline_regexes)
-        marker_info = _find_structural_marker_end(
-            current_cleaned,
-            compiled_markers,
-            structural_kinds,
+NORMATIVE_VERB_PATTERN = re.compile(r"\b(?:must|shall|should|may)\b", re.IGNORECASE)
+
+
+@register_stage
+class _MergeHeadingContinuationsStage(RewriteStage):
+    """Pull the wrapped rest of a structural heading up onto its marker line."""
+
+    name = "merge_structural_heading_continuations"
+
+    def __init__(
+        self,
+        *,
+        marker_matcher: _MarkerMatcher,
+        structural_kinds: FrozenSet[str],
+        continuation_enabled: bool,
+        continuation_kinds: FrozenSet[str],
+        max_next_line_len: int,
+        max_merge_lines: int,
+        max_blank_lookahead: int,
+    ) -> None:
+        super().__init__()
+        self._marker_matcher = marker_matcher
+        self._structural_kinds = structural_kinds
+        self._continuation_enabled = continuation_enabled
+        self._continuation_kinds = continuation_kinds
+        self._max_next_line_len = max_next_line_len
+        self._max_merge_lines = max_merge_lines
+        self._max_blank_lookahead = max_blank_lookahead
+
+    @classmethod
+    def compile(cls, compiled: CompiledProfile) -> Optional[Dict[str, Any]]:
+        continuation_cfg = compiled.heading_continuation_cfg
+        max_next_line_len_raw = continuation_cfg.get("max_next_line_len", 60)
+        max_next_line_len = int(max_next_line_len_raw) if str(max_next_line_len_raw).strip() else 60
+        max_merge_lines_raw = continuation_cfg.get("max_merge_lines", 2)
+        max_merge_lines = int(max_merge_lines_raw) if str(max_merge_lines_raw).strip() else 2
+        max_blank_lookahead_raw = continuation_cfg.get("max_blank_lookahead", 2)
+        max_blank_lookahead = (
+            int(max_blank_lookahead_raw) if str(max_blank_lookahead_raw).strip() else 2
         )
-        if marker_info is None:
-            idx += 1
-            continue
-        marker_kind, marker_end = marker_info
-        merged_any = False
+        if max_next_line_len <= 0:
+            max_next_line_len = 60
+        if max_merge_lines <= 0:
+            max_merge_lines = 1
+        if max_blank_lookahead < 0:
+            max_blank_lookahead = 0
+        return {
+            "marker_matcher": compiled.marker_matcher,
+            "structural_kinds": compiled.structural_kinds,
+            "continuation_enabled": bool(continuation_cfg.get("enabled")),
+            "continuation_kinds": frozenset(
+                str(v).strip().lower()
+                for v in (continuation_cfg.get("kinds") or [])
+                if str(v).strip()
+            ),
+            "max_next_line_len": max_next_line_len,
+            "max_merge_lines": max_merge_lines,
+            "max_blank_lookahead": max_blank_lookahead,
+        }
+
+    def process(self, lines: Iterator[PreparedLine]) -> Iterator[PreparedLine]:
+        # Keep line count stable: merged next line is replaced with an empty line.
+        window = _LineWindow(lines)
+        while window.has(1):
+            self.stats.lines += 1
+            self._merge_into_current(window)
+            yield window.advance()
+        while window.has(0):
+            self.stats.lines += 1
+            yield window.advance()
+
+    def _find_marker(self, line: PreparedLine) -> Optional[Tuple[str, int]]:
+        return _find_structural_marker_end(line.lead_cleaned, self._marker_matcher, self._structural_kinds)
+
+    def _merge_into_current(self, window: _LineWindow) -> None:
+        # Offsets are relative to the current line; the window pulls lookahead lines on demand.
+        current = window[0]
+        if not current.raw.strip():
+            return
+        marker_info = self._find_marker(current)
         merged_count = 0
-        while merged_count < max_merge_lines:
-            current_stripped = merged[idx].lstrip()
-            current_cleaned = _strip_inline_patterns(current_stripped, strip_inline_regexes)
-            current_marker_info = _find_structural_marker_end(
-                current_cleaned,
-                compiled_markers,
-                structural_kinds,
-            )
-            if current_marker_info is None:
-                break
-            marker_kind, marker_end = current_marker_info
-            remainder = current_cleaned[marker_end:].strip()
+        while marker_info is not None and merged_count < self._max_merge_lines:
+            marker_kind, marker_end = marker_info
+            remainder = current.lead_cleaned[marker_end:].strip()
             remainder_for_rule = "" if _is_punctuation_only(remainder) else remainder
 
-            next_idx = idx + 1
+            next_idx = 1
             blank_count = 0
             while (
-                next_idx < len(merged)
-                and not merged[next_idx].strip()
-                and blank_count < max_blank_lookahead
+                window.has(next_idx)
+                and not window[next_idx].raw.strip()
+                and blank_count < self._max_blank_lookahead
             ):
                 next_idx += 1
                 blank_count += 1
-            if next_idx >= len(merged):
+            if not window.has(next_idx):
                 break
 
-            next_line = merged[next_idx]
-            next_cleaned = _strip_inline_patterns(next_line, strip_inline_regexes)
-            next_stripped = next_cleaned.strip()
+            next_line = window[next_idx]
+            next_stripped = next_line.stripped
             if not next_stripped:
                 break
             if _looks_like_md_table_header(next_stripped):
                 break
             if TABLE_CAPTION_PATTERN.match(next_stripped):
                 probe_idx = next_idx + 1
-                while probe_idx < len(merged) and not merged[probe_idx].strip():
+                while window.has(probe_idx) and not window[probe_idx].raw.strip():
                     probe_idx += 1
-                if probe_idx + 1 < len(merged):
-                    probe_header = _strip_inline_patterns(merged[probe_idx], strip_inline_regexes).strip()
-                    probe_sep = _strip_inline_patterns(merged[probe_idx + 1], strip_inline_regexes).strip()
+                if window.has(probe_idx + 1):
+                    probe_header = window[probe_idx].stripped
+                    probe_sep = window[probe_idx + 1].stripped
                     if _looks_like_md_table_header(probe_header) and _is_md_table_separator(probe_sep):
                         break
-            if _starts_with_any_marker(next_cleaned.lstrip(), compiled_markers):
+            if _starts_with_any_marker(next_line.cleaned.lstrip(), self._marker_matcher):
                 break
             if not _looks_like_heading_line(next_stripped):
                 break
             should_merge = False
+            fits = marker_kind in self._continuation_kinds and len(next_stripped) <= self._max_next_line_len
             if not remainder_for_rule:
-                if not continuation_enabled:
+                if not self._continuation_enabled:
                     should_merge = True
-                elif marker_kind in continuation_kinds and len(next_stripped) <= max_next_line_len:
+                elif fits:
                     should_merge = True
             elif (
-                continuation_enabled
-                and marker_kind in continuation_kinds
-                and len(next_stripped) <= max_next_line_len
+                self._continuation_enabled
+                and fits
                 and _looks_like_heading_continuation(remainder_for_rule, next_stripped)
             ):
                 should_merge = True
@@ -618,32 +1166,157 @@ def _merge_structural_marker_heading_lines(
             if not should_merge:
                 break
 
-            merged[idx] = f"{merged[idx].rstrip()} {next_stripped}"
-            merged[next_idx] = ""
-            merged_any = True
+            current.rewrite(f"{current.raw.rstrip()} {next_stripped}")
+            next_line.rewrite("")
             merged_count += 1
+            self.stats.count("merged")
 
-            merged_cleaned = _strip_inline_patterns(merged[idx].lstrip(), strip_inline_regexes)
-            merged_marker_info = _find_structural_marker_end(
-                merged_cleaned,
-                compiled_markers,
-                structural_kinds,
-            )
-            merged_remainder = (
-                merged_cleaned[merged_marker_info[1] :].strip() if merged_marker_info else ""
-            )
-            if re.search(
-                r"\b(?:must|shall|should|may)\b",
-                merged_remainder,
-                flags=re.IGNORECASE,
-            ):
+            marker_info = self._find_marker(current)
+            merged_remainder = current.lead_cleaned[marker_info[1] :].strip() if marker_info else ""
+            if NORMATIVE_VERB_PATTERN.search(merged_remainder):
                 break
 
-        if merged_any:
-            idx += 1
-        else:
-            idx += 1
-    return merged
+
+@register_stage
+class _SkipBlocksStage(FilterStage):
+    """Drop everything between a skip block's start and end lines."""
+
+    name = "skip_blocks"
+    sees_blank_lines = True
+
+    def __init__(self, *, rules: Tuple[SkipBlockRule, ...]) -> None:
+        super().__init__()
+        self._rules = rules
+        self._state = SkipBlockState()
+
+    @classmethod
+    def compile(cls, compiled: CompiledProfile) -> Optional[Dict[str, Any]]:
+        if not compiled.skip_block_rules:
+            return None
+        return {"rules": compiled.skip_block_rules}
+
+    def _reset(self) -> None:
+        self._state = SkipBlockState()
+
+    def checkpoint(self) -> Optional[List[int]]:
+        state = self._state
+        if not state.active or state.rule_index is None:
+            return None
+        return [state.rule_index, state.seen_lines, state.start_line]
+
+    def restore(self, state: Optional[List[int]]) -> None:
+        self._reset()
+        if state is not None:
+            rule_index, seen_lines, start_line = state
+            self._state = SkipBlockState(
+                active=True, rule_index=rule_index, seen_lines=seen_lines, start_line=start_line
+            )
+
+    def admit(self, cursor: LineCursor) -> bool:
+        rules = self._rules
+        state = self._state
+        stripped_raw = cursor.stripped
+        if state.active and state.rule_index is not None:
+            active_rule = rules[state.rule_index]
+            state.seen_lines += 1
+            if active_rule.end_pattern.match(stripped_raw):
+                self._reset()
+                if not active_rule.include_end:
+                    return False
+            elif state.seen_lines > active_rule.max_lines:
+                LOGGER.warning(
+                    "skip_blocks end not found within max_lines=%s start_line=%s end_regex=%r",
+                    active_rule.max_lines,
+                    state.start_line,
+                    active_rule.end_pattern.pattern,
+                )
+                self.stats.count("unterminated")
+                self._reset()
+            else:
+                return False
+        state = self._state
+        # The parse loop used to probe tables and notes at the index of the last
+        # rule tried here (the rule loop rebound the line index); keep that probe
+        # position so outputs stay byte-identical.
+        for rule_idx, rule in enumerate(rules):
+            cursor.probe_idx = rule_idx
+            if not rule.start_pattern.match(stripped_raw):
+                continue
+            state.active = True
+            state.rule_index = rule_idx
+            state.seen_lines = 0
+            state.start_line = cursor.line_no
+            if not rule.include_start:
+                continue
+            break
+        if state.active and state.rule_index is not None:
+            self.stats.count("blocks")
+            if not rules[state.rule_index].include_start:
+                return False
+        return True
+
+
+@register_stage
+class _DropRepeatedStructuralHeadersStage(FilterStage):
+    name = "drop_repeated_structural_headers"
+
+    def __init__(self, *, kinds: FrozenSet[str]) -> None:
+        super().__init__()
+        self._kinds = kinds
+        self._header_index: Optional[_StructuralHeaderIndex] = None
+
+    @classmethod
+    def compile(cls, compiled: CompiledProfile) -> Optional[Dict[str, Any]]:
+        if not compiled.drop_repeated_structural_headers:
+            return None
+        return {"kinds": compiled.repeated_header_kinds}
+
+    def admit(self, cursor: LineCursor) -> bool:
+        if self._header_index is None:
+            self._header_index = _StructuralHeaderIndex(cursor.stack[0])
+        return not _should_drop_repeated_structural_header_line(
+            cursor.stripped,
+            cursor.stack,
+            self._kinds,
+            self._header_index,
+        )
+
+
+@register_stage
+class _DropLineExactStage(FilterStage):
+    name = "drop_line_exact"
+
+    def __init__(self, *, lines: FrozenSet[str]) -> None:
+        super().__init__()
+        self._lines = lines
+
+    @classmethod
+    def compile(cls, compiled: CompiledProfile) -> Optional[Dict[str, Any]]:
+        if not compiled.drop_line_exact:
+            return None
+        return {"lines": compiled.drop_line_exact}
+
+    def admit(self, cursor: LineCursor) -> bool:
+        return cursor.stripped not in self._lines
+
+
+@register_stage
+class _DropLineRegexesStage(FilterStage):
+    name = "drop_line_regexes"
+
+    def __init__(self, *, patterns: Tuple[re.Pattern[str], ...]) -> None:
+        super().__init__()
+        self._patterns = patterns
+
+    @classmethod
+    def compile(cls, compiled: CompiledProfile) -> Optional[Dict[str, Any]]:
+        if not compiled.drop_line_regexes:
+            return None
+        return {"patterns": compiled.drop_line_regexes}
+
+    def admit(self, cursor: LineCursor) -> bool:
+        stripped = cursor.stripped
+        return not any(pat.match(stripped) for pat in self._patterns)
 
 
 def _extract_num(marker: Dict[str, Any], match: re.Match[str]) -> Optional[str]:
@@ -685,14 +1358,9 @@ def _find_parent_candidate(
 def _find_parent_candidates(
     stack: List[Node],
     new_kind: str,
-    structure: Dict[str, Any],
+    compiled: CompiledProfile,
 ) -> List[int]:
-    matches: List[int] = []
-    for idx in range(len(stack) - 1, -1, -1):
-        allowed = _structure_children(stack[idx].kind, structure)
-        if new_kind in allowed:
-            matches.append(idx)
-    return matches
+    return [idx for idx in range(len(stack) - 1, -1, -1) if new_kind in compiled.child_kinds(stack[idx].kind)]
 
 
 def _roman_to_int(value: str) -> Optional[int]:
@@ -815,35 +1483,20 @@ def _choose_best_candidate(candidates: List[AttachCandidate]) -> AttachCandidate
 
 def _select_marker_with_context(
     text: str,
-    compiled_markers: List[Tuple[Dict[str, Any], re.Pattern[str]]],
+    marker_matcher: _MarkerMatcher,
     stack: List[Node],
-    structure: Dict[str, Any],
+    compiled: CompiledProfile,
     parent_last_seen: Dict[str, Dict[str, LastSeen]],
     line_no: int,
 ) -> Tuple[Optional[AttachCandidate], List[MarkerMatch]]:
-    marker_matches: List[MarkerMatch] = []
-    for order, (marker, pattern) in enumerate(compiled_markers):
-        m = pattern.match(text)
-        if not m:
-            continue
-        marker_matches.append(
-            MarkerMatch(
-                marker_id=str(marker.get("id") or f"marker_{order}"),
-                kind=marker["kind"],
-                kind_raw=marker.get("kind_raw"),
-                num=_extract_num(marker, m),
-                raw_token=m.group(0).strip(),
-                span_end=m.end(),
-                order=order,
-            )
-        )
+    marker_matches = marker_matcher.match_all(text)
     if not marker_matches:
         return None, []
 
     candidates: List[AttachCandidate] = []
     top_idx = len(stack) - 1
     for marker_match in marker_matches:
-        for parent_idx in _find_parent_candidates(stack, marker_match.kind, structure):
+        for parent_idx in _find_parent_candidates(stack, marker_match.kind, compiled):
             parent = stack[parent_idx]
             parent_state = parent_last_seen.get(parent.nid, {})
             value = _parse_marker_value(marker_match)
@@ -1055,34 +1708,77 @@ def _append_heading(
     )
 
 
-def _repair_hyphenated_wraps(
-    text: str,
-    *,
-    hyphen_words: Set[str],
-    plain_words: Set[str],
-) -> str:
-    def _choose(match: re.Match[str]) -> str:
-        left = match.group(1)
-        right = match.group(2)
+class _HyphenRepairEngine:
+    """Resolves hyphen-space line wraps in one scan per text.
+
+    Replacements never create new wrap sites, so each run of wraps sharing a
+    word ("ab- cd- ef") settles independently. Isolated wraps are decided once;
+    only such chains are re-scanned to the same fixpoint the pattern substitution
+    would reach. Decisions are memoized per (left, right) word pair.
+    """
+
+    def __init__(self, *, hyphen_words: Set[str], plain_words: Set[str]) -> None:
+        self.hyphen_words = hyphen_words
+        self.plain_words = plain_words
+        self._decisions: Dict[Tuple[str, str], str] = {}
+
+    def choose(self, left: str, right: str) -> str:
+        key = (left, right)
+        decided = self._decisions.get(key)
+        if decided is not None:
+            return decided
         keep = f"{left}-{right}"
         drop = f"{left}{right}"
         keep_l = keep.lower()
-        drop_l = drop.lower()
-        left_l = left.lower()
-        if keep_l in KEEP_HYPHEN_ALLOWLIST or keep_l in hyphen_words:
-            return keep
-        if drop_l in plain_words:
-            return drop
-        if left_l in KEEP_PREFIXES:
-            return keep
-        return drop
-
-    previous = text
-    while True:
-        updated = HYPHEN_WRAP_PATTERN.sub(_choose, previous)
-        if updated == previous:
-            return updated
-        previous = updated
+        if keep_l in KEEP_HYPHEN_ALLOWLIST or keep_l in self.hyphen_words:
+            decided = keep
+        elif drop.lower() in self.plain_words:
+            decided = drop
+        elif left.lower() in KEEP_PREFIXES:
+            decided = keep
+        else:
+            decided = drop
+        self._decisions[key] = decided
+        return decided
+
+    def _choose_match(self, match: re.Match[str]) -> str:
+        return self.choose(match.group(1), match.group(2))
+
+    def _settle_chain(self, segment: str) -> str:
+        previous = segment
+        while True:
+            updated = HYPHEN_WRAP_PATTERN.sub(self._choose_match, previous)
+            if updated == previous:
+                return updated
+            previous = updated
+
+    def repair(self, text: str) -> HyphenRepair:
+        changes: List[Tuple[int, int, str]] = []
+        pos = 0
+        for match in HYPHEN_WRAP_PATTERN.finditer(text):
+            if match.start() < pos:
+                continue
+            end = match.end()
+            tail = HYPHEN_WRAP_TAIL_PATTERN.match(text, end)
+            if tail is None:
+                replacement = self.choose(match.group(1), match.group(2))
+            else:
+                while tail is not None:
+                    end = tail.end()
+                    tail = HYPHEN_WRAP_TAIL_PATTERN.match(text, end)
+                replacement = self._settle_chain(text[match.start() : end])
+            changes.append((match.start(), end, replacement))
+            pos = end
+        if not changes:
+            return HyphenRepair(text=text)
+        pieces: List[str] = []
+        cursor = 0
+        for start, end, replacement in changes:
+            pieces.append(text[cursor:start])
+            pieces.append(replacement)
+            cursor = end
+        pieces.append(text[cursor:])
+        return HyphenRepair(text="".join(pieces), changes=tuple(changes))
 
 
 def _collect_word_sets(root: Node) -> Tuple[Set[str], Set[str]]:
@@ -1107,7 +1803,10 @@ def _postprocess_node_text(
     *,
     hyphen_words: Set[str],
     plain_words: Set[str],
-) -> None:
+) -> Dict[Tuple[str, str], HyphenRepair]:
+    engine = _HyphenRepairEngine(hyphen_words=hyphen_words, plain_words=plain_words)
+    repairs: Dict[Tuple[str, str], HyphenRepair] = {}
+
     def _visit(node: Node) -> None:
         for field in ("heading", "text"):
             value = getattr(node, field)
@@ -1116,36 +1815,21 @@ def _postprocess_node_text(
             parts = value.split("\n\n")
             processed: List[str] = []
             for part in parts:
-                if _is_preformatted_text_block(part):
-                    processed.append(
-                        _repair_hyphenated_wraps(
-                            part,
-                            hyphen_words=hyphen_words,
-                            plain_words=plain_words,
-                        )
-                    )
-                    continue
-                folded = part.replace("\n", " ")
-                processed.append(
-                    _repair_hyphenated_wraps(
-                        folded,
-                        hyphen_words=hyphen_words,
-                        plain_words=plain_words,
-                    )
-                )
-            setattr(
-                node,
-                field,
-                _repair_hyphenated_wraps(
-                    "\n\n".join(processed),
-                    hyphen_words=hyphen_words,
-                    plain_words=plain_words,
-                ),
-            )
+                if not _is_preformatted_text_block(part):
+                    part = part.replace("\n", " ")
+                processed.append(engine.repair(part).text)
+            if len(processed) == 1:
+                # A single repaired block has no wrap sites left to join across.
+                repair = HyphenRepair(text=processed[0])
+            else:
+                repair = engine.repair("\n\n".join(processed))
+            setattr(node, field, repair.text)
+            repairs[(node.nid, field)] = repair
         for child in node.children:
             _visit(child)
 
     _visit(root)
+    return repairs
 
 
 def _qualitycheck_structure(parent: Node, warnings: List[str]) -> None:
@@ -1202,7 +1886,11 @@ def _nest_root_chapters_under_parts(root: Node) -> None:
     root.children = nested_root_children
 
 
-def qualitycheck_document(root: Node) -> List[str]:
+def qualitycheck_document(
+    root: Node,
+    *,
+    repairs: Optional[Dict[Tuple[str, str], HyphenRepair]] = None,
+) -> List[str]:
     warnings: List[str] = []
 
     def _visit(node: Node) -> None:
@@ -1214,7 +1902,9 @@ def qualitycheck_document(root: Node) -> List[str]:
                 if PAGE_NUMBER_LINE_PATTERN.match(line):
                     warnings.append(f"{node.nid}:{field}: page-number-only line remains")
                     break
-            if HYPHEN_WRAP_PATTERN.search(value):
+            repair = repairs.get((node.nid, field)) if repairs else None
+            # A field still holding its repair result has no wrap sites left.
+            if (repair is None or repair.text is not value) and HYPHEN_WRAP_PATTERN.search(value):
                 warnings.append(f"{node.nid}:{field}: unresolved hyphen-space pattern remains")
             is_pre = _is_preformatted_text_block(value)
             if "\n" in value and "\n\n" not in value and not is_pre:
@@ -1228,10 +1918,17 @@ def qualitycheck_document(root: Node) -> List[str]:
     return warnings
 
 
-def run_text_postprocess_and_qualitycheck(root: Node) -> List[str]:
+def run_text_postprocess_and_qualitycheck(
+    root: Node,
+    *,
+    vocabulary: Optional[HyphenVocabulary] = None,
+) -> List[str]:
     hyphen_words, plain_words = _collect_word_sets(root)
-    _postprocess_node_text(root, hyphen_words=hyphen_words, plain_words=plain_words)
-    return qualitycheck_document(root)
+    if vocabulary is not None:
+        hyphen_words |= vocabulary.hyphen_words
+        plain_words |= vocabulary.plain_words
+    repairs = _postprocess_node_text(root, hyphen_words=hyphen_words, plain_words=plain_words)
+    return qualitycheck_document(root, repairs=repairs)
 
 
 def _find_latest_non_note_stack_index(stack: List[Node]) -> Optional[int]:
@@ -1285,8 +1982,8 @@ def _find_last_in_stack(stack: List[Node], kind: str) -> Optional[Node]:
 
 def _norm(value: str) -> str:
     lowered = value.lower().strip()
-    lowered = re.sub(r"[\(\)\[\]\{\}:;,.]", " ", lowered)
-    lowered = re.sub(r"\s+", " ", lowered)
+    lowered = NORM_PUNCT_PATTERN.sub(" ", lowered)
+    lowered = NORM_SPACE_PATTERN.sub(" ", lowered)
     return lowered.strip()
 
 
@@ -1294,16 +1991,59 @@ def _is_same_or_prefix(left: str, right: str) -> bool:
     return left == right or left.startswith(right) or right.startswith(left)
 
 
+class _StructuralHeaderIndex:
+    """Root-level part/chapter nodes keyed by (kind, num), with normalized headings memoized.
+
+    Root children only grow while lines are parsed, so new ones are indexed lazily
+    on lookup. A heading is re-normalized only after ``_append_heading`` replaced it.
+    """
+
+    __slots__ = ("_root", "_seen", "_by_key", "_headings")
+
+    def __init__(self, root: Node) -> None:
+        self._root = root
+        self._seen = 0
+        self._by_key: Dict[Tuple[str, str], List[Node]] = {}
+        self._headings: Dict[str, Tuple[str, str]] = {}
+
+    def _sync(self) -> None:
+        children = self._root.children
+        if len(children) < self._seen:
+            self._seen = 0
+            self._by_key.clear()
+        for idx in range(self._seen, len(children)):
+            child = children[idx]
+            if child.kind == "part" and child.num:
+                self._by_key.setdefault(("part", child.num.upper()), []).append(child)
+            elif child.kind == "chapter" and child.num:
+                self._by_key.setdefault(("chapter", child.num), []).append(child)
+        self._seen = len(children)
+
+    def siblings(self, kind: str, num: str) -> List[Node]:
+        """Root children of ``kind`` whose num equals ``num`` (upper-cased for parts)."""
+        self._sync()
+        return self._by_key.get((kind, num), [])
+
+    def heading(self, node: Node) -> str:
+        heading = node.heading or ""
+        cached = self._headings.get(node.nid)
+        if cached is not None and cached[0] is heading:
+            return cached[1]
+        normalized = _norm(heading)
+        self._headings[node.nid] = (heading, normalized)
+        return normalized
+
+
 def _should_drop_repeated_structural_header_line(
     stripped_raw: str,
     stack: List[Node],
     kinds: Set[str],
+    header_index: _StructuralHeaderIndex,
 ) -> bool:
     if not stripped_raw:
         return False
-    root = stack[0] if stack else None
     if "part" in kinds:
-        part_match = re.match(r"(?i)^PART\s+(?P<n>[IVXLCDM]+)\.?\s*(?P<title>.*)$", stripped_raw)
+        part_match = REPEATED_PART_HEADER_PATTERN.match(stripped_raw)
         if part_match:
             part_num = part_match.group("n").strip().upper()
             part_title = part_match.group("title").strip()
@@ -1316,27 +2056,24 @@ def _should_drop_repeated_structural_header_line(
             else:
                 line_heading = _norm(part_title)
                 if part and part.num and part.num.upper() == part_num and part.heading:
-                    part_heading = _norm(part.heading)
+                    part_heading = header_index.heading(part)
+                    if line_heading and part_heading and _is_same_or_prefix(line_heading, part_heading):
+                        return True
+                for sibling in header_index.siblings("part", part_num):
+                    if not sibling.heading:
+                        continue
+                    part_heading = header_index.heading(sibling)
                     if line_heading and part_heading and _is_same_or_prefix(line_heading, part_heading):
                         return True
-                if root:
-                    for sibling in root.children:
-                        if sibling.kind != "part" or not sibling.num:
-                            continue
-                        if sibling.num.upper() != part_num or not sibling.heading:
-                            continue
-                        part_heading = _norm(sibling.heading)
-                        if line_heading and part_heading and _is_same_or_prefix(line_heading, part_heading):
-                            return True
     if "chapter" in kinds:
         chapter = _find_last_in_stack(stack, "chapter")
-        chapter_match = re.match(r"^(?P<n>\d{1,2})\.\s+(?P<title>.+)$", stripped_raw)
+        chapter_match = REPEATED_CHAPTER_HEADER_PATTERN.match(stripped_raw)
         if chapter and chapter.num and chapter.heading and chapter_match and chapter_match.group("n") == chapter.num:
             line_heading = _norm(chapter_match.group("title"))
-            chapter_heading = _norm(chapter.heading)
+            chapter_heading = header_index.heading(chapter)
             if line_heading and chapter_heading and _is_same_or_prefix(line_heading, chapter_heading):
                 return True
-        chapter_word_match = re.match(r"(?i)^chapter\s+(?P<n>\d{1,2})\b\s*(?P<title>.*)$", stripped_raw)
+        chapter_word_match = REPEATED_CHAPTER_WORD_HEADER_PATTERN.match(stripped_raw)
         if chapter and chapter.num and chapter_word_match and chapter_word_match.group("n") == chapter.num:
             chapter_word_title = chapter_word_match.group("title").strip()
             chapter_word_title = chapter_word_title.lstrip(".:- ").strip()
@@ -1344,48 +2081,23 @@ def _should_drop_repeated_structural_header_line(
                 return True
             if chapter.heading:
                 line_heading = _norm(chapter_word_title)
-                chapter_heading = _norm(chapter.heading)
+                chapter_heading = header_index.heading(chapter)
                 if line_heading and chapter_heading and _is_same_or_prefix(line_heading, chapter_heading):
                     return True
-        if chapter_match and root:
-            chapter_num = chapter_match.group("n")
+        if chapter_match:
             line_heading = _norm(chapter_match.group("title"))
-            for sibling in root.children:
-                if sibling.kind != "chapter" or sibling.num != chapter_num or not sibling.heading:
+            for sibling in header_index.siblings("chapter", chapter_match.group("n")):
+                if not sibling.heading:
                     continue
-                chapter_heading = _norm(sibling.heading)
+                chapter_heading = header_index.heading(sibling)
                 if line_heading and chapter_heading and _is_same_or_prefix(line_heading, chapter_heading):
                     return True
     if "annex" in kinds:
-        annex_match = re.match(r"(?i)^annex\s+(?P<n>\d+)\b", stripped_raw)
-        annex_title = ""
-        if annex_match:
-            annex_title = stripped_raw[annex_match.end() :].strip()
-            annex_title = annex_title.lstrip(".:- ").strip()
+        annex_match = REPEATED_ANNEX_HEADER_PATTERN.match(stripped_raw)
         annex = _find_last_in_stack(stack, "annex")
-        in_same_annex_context = bool(
-            annex and annex.num and annex_match and annex_match.group("n") == annex.num
-        )
-        if in_same_annex_context:
-            if not annex.heading or not annex_title:
-                return True
-            line_heading = _norm(annex_title)
-            annex_heading = _norm(annex.heading)
-            if line_heading and annex_heading and _is_same_or_prefix(line_heading, annex_heading):
-                return True
+        if annex and annex.num and annex_match and annex_match.group("n") == annex.num:
+            # A repeated "Annex N" line inside annex N is a running header whatever its title.
             return True
-        if annex_match and root and in_same_annex_context:
-            annex_num = annex_match.group("n")
-            for sibling in root.children:
-                if sibling.kind != "annex" or sibling.num != annex_num:
-                    continue
-                if not sibling.heading or not annex_title:
-                    return True
-                line_heading = _norm(annex_title)
-                annex_heading = _norm(sibling.heading)
-                if line_heading and annex_heading and _is_same_or_prefix(line_heading, annex_heading):
-                    return True
-                return True
     return False
 
 
@@ -1446,6 +2158,22 @@ def _node_start_line(node: Node) -> Optional[int]:
     return min(lines)
 
 
+def _shift_line_locators(node: Node, delta: int) -> None:
+    """Move every ``line:N`` source span of a subtree by ``delta`` lines."""
+    if not delta:
+        return
+    pending = [node]
+    while pending:
+        current = pending.pop()
+        shifted: List[Dict[str, Optional[str]]] = []
+        for span in current.source_spans:
+            locator = span.get("locator")
+            line_no = _locator_line_number(locator) if isinstance(locator, str) else None
+            shifted.append(span if line_no is None else {**span, "locator": f"line:{line_no + delta}"})
+        current.source_spans = shifted
+        pending.extend(current.children)
+
+
 def _rewrite_subtree_nid_prefix(node: Node, old_prefix: str, new_prefix: str) -> None:
     if node.nid == old_prefix:
         node.nid = new_prefix
@@ -1455,16 +2183,58 @@ def _rewrite_subtree_nid_prefix(node: Node, old_prefix: str, new_prefix: str) ->
         _rewrite_subtree_nid_prefix(child, old_prefix, new_prefix)
 
 
+REFINE_PARALLEL_MIN_LINES = 2000
+
+
+def _resolve_refine_workers(refine_workers: Optional[int], jobs: List[Dict[str, Any]]) -> int:
+    """Process count for annex refinement.
+
+    ``None`` or ``1`` is serial, so library callers never start a pool
+    unasked; ``0`` sizes the pool to the CPU count for documents of at least
+    ``REFINE_PARALLEL_MIN_LINES`` lines.
+    """
+    if refine_workers is None or refine_workers == 1 or len(jobs) < 2:
+        return 1
+    if refine_workers <= 0:
+        # A pool costs more than it saves on short inputs.
+        if sum(len(job["lines"]) for job in jobs) < REFINE_PARALLEL_MIN_LINES:
+            return 1
+        refine_workers = os.cpu_count() or 1
+    return max(1, min(refine_workers, len(jobs)))
+
+
+def _refine_slice(job: Dict[str, Any]) -> Optional[Node]:
+    sub_doc = parse_text_to_ir(
+        input_path=job["input_path"],
+        doc_id=job["doc_id"],
+        parser_profile=job["parser_profile"],
+        lines_override=job["lines"],
+        line_no_offset=job["line_no_offset"],
+        finalize=False,
+        profiles_dir_override=job["profiles_dir_override"],
+    )
+    sub_nodes = [child for child in sub_doc.content.children if child.kind == job["refine_kind"]]
+    return sub_nodes[0] if sub_nodes else None
+
+
 def _refine_subtrees(
     *,
     root: Node,
-    raw_lines: List[str],
+    source: _LineSource,
     line_no_offset: int,
     input_path: Path,
     doc_id: str,
     parser_profile: Dict[str, Any],
     profiles_dir_override: Optional[Path] = None,
+    refine_workers: Optional[int] = None,
+    refine_cache: Optional[Dict[str, Dict[str, Any]]] = None,
 ) -> None:
+    """Re-parse top-level subtrees with the profiles their key dispatches to.
+
+    ``refine_cache`` maps a digest of (sub-profile, slice lines) to an earlier
+    result; hits are reused with their line numbers moved, and the cache is left
+    holding exactly the entries of this run.
+    """
     refine_cfg = (parser_profile.get("postprocess") or {}).get("refine_subtrees") or {}
     if not bool(refine_cfg.get("enabled")):
         return
@@ -1489,13 +2259,15 @@ def _refine_subtrees(
     )
     keep_unmapped = bool(refine_cfg.get("keep_unmapped", True))
 
-    absolute_last_line = line_no_offset + len(raw_lines)
+    line_count = source.line_count or 0
+    absolute_last_line = line_no_offset + line_count
     target_indexes = [idx for idx, child in enumerate(root.children) if child.kind == refine_kind]
     if not target_indexes:
         return
 
-    from .profile_loader import load_parser_profile
-
+    sub_profiles: Dict[str, CompiledProfile] = {}
+    jobs: List[Dict[str, Any]] = []
+    ranges: List[Tuple[int, int]] = []
     for pos, idx in enumerate(target_indexes):
         node = root.children[idx]
         dispatch_value_raw = getattr(node, refine_key, None)
@@ -1519,31 +2291,83 @@ def _refine_subtrees(
             end_line = absolute_last_line
 
         start_idx = max(0, start_line - 1 - line_no_offset)
-        end_idx = min(len(raw_lines), end_line - line_no_offset)
+        end_idx = min(line_count, end_line - line_no_offset)
         if start_idx >= end_idx:
             continue
-        slice_lines = raw_lines[start_idx:end_idx]
-        if not slice_lines:
-            continue
 
-        sub_profile = load_parser_profile(
-            profile_id=profile_id,
-            profiles_dir_override=profiles_dir_override,
-        )
-        sub_doc = parse_text_to_ir(
-            input_path=input_path,
-            doc_id=f"{doc_id}__refine_{refine_kind}_{dispatch_value}",
-            parser_profile=sub_profile,
-            lines_override=slice_lines,
-            line_no_offset=start_line - 1,
-            finalize=False,
-            profiles_dir_override=profiles_dir_override,
+        sub_profile = sub_profiles.get(profile_id)
+        if sub_profile is None:
+            sub_profile = load_compiled_profile(
+                profile_id=profile_id,
+                profiles_dir_override=profiles_dir_override,
+            )
+            sub_profiles[profile_id] = sub_profile
+        jobs.append(
+            {
+                "node": node,
+                "profile_id": profile_id,
+                "dispatch_value": dispatch_value,
+                "input_path": input_path,
+                "doc_id": f"{doc_id}__refine_{refine_kind}_{dispatch_value}",
+                "parser_profile": sub_profile,
+                "line_no_offset": start_line - 1,
+                "profiles_dir_override": profiles_dir_override,
+                "refine_kind": refine_kind,
+            }
         )
-        sub_root = sub_doc.content
-        sub_nodes = [child for child in sub_root.children if child.kind == refine_kind]
-        if not sub_nodes:
+        ranges.append((start_idx, end_idx))
+
+    # Slices come from the unmodified input, read once more for all jobs together.
+    for job, slice_lines in zip(jobs, source.slices(ranges)):
+        job["lines"] = slice_lines
+
+    results: List[Optional[Node]] = [None] * len(jobs)
+    pending = list(range(len(jobs)))
+    keys: List[str] = []
+    if refine_cache is not None:
+        previous = dict(refine_cache)
+        refine_cache.clear()
+        pending = []
+        for pos, job in enumerate(jobs):
+            key = sha256_data(
+                [job["parser_profile"].digest, job["refine_kind"], input_path.name, job["lines"]]
+            )
+            keys.append(key)
+            cached = previous.get(key)
+            if cached is None:
+                pending.append(pos)
+                continue
+            refine_cache[key] = cached
+            if cached["node"] is not None:
+                refined = Node.from_dict(cached["node"])
+                _shift_line_locators(refined, job["line_no_offset"] - cached["line_no_offset"])
+                results[pos] = refined
+
+    workers = _resolve_refine_workers(refine_workers, [jobs[pos] for pos in pending])
+    if workers > 1:
+        # Workers get the plain dict (cheap to pickle) and compile it into their own LRU.
+        payloads = [
+            {**jobs[pos], "node": None, "parser_profile": jobs[pos]["parser_profile"].profile} for pos in pending
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            computed = list(executor.map(_refine_slice, payloads))
+    else:
+        computed = [_refine_slice(jobs[pos]) for pos in pending]
+    for pos, refined in zip(pending, computed):
+        results[pos] = refined
+        if refine_cache is not None:
+            refine_cache[keys[pos]] = {
+                "line_no_offset": jobs[pos]["line_no_offset"],
+                "node": refined.to_dict() if refined is not None else None,
+            }
+
+    # Splice in document order so nids and tags match the serial run exactly.
+    for job, refined in zip(jobs, results):
+        if refined is None:
             continue
-        refined = sub_nodes[0]
+        node = job["node"]
+        profile_id = job["profile_id"]
+        dispatch_value = job["dispatch_value"]
         if refined.nid != node.nid:
             _rewrite_subtree_nid_prefix(refined, refined.nid, node.nid)
 
@@ -1563,147 +2387,252 @@ def _refine_subtrees(
             node.tags.append(f"refine_key={dispatch_value}")
 
 
+@dataclass
+class ParseResume:
+    """Parser state for restarting the main loop at a root-level boundary line.
+
+    ``stack`` is the path of open nodes inside the tree the parse continues and
+    ``parent_last_seen``/``node_indent``/``append_states`` cover those nodes;
+    ``consumed`` lists the pinned lines already taken by a block.  The filters
+    have already admitted line ``line``, so their ``filter_states`` are
+    restored and the table/note probe runs at ``probe_idx``.
+    """
+
+    line: int
+    stack: List[Node]
+    last_attachable: Optional[Node]
+    node_indent: Dict[str, int]
+    parent_last_seen: Dict[str, Dict[str, LastSeen]]
+    append_states: Dict[Tuple[str, str], AppendState]
+    filter_states: List[Any]
+    probe_idx: int
+    consumed: List[int] = field(default_factory=list)
+    released_nonblank: Optional[Tuple[int, str]] = None
+
+
 def parse_text_to_ir(
     *,
     input_path: Path,
     doc_id: str,
-    parser_profile: Dict[str, Any],
+    parser_profile: Union[Dict[str, Any], CompiledProfile],
     lines_override: Optional[List[str]] = None,
     line_no_offset: int = 0,
     finalize: bool = True,
     profiles_dir_override: Optional[Path] = None,
+    refine_workers: Optional[int] = None,
+    hyphen_vocabulary: Optional[HyphenVocabulary] = None,
+    preprocess_stats: Optional[List[StageStats]] = None,
 ) -> IRDocument:
-    source_label = parser_profile.get("source_label") or input_path.name
-    compiled_markers = _compile_markers(parser_profile)
-    structure = parser_profile.get("structure") or {}
-    compound = parser_profile.get("compound_prefix") or {}
-    structural_kinds = set(
-        parser_profile.get("structural_kinds") or ["part", "subpart", "section"]
-    )
-    structural_kinds.update({"table", "table_header"})
-    compound_enabled = bool(compound.get("enabled"))
-    max_depth = int(compound.get("max_depth", 1))
-    preprocess = parser_profile.get("preprocess") or {}
-    drop_line_regexes = [re.compile(p) for p in (preprocess.get("drop_line_regexes") or [])]
-    drop_line_exact = {v for v in (preprocess.get("drop_line_exact") or []) if isinstance(v, str) and v}
-    strip_inline_regexes = [re.compile(p) for p in (preprocess.get("strip_inline_regexes") or [])]
-    use_indent_dedent = bool(preprocess.get("use_indent_dedent"))
-    dedent_pop_kinds = set(preprocess.get("dedent_pop_kinds") or [])
-    skip_block_rules = _compile_skip_blocks(preprocess)
-    repeated_header_cfg = preprocess.get("drop_repeated_structural_headers") or {}
-    drop_repeated_structural_headers_enabled = bool(repeated_header_cfg.get("enabled"))
-    repeated_header_kinds = {
-        str(v).strip().lower()
-        for v in (repeated_header_cfg.get("kinds") or [])
-        if str(v).strip()
-    }
-    heading_continuation_cfg = preprocess.get("merge_structural_heading_continuations") or {}
-    join_mid_sentence_cfg = preprocess.get("join_mid_sentence_marker_refs_into_prev") or {}
-    extract_notes_cfg = preprocess.get("extract_notes") or {}
-    extract_notes_enabled = bool(extract_notes_cfg.get("enabled"))
-    note_start_regexes = extract_notes_cfg.get("start_regexes") or DEFAULT_NOTE_START_REGEXES
-    note_start_patterns = [
-        re.compile(p, flags=re.IGNORECASE) for p in note_start_regexes if isinstance(p, str) and p.strip()
-    ]
-    note_max_lines_raw = extract_notes_cfg.get("max_lines", 50)
-    note_max_lines = int(note_max_lines_raw) if str(note_max_lines_raw).strip() else 50
-    if note_max_lines <= 0:
-        note_max_lines = 50
-
-    root = build_root([])
-    stack: List[Node] = [root]
-    current = root
-    node_indent_by_nid: Dict[str, int] = {root.nid: 0}
-    node_factory = _NodeFactory(structural_kinds=structural_kinds)
-    parent_last_seen: Dict[str, Dict[str, LastSeen]] = {}
-    append_states: Dict[Tuple[str, str], AppendState] = {}
-    skip_block_state = SkipBlockState()
-    last_attachable_node: Optional[Node] = None
+    """Parse a text file (or ``lines_override``) into an IR document.
 
-    lines_base = (
-        list(lines_override)
-        if lines_override is not None
-        else input_path.read_text(encoding="utf-8").splitlines()
+    When ``preprocess_stats`` is a list, the preprocessing stages are timed and
+    their stats for this run are appended to it.
+    """
+    compiled = (
+        parser_profile if isinstance(parser_profile, CompiledProfile) else compile_parser_profile(parser_profile)
     )
-    raw_lines = list(lines_base)
-    lines = list(lines_base)
-    lines = _join_mid_sentence_marker_refs_into_prev(
-        lines,
-        strip_inline_regexes=strip_inline_regexes,
-        join_cfg=join_mid_sentence_cfg,
+    source = _LineSource(input_path, lines_override)
+    pipeline = PreprocessPipeline(compiled.preprocess_stages, timed=preprocess_stats is not None)
+    root = build_root([])
+    _parse_into(
+        root,
+        compiled=compiled,
+        pipeline=pipeline,
+        lines=pipeline.run(source),
+        source_label=compiled.source_label or input_path.name,
+        line_no_offset=line_no_offset,
     )
-    lines = _merge_structural_marker_heading_lines(
-        lines,
-        compiled_markers,
-        structural_kinds,
-        strip_inline_regexes=strip_inline_regexes,
-        continuation_cfg=heading_continuation_cfg,
+    if finalize:
+        index = _finalize_document(
+            root,
+            compiled=compiled,
+            source=source,
+            line_no_offset=line_no_offset,
+            input_path=input_path,
+            doc_id=doc_id,
+            profiles_dir_override=profiles_dir_override,
+            refine_workers=refine_workers,
+            hyphen_vocabulary=hyphen_vocabulary,
+        )
+    else:
+        index = {"display_name_by_nid": {}}
+    if preprocess_stats is not None:
+        preprocess_stats.extend(pipeline.stats)
+    return IRDocument(doc_id=doc_id, content=root, index=index)
+
+
+def _finalize_document(
+    root: Node,
+    *,
+    compiled: CompiledProfile,
+    source: _LineSource,
+    line_no_offset: int,
+    input_path: Path,
+    doc_id: str,
+    profiles_dir_override: Optional[Path] = None,
+    refine_workers: Optional[int] = None,
+    hyphen_vocabulary: Optional[HyphenVocabulary] = None,
+    refine_cache: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    _refine_subtrees(
+        root=root,
+        source=source,
+        line_no_offset=line_no_offset,
+        input_path=input_path,
+        doc_id=doc_id,
+        parser_profile=compiled.profile,
+        profiles_dir_override=profiles_dir_override,
+        refine_workers=refine_workers,
+        refine_cache=refine_cache,
     )
-    for idx, raw_line in enumerate(lines):
+    _nest_root_chapters_under_parts(root)
+    _quality_warnings = run_text_postprocess_and_qualitycheck(root, vocabulary=hyphen_vocabulary)
+    for warning in _quality_warnings:
+        LOGGER.warning("qualitycheck: %s", warning)
+    assign_document_order(root)
+    index = {"display_name_by_nid": {}}
+    _collect_display_names(root, index["display_name_by_nid"])
+    return index
+
+
+def _count_nodes(nodes: Iterable[Node]) -> int:
+    pending = list(nodes)
+    count = 0
+    while pending:
+        node = pending.pop()
+        count += 1
+        pending.extend(node.children)
+    return count
+
+
+def _parse_into(
+    root: Node,
+    *,
+    compiled: CompiledProfile,
+    pipeline: PreprocessPipeline,
+    lines: Iterable[PreparedLine],
+    source_label: str,
+    line_no_offset: int = 0,
+    resume: Optional[ParseResume] = None,
+    regions: Optional[Any] = None,
+) -> None:
+    """Run the main loop over preprocessed ``lines``, appending to ``root``.
+
+    With ``resume`` the loop restarts at ``resume.line`` of ``lines`` (a
+    sequence) on top of the nodes already under ``root``.  ``regions`` (see
+    ``incremental._RegionRecorder``) is told about every line that opened a
+    root-level node and may stop the parse there; that line's nodes are then
+    removed again.  It also hears of notes and text attached to nodes that
+    may belong to an earlier region.
+    """
+    marker_matcher = compiled.marker_matcher
+    structural_kinds = compiled.structural_kinds
+    compound_enabled = compiled.compound_enabled
+    max_depth = compiled.max_depth
+    drop_line_regexes = compiled.drop_line_regexes
+    drop_line_exact = compiled.drop_line_exact
+    use_indent_dedent = compiled.use_indent_dedent
+    dedent_pop_kinds = compiled.dedent_pop_kinds
+    skip_block_rules = compiled.skip_block_rules
+    extract_notes_enabled = compiled.extract_notes_enabled
+    note_start_patterns = compiled.note_start_patterns
+    note_max_lines = compiled.note_max_lines
+
+    node_factory = _NodeFactory(structural_kinds=structural_kinds)
+    append_states: Dict[Tuple[str, str], AppendState] = {}
+    # The skip-block stage moves the table/note probes to a rule index, so they
+    # may start at any of the first len(skip_block_rules) lines. Those lines stay
+    # pinned, and nothing is released while one of them could still open a block.
+    pinned = len(skip_block_rules)
+    if resume is None:
+        stack: List[Node] = [root]
+        node_indent_by_nid: Dict[str, int] = {root.nid: 0}
+        parent_last_seen: Dict[str, Dict[str, LastSeen]] = {}
+        last_attachable_node: Optional[Node] = None
+        buffer = _LineBuffer(lines, marker_matcher, pinned=pinned)
+        next_idx = 0
+        resume_line = -1
+        resume_probe = 0
+    else:
+        stack = list(resume.stack)
+        node_indent_by_nid = {root.nid: 0, **resume.node_indent}
+        parent_last_seen = resume.parent_last_seen
+        append_states.update(resume.append_states)
+        last_attachable_node = resume.last_attachable
+        node_factory.seed(root)
+        prepared = lines if isinstance(lines, list) else list(lines)
+        buffer = _LineBuffer(prepared[:pinned] + prepared[resume.line :], marker_matcher, pinned=pinned)
+        buffer.seek(resume.line, consumed=resume.consumed, released_nonblank=resume.released_nonblank)
+        pipeline.restore(resume.filter_states)
+        next_idx = resume_line = resume.line
+        resume_probe = resume.probe_idx
+    current = stack[-1]
+    line_cursor = LineCursor(stack)
+    leading_probes: Optional[List[int]] = None
+    entry_roots = len(root.children)
+    entry_stack = stack
+    entry_attach = last_attachable_node
+    entry_created = entry_reach = 0
+    entry_settled = False
+    stopped = False
+    while buffer.has(next_idx):
+        idx = next_idx
+        next_idx += 1
+        if (
+            regions is not None
+            and len(root.children) != entry_roots
+            and regions.boundary(
+                line=idx - 1,
+                root=root,
+                root_count=entry_roots,
+                resumable=entry_settled
+                and node_factory.created - entry_created == _count_nodes(root.children[entry_roots:]),
+                stack=entry_stack,
+                last_attachable=entry_attach,
+                node_indent=node_indent_by_nid,
+                parent_last_seen=parent_last_seen,
+                append_states=append_states,
+                pipeline=pipeline,
+                probe_idx=line_cursor.probe_idx,
+                buffer=buffer,
+                reach=entry_reach,
+            )
+        ):
+            del root.children[entry_roots:]
+            stopped = True
+            break
+        if leading_probes is None and buffer.has(pinned):
+            leading_probes = _leading_probe_lines(
+                buffer, pinned, note_start_patterns if extract_notes_enabled else []
+            )
+        if leading_probes is not None:
+            if leading_probes:
+                leading_probes = [k for k in leading_probes if not buffer.is_consumed(k)]
+            if not leading_probes:
+                buffer.release(idx)
+        if regions is not None:
+            entry_roots = len(root.children)
+            entry_stack = stack
+            entry_attach = last_attachable_node
+            entry_created = node_factory.created
+            entry_reach = buffer.pulled
+            entry_settled = leading_probes == [] and idx >= pinned
         line_no = idx + 1 + line_no_offset
+        raw_line, cleaned_line, stripped_raw = buffer.texts(idx)
         raw_blank = not raw_line.strip()
-        cleaned_line = raw_line
-        for pat in strip_inline_regexes:
-            cleaned_line = pat.sub("", cleaned_line)
-        stripped_raw = cleaned_line.strip()
-        if skip_block_state.active and skip_block_state.rule_index is not None:
-            active_rule = skip_block_rules[skip_block_state.rule_index]
-            skip_block_state.seen_lines += 1
-            if active_rule.end_pattern.match(stripped_raw):
-                skip_block_state.active = False
-                skip_block_state.rule_index = None
-                skip_block_state.seen_lines = 0
-                skip_block_state.start_line = 0
-                if not active_rule.include_end:
-                    continue
-            elif skip_block_state.seen_lines > active_rule.max_lines:
-                LOGGER.warning(
-                    "skip_blocks end not found within max_lines=%s start_line=%s end_regex=%r",
-                    active_rule.max_lines,
-                    skip_block_state.start_line,
-                    active_rule.end_pattern.pattern,
-                )
-                skip_block_state.active = False
-                skip_block_state.rule_index = None
-                skip_block_state.seen_lines = 0
-                skip_block_state.start_line = 0
-            else:
-                continue
-        if not skip_block_state.active and skip_block_rules:
-            for idx, rule in enumerate(skip_block_rules):
-                if not rule.start_pattern.match(stripped_raw):
-                    continue
-                skip_block_state.active = True
-                skip_block_state.rule_index = idx
-                skip_block_state.seen_lines = 0
-                skip_block_state.start_line = line_no
-                if not rule.include_start:
-                    continue
-                break
-            if skip_block_state.active and skip_block_state.rule_index is not None:
-                active_rule = skip_block_rules[skip_block_state.rule_index]
-                if not active_rule.include_start:
-                    continue
+        line_cursor.at(idx, line_no, stripped_raw, stack)
+        if idx == resume_line:
+            # The filters admitted this line before the previous parse stopped here.
+            line_cursor.probe_idx = resume_probe
+        elif not pipeline.admit(line_cursor):
+            continue
         if not stripped_raw:
             if raw_blank and current is not root:
                 _mark_pending_break(current, field="text", states=append_states)
             continue
-        if drop_repeated_structural_headers_enabled and _should_drop_repeated_structural_header_line(
-            stripped_raw,
-            stack,
-            repeated_header_kinds,
-        ):
-            continue
-        if stripped_raw in drop_line_exact:
-            continue
-        if any(pat.match(stripped_raw) for pat in drop_line_regexes):
-            continue
+        probe_idx = line_cursor.probe_idx
 
-        table_block = _collect_md_table_block(
-            lines,
-            idx,
-            strip_inline_regexes,
-        )
+        table_block = _collect_md_table_block(buffer, probe_idx)
         if table_block is not None:
             parent = current if current is not root else root
             table_node = node_factory.create_node(
@@ -1714,7 +2643,7 @@ def parse_text_to_ir(
                 source_label=source_label,
                 parent_nid=parent.nid,
             )
-            caption = _find_table_caption(lines, table_block["header_idx"], strip_inline_regexes)
+            caption = _find_table_caption(buffer, table_block["header_idx"])
             if caption is not None:
                 caption_idx, caption_text = caption
                 table_node.heading = caption_text
@@ -1722,7 +2651,7 @@ def parse_text_to_ir(
                     {"source_label": source_label, "locator": f"line:{caption_idx + 1 + line_no_offset}"}
                 )
             parent.children.append(table_node)
-            node_indent_by_nid[table_node.nid] = _leading_space_count(lines[table_block["header_idx"]])
+            node_indent_by_nid[table_node.nid] = buffer.raw_indent(table_block["header_idx"])
 
             header_node = node_factory.create_node(
                 kind="table_header",
@@ -1737,7 +2666,7 @@ def parse_text_to_ir(
                 {"source_label": source_label, "locator": f"line:{table_block['separator_idx'] + 1 + line_no_offset}"}
             )
             table_node.children.append(header_node)
-            node_indent_by_nid[header_node.nid] = _leading_space_count(lines[table_block["header_idx"]])
+            node_indent_by_nid[header_node.nid] = buffer.raw_indent(table_block["header_idx"])
 
             for row_idx, row_text in table_block["rows"]:
                 row_node = node_factory.create_node(
@@ -1750,16 +2679,14 @@ def parse_text_to_ir(
                 )
                 row_node.text = row_text
                 header_node.children.append(row_node)
-                node_indent_by_nid[row_node.nid] = _leading_space_count(lines[row_idx])
+                node_indent_by_nid[row_node.nid] = buffer.raw_indent(row_idx)
                 last_attachable_node = row_node
 
             notes, note_end_idx = _collect_table_notes(
-                lines,
+                buffer,
                 table_block["end_idx"],
-                strip_inline_regexes,
                 drop_line_regexes,
                 drop_line_exact,
-                compiled_markers,
             )
             if notes:
                 first_note_idx = notes[0][0]
@@ -1778,27 +2705,27 @@ def parse_text_to_ir(
                     )
                 table_node.children.append(note_node)
 
-            lines[table_block["header_idx"]] = ""
-            lines[table_block["separator_idx"]] = ""
+            buffer.consume(table_block["header_idx"])
+            buffer.consume(table_block["separator_idx"])
             for row_idx, _ in table_block["rows"]:
-                lines[row_idx] = ""
+                buffer.consume(row_idx)
             for note_idx, _ in notes:
-                lines[note_idx] = ""
+                buffer.consume(note_idx)
             continue
 
         if extract_notes_enabled and note_start_patterns:
             notes_block, _ = _collect_note_block(
-                lines,
-                idx,
-                strip_inline_regexes=strip_inline_regexes,
+                buffer,
+                probe_idx,
                 drop_line_regexes=drop_line_regexes,
                 drop_line_exact=drop_line_exact,
-                compiled_markers=compiled_markers,
                 start_patterns=note_start_patterns,
                 max_lines=note_max_lines,
             )
             if notes_block:
                 attach_parent = last_attachable_node or (current if current is not root else root)
+                if regions is not None:
+                    regions.attached(attach_parent)
                 note_node = node_factory.create_node(
                     kind="note",
                     kind_raw="note",
@@ -1814,7 +2741,7 @@ def parse_text_to_ir(
                     )
                 attach_parent.children.append(note_node)
                 for note_idx, _ in notes_block:
-                    lines[note_idx] = ""
+                    buffer.consume(note_idx)
                 continue
 
         stripped_for_match = cleaned_line.lstrip()
@@ -1826,9 +2753,9 @@ def parse_text_to_ir(
         while depth < max_depth:
             selected, matched = _select_marker_with_context(
                 remaining,
-                compiled_markers,
+                marker_matcher,
                 stack,
-                structure,
+                compiled,
                 parent_last_seen,
                 line_no,
             )
@@ -1968,25 +2895,27 @@ def parse_text_to_ir(
                     )
                     stack = stack[: fallback_idx + 1]
                     current = fallback
+            if regions is not None and fallback is not None:
+                regions.attached(fallback)
         _append_text(current, cleaned_line, line_no, source_label, append_states)
 
-    if finalize:
-        _refine_subtrees(
+    if regions is not None and not stopped:
+        if len(root.children) != entry_roots and regions.boundary(
+            line=next_idx - 1,
             root=root,
-            raw_lines=raw_lines,
-            line_no_offset=line_no_offset,
-            input_path=input_path,
-            doc_id=doc_id,
-            parser_profile=parser_profile,
-            profiles_dir_override=profiles_dir_override,
-        )
-        _nest_root_chapters_under_parts(root)
-        _quality_warnings = run_text_postprocess_and_qualitycheck(root)
-        for warning in _quality_warnings:
-            LOGGER.warning("qualitycheck: %s", warning)
-        assign_document_order(root)
-        index = {"display_name_by_nid": {}}
-        _collect_display_names(root, index["display_name_by_nid"])
-    else:
-        index = {"display_name_by_nid": {}}
-    return IRDocument(doc_id=doc_id, content=root, index=index)
+            root_count=entry_roots,
+            resumable=entry_settled
+            and node_factory.created - entry_created == _count_nodes(root.children[entry_roots:]),
+            stack=entry_stack,
+            last_attachable=entry_attach,
+            node_indent=node_indent_by_nid,
+            parent_last_seen=parent_last_seen,
+            append_states=append_states,
+            pipeline=pipeline,
+            probe_idx=line_cursor.probe_idx,
+            buffer=buffer,
+            reach=entry_reach,
+        ):
+            del root.children[entry_roots:]
+        else:
+            regions.finish(reach=buffer.pulled)
@@ -1,7 +1,11 @@
 """qai_xml2ir: e-Gov XML -> RegDoc IR bundle."""
 
+from .ir_sidecar import load_ir
+
 __all__ = [
     "egov_parser",
+    "ir_sidecar",
+    "load_ir",
     "models_ir",
     "models_meta",
     "models_profiles",
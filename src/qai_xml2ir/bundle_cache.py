@@ -0,0 +1,145 @@
+"""Content-addressed cache of produced four-file bundles.
+
+An entry is keyed on everything that determines the bundle bytes: the input
+digest, the resolved parser profile digest, the tool version plus a digest of
+the converter sources, and the caller's output-affecting options.  Entries
+live under ``<cache_dir>/<key[:2]>/<key>/`` next to an ``entry.yaml`` that
+records the bundle file names with their sha256 and any extra data the caller
+needs on a hit; an entry whose files no longer match is a miss.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from .digest import sha256_data, sha256_file  # noqa: F401 - sha256_data is re-exported
+from .serialize import place_file
+from .yaml_io import dump_yaml, load_yaml
+
+CACHE_SCHEMA = "qai.bundle_cache.v2"
+ENTRY_FILE = "entry.yaml"
+_SOURCE_PACKAGES = ("qai_xml2ir", "qai_text2ir")
+
+
+@lru_cache(maxsize=1)
+def source_digest() -> str:
+    # Stands in for the git commit: it also covers uncommitted edits and installs without .git.
+    h = hashlib.sha256()
+    src_root = Path(__file__).resolve().parents[1]
+    for package in _SOURCE_PACKAGES:
+        package_dir = src_root / package
+        if not package_dir.is_dir():
+            continue
+        for path in sorted(package_dir.rglob("*")):
+            if path.suffix not in {".py", ".yaml"} or "__pycache__" in path.parts:
+                continue
+            h.update(path.relative_to(src_root).as_posix().encode("utf-8"))
+            h.update(b"\0")
+            h.update(path.read_bytes())
+            h.update(b"\0")
+    return h.hexdigest()
+
+
+def build_cache_key(
+    *,
+    tool: str,
+    input_checksum: str,
+    parser_profile_sha256: str,
+    tool_version: Optional[str],
+    options: Dict[str, Any],
+) -> str:
+    return sha256_data(
+        {
+            "schema": CACHE_SCHEMA,
+            "tool": tool,
+            "tool_version": tool_version,
+            "source_digest": source_digest(),
+            "input_checksum": input_checksum,
+            "parser_profile_sha256": parser_profile_sha256,
+            "options": options,
+        }
+    )
+
+
+class BundleCache:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        entry_dir = self.entry_dir(key)
+        entry_path = entry_dir / ENTRY_FILE
+        if not entry_path.exists():
+            return None
+        try:
+            with entry_path.open("r", encoding="utf-8") as f:
+                entry = load_yaml(f)
+        except (OSError, yaml.YAMLError):
+            return None
+        if not isinstance(entry, dict) or entry.get("schema") != CACHE_SCHEMA or entry.get("key") != key:
+            return None
+        files = entry.get("files")
+        digests = entry.get("sha256")
+        if not isinstance(files, list) or not isinstance(digests, dict):
+            return None
+        # Files are hashed, not just listed: a hard-linked output written through would change them in place.
+        for name in files:
+            path = entry_dir / name
+            if not path.is_file() or digests.get(name) != sha256_file(path):
+                return None
+        return entry
+
+    def store(
+        self,
+        key: str,
+        *,
+        doc_id: str,
+        files: List[Path],
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> Path:
+        entry_dir = self.entry_dir(key)
+        if self.lookup(key) is not None:
+            return entry_dir
+        entry_dir.parent.mkdir(parents=True, exist_ok=True)
+        # Populate a sibling temp dir and rename it into place so readers never see partial entries.
+        staging = Path(tempfile.mkdtemp(prefix=f".{key[:8]}-", dir=entry_dir.parent))
+        try:
+            for path in files:
+                shutil.copyfile(path, staging / path.name)
+            entry = {
+                "schema": CACHE_SCHEMA,
+                "key": key,
+                "doc_id": doc_id,
+                "files": [path.name for path in files],
+                "sha256": {path.name: sha256_file(staging / path.name) for path in files},
+                "extra": extra or {},
+            }
+            with (staging / ENTRY_FILE).open("w", encoding="utf-8", newline="\n") as f:
+                dump_yaml(entry, f)
+            if entry_dir.exists():
+                shutil.rmtree(entry_dir)
+            os.replace(staging, entry_dir)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            if self.lookup(key) is None:
+                raise
+        return entry_dir
+
+    def materialize(self, key: str, entry: Dict[str, Any], out_dir: Path, *, hardlink: bool = False) -> List[Path]:
+        entry_dir = self.entry_dir(key)
+        written: List[Path] = []
+        for name in entry["files"]:
+            dst = out_dir / name
+            place_file(entry_dir / name, dst, hardlink=hardlink)
+            written.append(dst)
+        return written
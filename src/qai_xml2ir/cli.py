@@ -1,25 +1,29 @@
 from __future__ import annotations
 
+import glob
 import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from importlib.metadata import PackageNotFoundError, version as pkg_version
-from datetime import date
+from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 import tomllib
 
 import typer
 
-from .egov_parser import collect_display_names, parse_egov_xml
+from .bundle_cache import BundleCache, build_cache_key
+from .digest import sha256_data, sha256_file
+from .egov_parser import ParsedLaw, collect_display_names, parse_egov_xml
+from .ir_contexts import CONTEXTS_SUFFIX, load_ir_contexts, write_ir_contexts
+from .ir_offsets import index_path_for, write_ir_index
+from .ir_sidecar import SIDECAR_FORMATS, sidecar_path_for, write_ir_jsonl
 from .models_ir import IRDocument
 from .models_meta import build_meta
 from .models_profiles import build_parser_profile, build_regdoc_profile
-from .serialize import sha256_file, write_yaml
-from .verify import (
-    assert_unique_nids,
-    check_annex_article_nids,
-    check_appendix_scoped_indices,
-    check_ord_format_and_order,
-)
+from .serialize import write_ir_yaml, write_yaml
+from .verify import raise_for_problems, verify_contexts, verify_tree
 
 app = typer.Typer(add_completion=False)
 
@@ -88,31 +92,150 @@ def bundle(
     retrieved_at: Optional[str] = typer.Option(None, "--retrieved-at"),
     source_url: Optional[str] = typer.Option(None, "--source-url"),
     emit_only: str = typer.Option("all", "--emit-only"),
+    stream: bool = typer.Option(False, "--stream/--no-stream"),
+    cache_dir: Optional[Path] = typer.Option(None, "--cache-dir", file_okay=False),
+    cache_hardlink: bool = typer.Option(False, "--cache-hardlink/--cache-copy"),
+    sidecar: Optional[str] = typer.Option(None, "--sidecar"),
+    contexts: bool = typer.Option(False, "--contexts/--no-contexts"),
 ) -> None:
     logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    if not isinstance(doc_id, str):
+        doc_id = None
+    if not isinstance(short_title, str):
+        short_title = None
+    if not isinstance(retrieved_at, str):
+        retrieved_at = None
+    # Resolved before the cache key: a hit must not carry an earlier day's default into the meta.
+    retrieved_at = retrieved_at or date.today().isoformat()
+    if not isinstance(source_url, str):
+        source_url = None
+    if not isinstance(emit_only, str):
+        emit_only = "all"
+    if not isinstance(stream, bool):
+        stream = False
+    if not isinstance(cache_dir, Path):
+        cache_dir = None
+    if not isinstance(cache_hardlink, bool):
+        cache_hardlink = False
+    sidecar = _check_sidecar(sidecar)
+    if not isinstance(contexts, bool):
+        contexts = False
 
-    parsed = parse_egov_xml(input)
+    # Only complete bundles are cached; --emit-only ir always converts.
+    cache = BundleCache(cache_dir) if cache_dir is not None and emit_only == "all" else None
+    cache_key = None
+    if cache is not None:
+        cache_key = _bundle_cache_key(
+            input,
+            options={
+                "command": "bundle",
+                "doc_id": doc_id,
+                "short_title": short_title,
+                "retrieved_at": retrieved_at,
+                "source_url": source_url,
+                "sidecar": sidecar,
+                "contexts": contexts,
+            },
+        )
+        entry = cache.lookup(cache_key)
+        if entry is not None:
+            cache.materialize(cache_key, entry, out_dir, hardlink=cache_hardlink)
+            typer.echo(f"[cache] hit {cache_key[:12]} -> {out_dir}", err=True)
+            return
+
+    parsed = parse_egov_xml(input, streaming=stream)
     doc_id = doc_id or build_default_doc_id(parsed.law_id, parsed.as_of, parsed.revision_id, input.stem)
+    ir_doc = _build_ir_document(parsed, doc_id)
+    _run_verify_or_fail(ir_doc.content)
+
+    if emit_only not in {"all", "ir"}:
+        raise typer.BadParameter("--emit-only must be 'all' or 'ir'")
+
+    written = _write_bundle(
+        ir_doc,
+        parsed,
+        input=input,
+        out_dir=out_dir,
+        short_title=short_title,
+        retrieved_at=retrieved_at,
+        source_url=source_url,
+        emit_only=emit_only,
+        sidecar=sidecar,
+        contexts=contexts,
+    )
+    if cache is not None and cache_key is not None:
+        cache.store(cache_key, doc_id=doc_id, files=written)
 
+
+def _check_sidecar(sidecar: Optional[str]) -> Optional[str]:
+    if not isinstance(sidecar, str):
+        return None
+    if sidecar not in SIDECAR_FORMATS:
+        raise typer.BadParameter(f"--sidecar must be one of: {'|'.join(SIDECAR_FORMATS)}")
+    return sidecar
+
+
+def _bundle_cache_key(input: Path, *, options: Dict[str, Any], input_checksum: Optional[str] = None) -> str:
+    return build_cache_key(
+        tool="qai_xml2ir",
+        input_checksum=input_checksum or sha256_file(input),
+        parser_profile_sha256=sha256_data(build_parser_profile()),
+        tool_version=_resolve_tool_version(),
+        options={**options, "input_path": str(input)},
+    )
+
+
+def _build_ir_document(parsed: ParsedLaw, doc_id: str) -> IRDocument:
     index = {"display_name_by_nid": {}}
     collect_display_names(parsed.root, index["display_name_by_nid"])
-    ir_doc = IRDocument(doc_id=doc_id, content=parsed.root, index=index)
-    _run_verify_or_fail(ir_doc.content)
+    return IRDocument(doc_id=doc_id, content=parsed.root, index=index)
 
+
+def _bundle_paths(out_dir: Path, stem: str) -> Dict[str, Path]:
+    return {
+        "ir": out_dir / f"{stem}.regdoc_ir.yaml",
+        "parser_profile": out_dir / f"{stem}.parser_profile.yaml",
+        "regdoc_profile": out_dir / f"{stem}.regdoc_profile.yaml",
+        "meta": out_dir / f"{stem}.meta.yaml",
+        "contexts": out_dir / f"{stem}{CONTEXTS_SUFFIX}",
+    }
+
+
+def _write_bundle(
+    ir_doc: IRDocument,
+    parsed: ParsedLaw,
+    *,
+    input: Path,
+    out_dir: Path,
+    short_title: Optional[str],
+    retrieved_at: Optional[str],
+    source_url: Optional[str],
+    emit_only: str,
+    sidecar: Optional[str] = None,
+    contexts: bool = False,
+) -> List[Path]:
+    doc_id = ir_doc.doc_id
     parser_profile = build_parser_profile()
     regdoc_profile = build_regdoc_profile(doc_id)
 
-    stem = doc_id
-    ir_path = out_dir / f"{stem}.regdoc_ir.yaml"
-    parser_profile_path = out_dir / f"{stem}.parser_profile.yaml"
-    regdoc_profile_path = out_dir / f"{stem}.regdoc_profile.yaml"
-    meta_path = out_dir / f"{stem}.meta.yaml"
-
-    if emit_only not in {"all", "ir"}:
-        raise typer.BadParameter("--emit-only must be 'all' or 'ir'")
+    paths = _bundle_paths(out_dir, doc_id)
+    ir_path = paths["ir"]
+    parser_profile_path = paths["parser_profile"]
+    regdoc_profile_path = paths["regdoc_profile"]
+    meta_path = paths["meta"]
+    written: List[Path] = []
 
     if emit_only in {"all", "ir"}:
-        write_yaml(ir_path, ir_doc.to_dict())
+        write_ir_yaml(ir_path, ir_doc)
+        written.append(ir_path)
+        if sidecar in SIDECAR_FORMATS:
+            jsonl_path = sidecar_path_for(ir_path)
+            write_ir_jsonl(jsonl_path, ir_doc, ir_yaml_path=ir_path)
+            written.append(jsonl_path)
+        if sidecar == "index":
+            index_path = index_path_for(ir_path)
+            write_ir_index(index_path, jsonl_path)
+            written.append(index_path)
 
     if emit_only == "all":
         write_yaml(parser_profile_path, parser_profile)
@@ -144,27 +267,264 @@ def bundle(
             notes=[],
         )
         write_yaml(meta_path, meta)
+        written.extend([parser_profile_path, regdoc_profile_path, meta_path])
+        if contexts:
+            contexts_path = paths["contexts"]
+            write_ir_contexts(contexts_path, ir_doc, regdoc_profile, ir_yaml_path=ir_path)
+            written_contexts = load_ir_contexts(contexts_path, ir_yaml_path=ir_path, regdoc_profile=regdoc_profile)
+            raise_for_problems(
+                verify_contexts(ir_doc.content, written_contexts, regdoc_profile),
+                error=typer.BadParameter,
+            )
+            written.append(contexts_path)
+    return written
 
 
-def _run_verify_or_fail(root) -> None:
-    assert_unique_nids(root)
-    collisions, invalid_annex = check_annex_article_nids(root)
-    appendix_problems = check_appendix_scoped_indices(root)
-    ord_problems = check_ord_format_and_order(root)
-
-    errors = []
-    if collisions:
-        errors.append(f"annex nid collisions: {collisions}")
-    if invalid_annex:
-        errors.append(f"invalid annex article nids: {invalid_annex}")
-    if appendix_problems:
-        errors.append(f"appendix index problems: {appendix_problems}")
-    if ord_problems:
-        errors.append(f"ord problems: {ord_problems}")
-
-    if errors:
-        raise typer.BadParameter("verify failed: " + " | ".join(errors))
+def build_default_source_url(
+    law_id: Optional[str],
+    as_of: Optional[str],
+    revision_id: Optional[str],
+) -> Optional[str]:
+    if not (law_id and as_of and revision_id):
+        return None
+    return f"https://laws.e-gov.go.jp/law/{law_id}/{_normalize_as_of_for_doc_id(as_of)}_{revision_id}"
+
+
+def resolve_batch_inputs(specs: List[str]) -> List[Path]:
+    """Expand directories (recursive *.xml), globs and list files into XML paths.
 
+    List files hold one path per line; blank lines and ``#`` comments are ignored
+    and relative paths are resolved against the list file's directory.
+    """
+    resolved: List[Path] = []
+    for spec in specs:
+        candidate = Path(spec)
+        if candidate.is_dir():
+            resolved.extend(sorted(p for p in candidate.rglob("*.xml") if p.is_file()))
+        elif candidate.is_file() and candidate.suffix.lower() == ".xml":
+            resolved.append(candidate)
+        elif candidate.is_file():
+            for raw in candidate.read_text(encoding="utf-8").splitlines():
+                line = raw.strip()
+                if not line or line.startswith("#"):
+                    continue
+                listed = Path(line)
+                if not listed.is_absolute():
+                    listed = candidate.parent / listed
+                resolved.append(listed)
+        else:
+            matches = sorted(Path(p) for p in glob.glob(spec, recursive=True))
+            if not matches:
+                raise typer.BadParameter(f"No XML inputs matched: {spec}")
+            resolved.extend(p for p in matches if p.is_file())
+    deduped: List[Path] = []
+    seen: set[str] = set()
+    for path in resolved:
+        key = str(path.resolve())
+        if key in seen:
+            continue
+        seen.add(key)
+        deduped.append(path)
+    return deduped
+
+
+def _refuse_existing_bundle(law_out_dir: Path, doc_id: str) -> None:
+    existing = [p.name for p in _bundle_paths(law_out_dir, doc_id).values() if p.exists()]
+    if existing:
+        raise FileExistsError(f"Refusing to overwrite existing files in {law_out_dir}: {existing}")
+
+
+def _input_sha256(path: Path) -> Optional[str]:
+    try:
+        return sha256_file(path)
+    except OSError:
+        return None
+
+
+def _run_batch_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    # Runs inside a pool worker: every failure is reported, never raised.
+    input_path = Path(job["input"])
+    record: Dict[str, Any] = {
+        "input": str(input_path),
+        "input_sha256": None,
+        "doc_id": None,
+        "status": "error",
+        "error": None,
+        "out_dir": None,
+        "cache": None,
+        "timings_sec": {},
+    }
+    timings = record["timings_sec"]
+    started = time.perf_counter()
+    try:
+        record["input_sha256"] = sha256_file(input_path)
+        cache = BundleCache(Path(job["cache_dir"])) if job.get("cache_dir") else None
+        cache_key = None
+        if cache is not None:
+            cache_key = _bundle_cache_key(
+                input_path,
+                input_checksum=record["input_sha256"],
+                options={
+                    "command": "batch",
+                    "retrieved_at": job["retrieved_at"],
+                    "sidecar": job.get("sidecar"),
+                    "contexts": bool(job.get("contexts")),
+                },
+            )
+            entry = cache.lookup(cache_key)
+            record["cache"] = "miss" if entry is None else "hit"
+            if entry is not None:
+                doc_id = entry["doc_id"]
+                record["doc_id"] = doc_id
+                law_out_dir = Path(job["out_dir"]) / doc_id
+                record["out_dir"] = str(law_out_dir)
+                _refuse_existing_bundle(law_out_dir, doc_id)
+                cache.materialize(cache_key, entry, law_out_dir, hardlink=bool(job.get("cache_hardlink")))
+                record["status"] = "ok"
+                timings["total"] = round(time.perf_counter() - started, 3)
+                return record
+
+        t0 = time.perf_counter()
+        parsed = parse_egov_xml(input_path, streaming=bool(job["stream"]))
+        timings["parse"] = round(time.perf_counter() - t0, 3)
+
+        doc_id = build_default_doc_id(parsed.law_id, parsed.as_of, parsed.revision_id, input_path.stem)
+        record["doc_id"] = doc_id
+        law_out_dir = Path(job["out_dir"]) / doc_id
+        record["out_dir"] = str(law_out_dir)
+        _refuse_existing_bundle(law_out_dir, doc_id)
+
+        t0 = time.perf_counter()
+        ir_doc = _build_ir_document(parsed, doc_id)
+        _run_verify_or_fail(ir_doc.content)
+        timings["verify"] = round(time.perf_counter() - t0, 3)
+
+        t0 = time.perf_counter()
+        written = _write_bundle(
+            ir_doc,
+            parsed,
+            input=input_path,
+            out_dir=law_out_dir,
+            short_title=None,
+            retrieved_at=job["retrieved_at"],
+            source_url=build_default_source_url(parsed.law_id, parsed.as_of, parsed.revision_id),
+            emit_only="all",
+            sidecar=job.get("sidecar"),
+            contexts=bool(job.get("contexts")),
+        )
+        if cache is not None and cache_key is not None:
+            cache.store(cache_key, doc_id=doc_id, files=written)
+        timings["write"] = round(time.perf_counter() - t0, 3)
+        record["status"] = "ok"
+    except Exception as exc:  # noqa: BLE001 - isolate per-law failures
+        record["error"] = f"{type(exc).__name__}: {exc}"
+    timings["total"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+@app.command()
+def batch(
+    inputs: List[str] = typer.Option(..., "--input"),
+    out_dir: Path = typer.Option(..., "--out-dir", file_okay=False),
+    workers: int = typer.Option(0, "--workers"),
+    retrieved_at: Optional[str] = typer.Option(None, "--retrieved-at"),
+    stream: bool = typer.Option(False, "--stream/--no-stream"),
+    cache_dir: Optional[Path] = typer.Option(None, "--cache-dir", file_okay=False),
+    cache_hardlink: bool = typer.Option(False, "--cache-hardlink/--cache-copy"),
+    sidecar: Optional[str] = typer.Option(None, "--sidecar"),
+    contexts: bool = typer.Option(False, "--contexts/--no-contexts"),
+) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    if not isinstance(retrieved_at, str):
+        retrieved_at = None
+    # One date for the whole run, and part of every cache key (see bundle).
+    retrieved_at = retrieved_at or date.today().isoformat()
+    if not isinstance(stream, bool):
+        stream = False
+    if not isinstance(cache_dir, Path):
+        cache_dir = None
+    if not isinstance(cache_hardlink, bool):
+        cache_hardlink = False
+    sidecar = _check_sidecar(sidecar)
+    if not isinstance(contexts, bool):
+        contexts = False
+    if not isinstance(workers, int) or workers <= 0:
+        workers = os.cpu_count() or 1
+
+    xml_paths = resolve_batch_inputs(list(inputs))
+    if not xml_paths:
+        raise typer.BadParameter("No XML inputs found.")
+    jobs = [
+        {
+            "input": str(path),
+            "out_dir": str(out_dir),
+            "retrieved_at": retrieved_at,
+            "stream": stream,
+            "cache_dir": str(cache_dir) if cache_dir is not None else None,
+            "cache_hardlink": cache_hardlink,
+            "sidecar": sidecar,
+            "contexts": contexts,
+        }
+        for path in xml_paths
+    ]
+
+    started = time.perf_counter()
+    workers = min(workers, len(jobs))
+    if workers == 1:
+        records = [_run_batch_job(job) for job in jobs]
+    else:
+        records = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_batch_job, job) for job in jobs]
+            for job, future in zip(jobs, futures):
+                try:
+                    records.append(future.result())
+                except Exception as exc:  # noqa: BLE001 - e.g. a worker process died
+                    records.append(
+                        {
+                            "input": job["input"],
+                            "input_sha256": _input_sha256(Path(job["input"])),
+                            "doc_id": None,
+                            "status": "error",
+                            "error": f"{type(exc).__name__}: {exc}",
+                            "out_dir": None,
+                            "cache": None,
+                            "timings_sec": {},
+                        }
+                    )
+    wall = round(time.perf_counter() - started, 3)
+
+    failed = [r for r in records if r["status"] != "ok"]
+    for record in failed:
+        typer.echo(f"[batch] failed {record['input']}: {record['error']}", err=True)
+    manifest = {
+        "schema": "qai.batch_manifest.v1",
+        "run_id": out_dir.name,
+        "created_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z"),
+        "tool": {"name": "qai_xml2ir", "version": _resolve_tool_version()},
+        "options": {
+            "workers": workers,
+            "stream": stream,
+            "retrieved_at": retrieved_at,
+            "cache_dir": str(cache_dir) if cache_dir is not None else None,
+        },
+        "summary": {
+            "total": len(records),
+            "ok": len(records) - len(failed),
+            "failed": len(failed),
+            "cache_hits": sum(1 for r in records if r.get("cache") == "hit"),
+            "wall_sec": wall,
+        },
+        "laws": records,
+    }
+    write_yaml(out_dir / "manifest.yaml", manifest)
+    typer.echo(f"[batch] {len(records) - len(failed)}/{len(records)} ok in {wall}s ({workers} workers)")
+    if failed:
+        raise typer.Exit(code=1)
+
+
+def _run_verify_or_fail(root) -> None:
+    raise_for_problems(verify_tree(root), error=typer.BadParameter)
 
 if __name__ == "__main__":
     app()
@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from .digest import sha256_data
+from .models_ir import Node
+
+CONTEXT_CACHE_SIZE = 65536
+
+
+@dataclass
+class _SearchResult:
+    node: Node
+    ancestors: List[Node]
+
+
+class NodeIndex:
+    """Lookups over one IR tree, built in a single pass.
+
+    Nodes are numbered in pre-order with their parent and depth; ``last[i]``
+    is the number of the last node in the subtree of node ``i``, so node ``j``
+    lies under node ``i`` iff ``i < j <= last[i]``.  A duplicated nid resolves
+    to its first occurrence in pre-order, as the tree search does.  The index
+    does not follow later changes to the tree.
+    """
+
+    __slots__ = ("root", "nodes", "parents", "depths", "last", "positions")
+
+    def __init__(self, root: Node) -> None:
+        self.root = root
+        self.nodes: List[Node] = []
+        self.parents: List[int] = []
+        self.depths: List[int] = []
+        self.last: List[int] = []
+        self.positions: Dict[str, int] = {}
+        stack: List[Tuple[Node, int, int]] = [(root, -1, 0)]
+        while stack:
+            node, parent, depth = stack.pop()
+            pos = len(self.nodes)
+            self.nodes.append(node)
+            self.parents.append(parent)
+            self.depths.append(depth)
+            self.last.append(pos)
+            self.positions.setdefault(node.nid, pos)
+            for child in reversed(node.children):
+                stack.append((child, pos, depth + 1))
+        last = self.last
+        parents = self.parents
+        for pos in range(len(self.nodes) - 1, 0, -1):
+            parent = parents[pos]
+            if last[pos] > last[parent]:
+                last[parent] = last[pos]
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, nid: object) -> bool:
+        return nid in self.positions
+
+    def get(self, nid: str) -> Optional[Node]:
+        pos = self.positions.get(nid)
+        return self.nodes[pos] if pos is not None else None
+
+    def parent(self, nid: str) -> Optional[Node]:
+        pos = self.positions.get(nid)
+        if pos is None or self.parents[pos] < 0:
+            return None
+        return self.nodes[self.parents[pos]]
+
+    def depth(self, nid: str) -> int:
+        return self.depths[self.positions[nid]]
+
+    def ancestors(self, nid: str) -> List[Node]:
+        """Ancestors of ``nid`` from the root down, without the node itself."""
+        out: List[Node] = []
+        pos = self.parents[self.positions[nid]]
+        while pos >= 0:
+            out.append(self.nodes[pos])
+            pos = self.parents[pos]
+        out.reverse()
+        return out
+
+    def is_descendant(self, nid: str, ancestor_nid: str) -> bool:
+        pos = self.positions.get(nid)
+        anc = self.positions.get(ancestor_nid)
+        if pos is None or anc is None:
+            return False
+        return anc < pos <= self.last[anc]
+
+
+def _find_with_ancestors(root: Node, nid: str) -> Optional[_SearchResult]:
+    stack: List[Tuple[Node, List[Node]]] = [(root, [])]
+    while stack:
+        node, ancestors = stack.pop()
+        if node.nid == nid:
+            return _SearchResult(node=node, ancestors=ancestors)
+        for child in reversed(node.children):
+            stack.append((child, [*ancestors, node]))
+    return None
+
+
+def _resolve_rule(purpose_profile: Dict[str, object], selected_kind: str) -> Dict[str, object]:
+    policies = purpose_profile.get("context_display_policy")
+    if not isinstance(policies, list):
+        return {}
+    for policy in policies:
+        if not isinstance(policy, dict):
+            continue
+        when_kind = policy.get("when_kind")
+        if isinstance(when_kind, str) and when_kind == selected_kind:
+            return policy
+    return {}
+
+
+def _collect_descendants(
+    base_nodes: List[Node],
+    *,
+    max_depth: int,
+    kinds: Optional[FrozenSet[str]],
+) -> List[Node]:
+    out: List[Node] = []
+    for base in base_nodes:
+        stack: List[Tuple[Node, int]] = [(base, 0)]
+        while stack:
+            node, depth = stack.pop()
+            if depth >= max_depth:
+                continue
+            for child in node.children:
+                next_depth = depth + 1
+                if kinds is None or child.kind in kinds:
+                    out.append(child)
+                stack.append((child, next_depth))
+    return out
+
+
+@dataclass(frozen=True)
+class _ContextRule:
+    include_until: Optional[str]
+    # None when the rule does not include descendants.
+    descendants_of: Optional[str]
+    max_depth: int
+    kinds: Optional[FrozenSet[str]]
+
+
+def _compile_rule(rule: Dict[str, object]) -> _ContextRule:
+    include_until = rule.get("include_ancestors_until_kind")
+    max_depth_raw = rule.get("include_descendants_max_depth")
+    kinds_raw = rule.get("include_descendants_kinds")
+    kinds: Optional[FrozenSet[str]] = None
+    if isinstance(kinds_raw, list):
+        allowed = frozenset(str(v) for v in kinds_raw if isinstance(v, str) and v)
+        kinds = allowed or None
+    return _ContextRule(
+        include_until=include_until if isinstance(include_until, str) and include_until else None,
+        descendants_of=(
+            str(rule.get("include_descendants_of") or "selected") if bool(rule.get("include_descendants")) else None
+        ),
+        max_depth=max_depth_raw if isinstance(max_depth_raw, int) and max_depth_raw > 0 else 8,
+        kinds=kinds,
+    )
+
+
+def _included_ancestors(ancestors: List[Node], include_until: Optional[str]) -> List[Node]:
+    included: List[Node] = []
+    for anc in reversed(ancestors):
+        if anc.kind == "document":
+            continue
+        included.append(anc)
+        if include_until is not None and anc.kind == include_until:
+            break
+    included.reverse()
+    return included
+
+
+def _assemble_context(
+    selected: Node,
+    included_ancestors: List[Node],
+    rule: _ContextRule,
+    descendants_of: Callable[[Node], List[Node]],
+) -> List[Node]:
+    result: List[Node] = [*included_ancestors, selected]
+    if rule.descendants_of is None:
+        return result
+    if rule.descendants_of == "ancestors":
+        bases = included_ancestors
+    elif rule.descendants_of == "both":
+        bases = [*included_ancestors, selected]
+    else:
+        bases = [selected]
+    seen = {n.nid for n in result}
+    for base in bases:
+        for node in descendants_of(base):
+            if node.nid in seen:
+                continue
+            seen.add(node.nid)
+            result.append(node)
+    return result
+
+
+def _resolve_selected(selected: Node, ancestors: List[Node], rule: _ContextRule) -> List[Node]:
+    return _assemble_context(
+        selected,
+        _included_ancestors(ancestors, rule.include_until),
+        rule,
+        lambda base: _collect_descendants([base], max_depth=rule.max_depth, kinds=rule.kinds),
+    )
+
+
+def resolve_context_nodes(
+    root: Node,
+    selected_nid: str,
+    purpose_profile: Dict[str, object],
+    *,
+    index: Optional[NodeIndex] = None,
+) -> List[Node]:
+    """Context nodes for ``selected_nid``: included ancestors, the node, then descendants.
+
+    Pass a ``NodeIndex`` of ``root`` when resolving many nids of one tree;
+    without it every call searches the tree.
+    """
+    if index is not None:
+        selected = index.get(selected_nid)
+        if selected is None:
+            return []
+        ancestors = index.ancestors(selected_nid)
+    else:
+        found = _find_with_ancestors(root, selected_nid)
+        if found is None:
+            return []
+        selected = found.node
+        ancestors = found.ancestors
+    return _resolve_selected(selected, ancestors, _compile_rule(_resolve_rule(purpose_profile, selected.kind)))
+
+
+def resolve_context_batch(
+    root: Node,
+    nids: Iterable[str],
+    purpose_profile: Dict[str, object],
+    *,
+    index: Optional[NodeIndex] = None,
+) -> Iterator[Tuple[str, List[str]]]:
+    """Yield ``(nid, context nids)`` for each of ``nids``, in order, as ``resolve_context_nodes`` would.
+
+    The tree is indexed once (unless ``index`` is given).  Rules are compiled
+    once per kind, and included ancestors and descendant lists are computed
+    once per parent and base node, so siblings share them.  Unknown nids
+    yield an empty list.
+    """
+    if index is None:
+        index = NodeIndex(root)
+    rules: Dict[str, _ContextRule] = {}
+    included_by_parent: Dict[Tuple[int, Optional[str]], List[Node]] = {}
+    descendants_by_base: Dict[Tuple[int, _ContextRule], List[Node]] = {}
+    for nid in nids:
+        pos = index.positions.get(nid)
+        if pos is None:
+            yield nid, []
+            continue
+        selected = index.nodes[pos]
+        rule = rules.get(selected.kind)
+        if rule is None:
+            rule = rules[selected.kind] = _compile_rule(_resolve_rule(purpose_profile, selected.kind))
+        key = (index.parents[pos], rule.include_until)
+        included = included_by_parent.get(key)
+        if included is None:
+            included = included_by_parent[key] = _included_ancestors(index.ancestors(nid), rule.include_until)
+
+        def _descendants_of(base: Node, rule: _ContextRule = rule) -> List[Node]:
+            base_key = (id(base), rule)
+            found = descendants_by_base.get(base_key)
+            if found is None:
+                found = descendants_by_base[base_key] = _collect_descendants(
+                    [base], max_depth=rule.max_depth, kinds=rule.kinds
+                )
+            return found
+
+        yield nid, [node.nid for node in _assemble_context(selected, included, rule, _descendants_of)]
+
+
+def purpose_profile_digest(purpose_profile: Dict[str, object]) -> str:
+    return sha256_data(purpose_profile)
+
+
+class ContextCache:
+    """Bounded LRU of resolved contexts keyed by ``(ir_digest, selected nid, purpose profile digest)``.
+
+    ``ir_digest`` identifies the tree content, e.g. the sha256 of the IR YAML
+    the tree was loaded from.  Misses are resolved through a ``NodeIndex``
+    kept per digest, with rules compiled once per profile digest and kind.
+    Call ``invalidate(ir_digest)`` when the bundle behind a digest is
+    reloaded or dropped; entries are not otherwise tied to the tree object.
+    Callers resolving repeatedly under one profile should pass
+    ``profile_digest`` (``purpose_profile_digest``) rather than have it
+    hashed on every call.
+    """
+
+    def __init__(self, maxsize: int = CONTEXT_CACHE_SIZE) -> None:
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive: {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[Node, ...]]" = OrderedDict()
+        self._indexes: Dict[str, NodeIndex] = {}
+        self._rules: Dict[Tuple[str, str], _ContextRule] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def resolve(
+        self,
+        root: Node,
+        selected_nid: str,
+        purpose_profile: Dict[str, object],
+        *,
+        ir_digest: str,
+        profile_digest: Optional[str] = None,
+    ) -> List[Node]:
+        """``resolve_context_nodes(root, selected_nid, purpose_profile)``, served from the cache when possible."""
+        if profile_digest is None:
+            profile_digest = purpose_profile_digest(purpose_profile)
+        key = (ir_digest, selected_nid, profile_digest)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(cached)
+            self.misses += 1
+            index = self._indexes.get(ir_digest)
+            if index is None or index.root is not root:
+                index = self._indexes[ir_digest] = NodeIndex(root)
+            context: Tuple[Node, ...] = ()
+            pos = index.positions.get(selected_nid)
+            if pos is not None:
+                selected = index.nodes[pos]
+                rule_key = (profile_digest, selected.kind)
+                rule = self._rules.get(rule_key)
+                if rule is None:
+                    rule = self._rules[rule_key] = _compile_rule(_resolve_rule(purpose_profile, selected.kind))
+                context = tuple(_resolve_selected(selected, index.ancestors(selected_nid), rule))
+            self._entries[key] = context
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return list(context)
+
+    def invalidate(self, ir_digest: str) -> int:
+        """Drop every entry and the index of ``ir_digest``; returns the number of entries dropped."""
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == ir_digest]
+            for key in stale:
+                del self._entries[key]
+            self._indexes.pop(ir_digest, None)
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._indexes.clear()
+            self._rules.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
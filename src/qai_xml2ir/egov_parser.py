@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import logging
 import re
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from contextvars import ContextVar
 from statistics import median
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from lxml import etree
 
@@ -61,7 +64,7 @@ def text_without_rt(elem: etree._Element) -> str:
 def extract_sentence_text(
     container: etree._Element, sentence_tag: str = "Sentence"
 ) -> str:
-    sents = container.findall(f".//{sentence_tag}")
+    sents = find_all(container, sentence_tag)
     return "".join(text_without_rt(s).strip() for s in sents).strip()
 
 
@@ -69,17 +72,108 @@ def extract_sentence_text_in(elem: etree._Element, container_tag: str) -> str:
     container = find_first(elem, container_tag)
     if container is None:
         return ""
-    sents = container.findall(".//Sentence")
+    sents = find_all(container, "Sentence")
     return "".join(text_without_rt(s).strip() for s in sents).strip()
 
 
+class TagIndex:
+    """Namespace-stripped tag -> elements in document order, built in one walk.
+
+    Elements are numbered in pre-order, so "first descendant-or-self with tag X"
+    is a bisect over the tag's positions plus one ancestor check.
+    """
+
+    def __init__(self, root: etree._Element) -> None:
+        elements = list(root.iter(etree.Element))
+        self._elements = elements
+        self._position: Dict[etree._Element, int] = dict(zip(elements, range(len(elements))))
+        by_raw_tag: Dict[str, List[int]] = {}
+        for pos, raw_tag in enumerate([e.tag for e in elements]):
+            positions = by_raw_tag.get(raw_tag)
+            if positions is None:
+                by_raw_tag[raw_tag] = [pos]
+            else:
+                positions.append(pos)
+        self._positions_by_tag: Dict[str, List[int]] = {}
+        for raw_tag, positions in by_raw_tag.items():
+            tag = raw_tag.split("}", 1)[1] if "}" in raw_tag else raw_tag
+            existing = self._positions_by_tag.get(tag)
+            self._positions_by_tag[tag] = sorted(existing + positions) if existing else positions
+
+    def covers(self, elem: etree._Element) -> bool:
+        return elem in self._position
+
+    def elements(self, tag: str) -> List[etree._Element]:
+        return [self._elements[pos] for pos in self._positions_by_tag.get(tag, [])]
+
+    def descendants(self, elem: etree._Element, tag: str) -> List[etree._Element]:
+        """Same elements as ``elem.findall(f".//{tag}")``: one slice of the pre-order range."""
+        positions = self._positions_by_tag.get(tag)
+        if not positions:
+            return []
+        start = self._position[elem] + 1
+        end = self._position[self._last_descendant(elem)] + 1
+        found = [self._elements[pos] for pos in positions[bisect_left(positions, start) : bisect_left(positions, end)]]
+        # Positions are keyed by the namespace-stripped tag; findall matches the raw one.
+        return [e for e in found if e.tag == tag]
+
+    @staticmethod
+    def _last_descendant(elem: etree._Element) -> etree._Element:
+        last = elem
+        while True:
+            child = next((c for c in reversed(last) if isinstance(c.tag, str)), None)
+            if child is None:
+                return last
+            last = child
+
+    def first(self, elem: etree._Element, tag: str) -> Optional[etree._Element]:
+        positions = self._positions_by_tag.get(tag)
+        if not positions:
+            return None
+        i = bisect_left(positions, self._position[elem])
+        if i >= len(positions):
+            return None
+        # The next X at or after elem in document order is the answer iff it
+        # lies inside elem's subtree.
+        candidate = self._elements[positions[i]]
+        if candidate is elem:
+            return candidate
+        for ancestor in candidate.iterancestors():
+            if ancestor is elem:
+                return candidate
+        return None
+
+
+_ACTIVE_TAG_INDEX: ContextVar[Optional[TagIndex]] = ContextVar("_ACTIVE_TAG_INDEX", default=None)
+
+
+@contextmanager
+def tag_index_scope(root: etree._Element) -> Iterator[TagIndex]:
+    index = TagIndex(root)
+    token = _ACTIVE_TAG_INDEX.set(index)
+    try:
+        yield index
+    finally:
+        _ACTIVE_TAG_INDEX.reset(token)
+
+
 def find_first(elem: etree._Element, tag: str) -> Optional[etree._Element]:
+    index = _ACTIVE_TAG_INDEX.get()
+    if index is not None and index.covers(elem):
+        return index.first(elem, tag)
     for child in elem.iter():
         if lname(child) == tag:
             return child
     return None
 
 
+def find_all(elem: etree._Element, tag: str) -> List[etree._Element]:
+    index = _ACTIVE_TAG_INDEX.get()
+    if index is not None and index.covers(elem):
+        return index.descendants(elem, tag)
+    return elem.findall(f".//{tag}")
+
+
 def find_text(elem: etree._Element, tag: str) -> Optional[str]:
     child = find_first(elem, tag)
     if child is None:
@@ -258,24 +352,75 @@ def _can_absorb_anchor(
     return True
 
 
+class _CoverGrid:
+    """Cell -> owning anchor id, updated in place as border merges grow spans.
+
+    Every cell keeps the ranks of all live anchors covering it; the owner is the
+    highest rank, which is what a full ``_rebuild_cover_from_anchors`` (later
+    anchors overwrite earlier ones) would produce.
+    """
+
+    def __init__(self, anchors: Dict[str, Dict[str, Any]], cover: Dict[Tuple[int, int], str]) -> None:
+        self._anchor_ids = list(anchors)
+        self._rank = {anchor_id: idx for idx, anchor_id in enumerate(self._anchor_ids)}
+        self._owners: Dict[Tuple[int, int], List[int]] = {}
+        self.cover = cover
+        self.cover.clear()
+        for anchor_id, anchor in anchors.items():
+            if anchor.get("covered"):
+                continue
+            r0 = int(anchor["r"])
+            c0 = int(anchor["c"])
+            self.add(anchor_id, r0, r0 + int(anchor["rowspan"]), c0, c0 + int(anchor["colspan"]))
+
+    def add(self, anchor_id: str, r0: int, r1: int, c0: int, c1: int) -> None:
+        rank = self._rank[anchor_id]
+        for rr in range(r0, r1):
+            for cc in range(c0, c1):
+                owners = self._owners.setdefault((rr, cc), [])
+                insort(owners, rank)
+                self.cover[(rr, cc)] = self._anchor_ids[owners[-1]]
+
+    def remove(self, anchor_id: str, r0: int, r1: int, c0: int, c1: int) -> None:
+        rank = self._rank[anchor_id]
+        for rr in range(r0, r1):
+            for cc in range(c0, c1):
+                owners = self._owners.get((rr, cc))
+                if not owners or rank not in owners:
+                    continue
+                owners.remove(rank)
+                if owners:
+                    self.cover[(rr, cc)] = self._anchor_ids[owners[-1]]
+                else:
+                    del self._owners[(rr, cc)]
+                    del self.cover[(rr, cc)]
+
+
 def _infer_border_spans(
     anchors: Dict[str, Dict[str, Any]],
     cover: Dict[Tuple[int, int], str],
     nrows: int,
 ) -> Tuple[Dict[str, Dict[str, Any]], Dict[Tuple[int, int], str], int]:
-    changed = True
-    while changed:
-        changed = False
-        ordered_ids = sorted(
+    # Normalize spans once (clip to nrows), then merge incrementally.
+    cover, _ = _rebuild_cover_from_anchors(anchors, nrows)
+    grid = _CoverGrid(anchors, cover)
+    # Anchor positions never move and only empty anchors get absorbed, so the
+    # (r, c) ordering and the candidate set are computed once.
+    candidate_ids = [
+        aid
+        for aid in sorted(
             (aid for aid, a in anchors.items() if not a.get("covered")),
             key=lambda aid: (int(anchors[aid]["r"]), int(anchors[aid]["c"])),
         )
-        for anchor_id in ordered_ids:
+        if not anchors[aid]["text"].strip()
+    ]
+    changed = True
+    while changed:
+        changed = False
+        for anchor_id in candidate_ids:
             anchor = anchors[anchor_id]
             if anchor.get("covered"):
                 continue
-            if anchor["text"].strip():
-                continue
             r = int(anchor["r"])
             c = int(anchor["c"])
             rowspan = int(anchor["rowspan"])
@@ -292,13 +437,23 @@ def _infer_border_spans(
                         anchors=anchors,
                         cover=cover,
                     ):
-                        needed = (r + rowspan) - int(above["r"])
-                        if needed > int(above["rowspan"]):
+                        above_r = int(above["r"])
+                        above_c = int(above["c"])
+                        above_rowspan = int(above["rowspan"])
+                        needed = (r + rowspan) - above_r
+                        if needed > above_rowspan:
                             above["rowspan"] = needed
                             if above["span_source"] == "none":
                                 above["span_source"] = "border"
+                            grid.add(
+                                above_id,
+                                above_r + above_rowspan,
+                                above_r + needed,
+                                above_c,
+                                above_c + int(above["colspan"]),
+                            )
                         anchor["covered"] = True
-                        cover, _ = _rebuild_cover_from_anchors(anchors, nrows)
+                        grid.remove(anchor_id, r, r + rowspan, c, c + colspan)
                         changed = True
                         continue
 
@@ -313,16 +468,29 @@ def _infer_border_spans(
                         anchors=anchors,
                         cover=cover,
                     ):
-                        needed = (c + colspan) - int(left["c"])
-                        if needed > int(left["colspan"]):
+                        left_r = int(left["r"])
+                        left_c = int(left["c"])
+                        left_colspan = int(left["colspan"])
+                        needed = (c + colspan) - left_c
+                        if needed > left_colspan:
                             left["colspan"] = needed
                             if left["span_source"] == "none":
                                 left["span_source"] = "border"
+                            grid.add(
+                                left_id,
+                                left_r,
+                                left_r + int(left["rowspan"]),
+                                left_c + left_colspan,
+                                left_c + needed,
+                            )
                         anchor["covered"] = True
-                        cover, _ = _rebuild_cover_from_anchors(anchors, nrows)
+                        grid.remove(anchor_id, r, r + rowspan, c, c + colspan)
                         changed = True
                         continue
-    cover, ncols = _rebuild_cover_from_anchors(anchors, nrows)
+    ncols = max(
+        (int(a["c"]) + int(a["colspan"]) for a in anchors.values() if not a.get("covered")),
+        default=0,
+    )
     return anchors, cover, ncols
 
 
@@ -678,62 +846,64 @@ class ParsedLaw:
     root: Node
 
 
-def parse_egov_xml(path: Path) -> ParsedLaw:
-    tree = etree.parse(str(path))
-    root = tree.getroot()
-    law_body = find_first(root, "LawBody")
-    if law_body is None:
-        law_body = root
-
-    title = find_text(law_body, "LawTitle") or ""
-    law_number = find_text(root, "LawNum") or find_text(law_body, "LawNum")
-    law_id = find_text(root, "LawId") or extract_law_id_from_filename(path.name)
+@dataclass
+class _LawBodyCounters:
+    suppl_idx: int = 0
+    body_appdx_idx: int = 0
+    top_idx: int = 0
 
-    nid_builder = NidBuilder()
-    children: List[Node] = []
 
-    suppl_idx = 0
-    body_appdx_idx = 0
-    top_idx = 0
-    for child in law_body:
-        tag = lname(child)
-        if tag == "MainProvision":
-            top_idx += 1
-            children.extend(
-                parse_main_provision(
-                    child,
-                    nid_builder,
-                    parent_ord=None,
-                )
+def _parse_law_body_child(
+    child: etree._Element,
+    nid_builder: NidBuilder,
+    counters: _LawBodyCounters,
+    children: List[Node],
+) -> None:
+    tag = lname(child)
+    if tag == "MainProvision":
+        counters.top_idx += 1
+        children.extend(
+            parse_main_provision(
+                child,
+                nid_builder,
+                parent_ord=None,
             )
-        elif tag == "SupplProvision":
-            top_idx += 1
-            suppl_idx += 1
-            children.append(
-                parse_suppl_provision(
-                    child,
-                    nid_builder,
-                    local_segments=[suppl_idx],
-                    parent_ord=None,
-                )
+        )
+    elif tag == "SupplProvision":
+        counters.top_idx += 1
+        counters.suppl_idx += 1
+        children.append(
+            parse_suppl_provision(
+                child,
+                nid_builder,
+                local_segments=[counters.suppl_idx],
+                parent_ord=None,
             )
-        elif tag.startswith("Appdx"):
-            if should_skip(child):
-                LOGGER.info("Skipping deleted/hidden %s under LawBody", tag)
-                continue
-            top_idx += 1
-            body_appdx_idx += 1
-            children.append(
-                parse_appendix(
-                    child,
-                    nid_builder,
-                    local_segments=[body_appdx_idx],
-                    parent_ord=None,
-                )
+        )
+    elif tag.startswith("Appdx"):
+        if should_skip(child):
+            LOGGER.info("Skipping deleted/hidden %s under LawBody", tag)
+            return
+        counters.top_idx += 1
+        counters.body_appdx_idx += 1
+        children.append(
+            parse_appendix(
+                child,
+                nid_builder,
+                local_segments=[counters.body_appdx_idx],
+                parent_ord=None,
             )
-        else:
-            continue
+        )
 
+
+def _build_parsed_law(
+    path: Path,
+    *,
+    title: str,
+    law_id: Optional[str],
+    law_number: Optional[str],
+    children: List[Node],
+) -> ParsedLaw:
     root_node = build_root(children)
     assign_document_order(root_node)
 
@@ -749,6 +919,101 @@ def parse_egov_xml(path: Path) -> ParsedLaw:
     )
 
 
+def parse_egov_xml(path: Path, *, streaming: bool = False) -> ParsedLaw:
+    if streaming:
+        return parse_egov_xml_streaming(path)
+    tree = etree.parse(str(path))
+    root = tree.getroot()
+    with tag_index_scope(root):
+        law_body = find_first(root, "LawBody")
+        if law_body is None:
+            law_body = root
+
+        title = find_text(law_body, "LawTitle") or ""
+        law_number = find_text(root, "LawNum") or find_text(law_body, "LawNum")
+        law_id = find_text(root, "LawId") or extract_law_id_from_filename(path.name)
+
+        nid_builder = NidBuilder()
+        counters = _LawBodyCounters()
+        children: List[Node] = []
+        for child in law_body:
+            _parse_law_body_child(child, nid_builder, counters, children)
+
+    return _build_parsed_law(
+        path,
+        title=title,
+        law_id=law_id,
+        law_number=law_number,
+        children=children,
+    )
+
+
+STREAMING_HEADER_TAGS = ("LawTitle", "LawNum", "LawId")
+
+
+def parse_egov_xml_streaming(path: Path) -> ParsedLaw:
+    """Parse with iterparse, converting and releasing one LawBody child at a time.
+
+    Produces the same ParsedLaw as the in-memory path; the lxml tree never holds
+    more than the LawBody child currently being converted.
+    """
+    nid_builder = NidBuilder()
+    counters = _LawBodyCounters()
+    children: List[Node] = []
+
+    root: Optional[etree._Element] = None
+    law_body: Optional[etree._Element] = None
+    law_body_open = False
+    # (tag, scope) -> first element in document order; scope "doc" or "body".
+    watched: Dict[Tuple[str, str], etree._Element] = {}
+    captured: Dict[Tuple[str, str], Optional[str]] = {}
+
+    for event, elem in etree.iterparse(str(path), events=("start", "end")):
+        tag = lname(elem)
+        if event == "start":
+            if root is None:
+                root = elem
+            if tag == "LawBody" and law_body is None:
+                law_body = elem
+                law_body_open = True
+            if tag in STREAMING_HEADER_TAGS:
+                watched.setdefault((tag, "doc"), elem)
+                if law_body_open:
+                    watched.setdefault((tag, "body"), elem)
+            continue
+
+        if tag in STREAMING_HEADER_TAGS:
+            for key, watched_elem in watched.items():
+                if watched_elem is elem and key not in captured:
+                    captured[key] = text_without_rt(elem).strip() or None
+        if elem is law_body:
+            law_body_open = False
+
+        parent = elem.getparent()
+        if parent is None:
+            continue
+        body = law_body if law_body is not None else root
+        if parent is not body:
+            continue
+        with tag_index_scope(elem):
+            _parse_law_body_child(elem, nid_builder, counters, children)
+        elem.clear()
+        while elem.getprevious() is not None:
+            del parent[0]
+
+    body_scope = "body" if law_body is not None else "doc"
+    title = captured.get(("LawTitle", body_scope)) or ""
+    law_number = captured.get(("LawNum", "doc")) or captured.get(("LawNum", body_scope))
+    law_id = captured.get(("LawId", "doc")) or extract_law_id_from_filename(path.name)
+    return _build_parsed_law(
+        path,
+        title=title,
+        law_id=law_id,
+        law_number=law_number,
+        children=children,
+    )
+
+
 def parse_main_provision(
     main: etree._Element, nid_builder: NidBuilder, parent_ord: Optional[int]
 ) -> List[Node]:
@@ -0,0 +1,204 @@
+"""Precomputed display contexts, the optional fifth bundle artifact.
+
+``{doc_id}.regdoc_contexts.json`` holds, for each purpose profile of the
+regdoc profile, every selectable node with its ordered context nids (as
+``context_display.resolve_context_nodes`` returns them) and its group key,
+the nid of the nearest ancestor of the ``grouping_policy`` kind.  Consumers
+read it with ``load_ir_contexts`` instead of walking the tree.
+
+Nodes are referenced by pre-order position in the ``nids`` table, the order of
+the sidecar and the offset index.  References are delta-encoded: selected
+positions against the previous selected node, the first context entry and the
+group against the selected node, and later context entries against the entry
+before them.  The header binds the file to the sha256 of the IR YAML and of
+the regdoc profile it was computed from.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .context_display import NodeIndex, resolve_context_batch
+from .digest import sha256_data, sha256_file
+from .ir_sidecar import YAML_SUFFIX
+from .models_ir import IRDocument
+from .serialize import ensure_writable
+
+CONTEXTS_SCHEMA = "qai.regdoc_contexts.v1"
+CONTEXTS_SUFFIX = ".regdoc_contexts.json"
+
+
+def contexts_path_for(ir_path: Path) -> Path:
+    name = ir_path.name
+    if name.endswith(YAML_SUFFIX):
+        name = name[: -len(YAML_SUFFIX)]
+    return ir_path.with_name(name + CONTEXTS_SUFFIX)
+
+
+def _group_kind(purpose_profile: Dict[str, Any], kind: str) -> Optional[str]:
+    policies = purpose_profile.get("grouping_policy")
+    if not isinstance(policies, list):
+        return None
+    for policy in policies:
+        if isinstance(policy, dict) and policy.get("when_kind") == kind:
+            group_kind = policy.get("group_under_kind")
+            return group_kind if isinstance(group_kind, str) and group_kind else None
+    return None
+
+
+def _group_position(index: NodeIndex, pos: int, group_kind: Optional[str]) -> Optional[int]:
+    if group_kind is None:
+        return None
+    pos = index.parents[pos]
+    while pos >= 0:
+        if index.nodes[pos].kind == group_kind:
+            return pos
+        pos = index.parents[pos]
+    return None
+
+
+def _deltas(positions: List[int], start: int) -> List[int]:
+    out: List[int] = []
+    prev = start
+    for pos in positions:
+        out.append(pos - prev)
+        prev = pos
+    return out
+
+
+def _undeltas(deltas: List[int], start: int) -> List[int]:
+    out: List[int] = []
+    pos = start
+    for delta in deltas:
+        pos += delta
+        out.append(pos)
+    return out
+
+
+def build_ir_contexts(
+    ir_doc: IRDocument,
+    regdoc_profile: Dict[str, Any],
+    *,
+    ir_sha256: Optional[str],
+) -> Dict[str, Any]:
+    """The contexts payload of ``ir_doc`` for every purpose profile of ``regdoc_profile``."""
+    index = NodeIndex(ir_doc.content)
+    positions = index.positions
+    profiles: Dict[str, Any] = {}
+    for name, purpose_profile in sorted((regdoc_profile.get("profiles") or {}).items()):
+        if not isinstance(purpose_profile, dict):
+            continue
+        selectable = set(purpose_profile.get("selectable_kinds") or [])
+        selected = [
+            pos for pos, node in enumerate(index.nodes) if node.kind in selectable and positions[node.nid] == pos
+        ]
+        contexts: List[List[int]] = []
+        groups: List[Optional[int]] = []
+        group_kinds: Dict[str, Optional[str]] = {}
+        batch = resolve_context_batch(
+            ir_doc.content, [index.nodes[pos].nid for pos in selected], purpose_profile, index=index
+        )
+        for pos, (_, context_nids) in zip(selected, batch):
+            contexts.append(_deltas([positions[nid] for nid in context_nids], pos))
+            kind = index.nodes[pos].kind
+            if kind not in group_kinds:
+                group_kinds[kind] = _group_kind(purpose_profile, kind)
+            group = _group_position(index, pos, group_kinds[kind])
+            groups.append(group - pos if group is not None else None)
+        profiles[name] = {"selected": _deltas(selected, 0), "contexts": contexts, "groups": groups}
+    return {
+        "schema": CONTEXTS_SCHEMA,
+        "doc_id": ir_doc.doc_id,
+        "ir_sha256": ir_sha256,
+        "regdoc_profile_sha256": sha256_data(regdoc_profile),
+        "node_count": len(index),
+        "nids": [node.nid for node in index.nodes],
+        "profiles": profiles,
+    }
+
+
+def write_ir_contexts(
+    path: Path,
+    ir_doc: IRDocument,
+    regdoc_profile: Dict[str, Any],
+    *,
+    ir_yaml_path: Optional[Path] = None,
+) -> None:
+    """Write the contexts of ``ir_doc``, bound to the YAML at ``ir_yaml_path`` by its sha256."""
+    ensure_writable(path)
+    ir_sha256 = sha256_file(ir_yaml_path) if ir_yaml_path is not None else None
+    payload = build_ir_contexts(ir_doc, regdoc_profile, ir_sha256=ir_sha256)
+    with path.open("w", encoding="utf-8", newline="\n") as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+
+
+class IRContexts:
+    """Decoded view of a contexts payload; each purpose profile is decoded on first use."""
+
+    def __init__(self, payload: Dict[str, Any]) -> None:
+        self.doc_id: str = payload["doc_id"]
+        self.ir_sha256: Optional[str] = payload.get("ir_sha256")
+        self.regdoc_profile_sha256: Optional[str] = payload.get("regdoc_profile_sha256")
+        self.nids: List[str] = payload["nids"]
+        self._encoded: Dict[str, Dict[str, Any]] = payload.get("profiles") or {}
+        self._decoded: Dict[str, Dict[str, Tuple[List[str], Optional[str]]]] = {}
+
+    @property
+    def purposes(self) -> List[str]:
+        return sorted(self._encoded)
+
+    def entries(self, purpose: str) -> Iterator[Tuple[int, List[int], Optional[int]]]:
+        """(selected position, context positions, group position) in pre-order."""
+        encoded = self._encoded[purpose]
+        selected = _undeltas(encoded["selected"], 0)
+        for pos, context, group in zip(selected, encoded["contexts"], encoded["groups"]):
+            yield pos, _undeltas(context, pos), (pos + group if group is not None else None)
+
+    def _profile(self, purpose: str) -> Dict[str, Tuple[List[str], Optional[str]]]:
+        decoded = self._decoded.get(purpose)
+        if decoded is None:
+            nids = self.nids
+            decoded = {
+                nids[pos]: ([nids[p] for p in context], nids[group] if group is not None else None)
+                for pos, context, group in self.entries(purpose)
+            }
+            self._decoded[purpose] = decoded
+        return decoded
+
+    def context_nids(self, purpose: str, nid: str) -> Optional[List[str]]:
+        """Context nids of selectable node ``nid``; ``None`` when it is not selectable."""
+        found = self._profile(purpose).get(nid)
+        return list(found[0]) if found is not None else None
+
+    def group_key(self, purpose: str, nid: str) -> Optional[str]:
+        found = self._profile(purpose).get(nid)
+        return found[1] if found is not None else None
+
+
+def load_ir_contexts(
+    path: Path,
+    *,
+    ir_yaml_path: Optional[Path] = None,
+    regdoc_profile: Optional[Dict[str, Any]] = None,
+) -> IRContexts:
+    """Load a contexts file computed from exactly the YAML at ``ir_yaml_path`` and ``regdoc_profile``.
+
+    Either check is skipped when its argument is omitted; a mismatch raises
+    ``ValueError`` ("Stale ...").
+    """
+    path = Path(path)
+    with path.open("r", encoding="utf-8") as f:
+        try:
+            payload = json.load(f)
+        except json.JSONDecodeError:
+            payload = None
+    if not isinstance(payload, dict) or payload.get("schema") != CONTEXTS_SCHEMA:
+        raise ValueError(f"Not a RegDoc contexts file: {path}")
+    if ir_yaml_path is not None and payload.get("ir_sha256") != sha256_file(Path(ir_yaml_path)):
+        raise ValueError(f"Stale RegDoc contexts file (IR changed): {path}")
+    if regdoc_profile is not None and payload.get("regdoc_profile_sha256") != sha256_data(regdoc_profile):
+        raise ValueError(f"Stale RegDoc contexts file (regdoc profile changed): {path}")
+    return IRContexts(payload)
+
@@ -0,0 +1,278 @@
+"""Offset index over the JSON Lines IR sidecar for random access by ``nid``.
+
+``{doc_id}.regdoc_ir.idx`` is a small binary file next to the sidecar:
+
+* header: magic, node/slot counts, sidecar size and the sha256 of the
+  sidecar's header line (cheap staleness check without hashing the body);
+* one fixed-width record per node in sidecar (pre-order) position: byte
+  offset/length of its line, parent position, end of its subtree and its nid;
+* an open-addressing hash table (crc32 of the nid) mapping nid -> position;
+* the UTF-8 nid blob.
+
+Because the sidecar is pre-order, a node's descendants are the contiguous
+positions ``[pos + 1, subtree_end)`` and therefore one contiguous byte range.
+``IRIndexReader`` mmaps both files and decodes only the lines it is asked for.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .ir_sidecar import SIDECAR_SCHEMA, SIDECAR_SUFFIX, YAML_SUFFIX
+from .models_ir import Node
+from .serialize import ensure_writable
+
+INDEX_SUFFIX = ".regdoc_ir.idx"
+INDEX_MAGIC = b"QAIRIDX1"
+
+# magic, node_count, slot_count, sidecar_size, sha256(sidecar header line)
+_HEADER = struct.Struct("<8sIIQ32s")
+# line_offset, line_length, parent (-1 for root), subtree_end, nid_offset, nid_length
+_RECORD = struct.Struct("<QIiIII")
+_SLOT = struct.Struct("<I")
+
+
+def index_path_for(path: Path) -> Path:
+    """Index path for an ``*.regdoc_ir.yaml`` or ``*.regdoc_ir.jsonl`` path."""
+    name = path.name
+    for suffix in (YAML_SUFFIX, SIDECAR_SUFFIX):
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+            break
+    return path.with_name(name + INDEX_SUFFIX)
+
+
+def _slot_count(node_count: int) -> int:
+    slots = 8
+    while slots < node_count * 2:
+        slots *= 2
+    return slots
+
+
+def build_offset_index(sidecar_path: Path) -> bytes:
+    """Scan a sidecar once and return the serialized offset index."""
+    offsets: List[int] = []
+    lengths: List[int] = []
+    parents: List[int] = []
+    nids: List[bytes] = []
+    with sidecar_path.open("rb") as f:
+        header_line = f.readline()
+        header = json.loads(header_line)
+        if not isinstance(header, dict) or header.get("schema") != SIDECAR_SCHEMA:
+            raise ValueError(f"Not a RegDoc IR sidecar: {sidecar_path}")
+        offset = len(header_line)
+        for line in f:
+            payload = json.loads(line)
+            offsets.append(offset)
+            lengths.append(len(line))
+            parent = payload.get("parent")
+            parents.append(-1 if parent is None else parent)
+            nids.append(payload["nid"].encode("utf-8"))
+            offset += len(line)
+    node_count = len(offsets)
+    if node_count != header.get("node_count") or not node_count:
+        raise ValueError(f"Truncated RegDoc IR sidecar: {sidecar_path}")
+
+    subtree_end = [pos + 1 for pos in range(node_count)]
+    for pos in range(node_count - 1, 0, -1):
+        parent = parents[pos]
+        if subtree_end[pos] > subtree_end[parent]:
+            subtree_end[parent] = subtree_end[pos]
+
+    slot_count = _slot_count(node_count)
+    mask = slot_count - 1
+    slots = [0] * slot_count
+    for pos, nid in enumerate(nids):
+        slot = zlib.crc32(nid) & mask
+        while slots[slot]:
+            if nids[slots[slot] - 1] == nid:
+                raise ValueError(f"Duplicate nid in sidecar: {nid.decode('utf-8')}")
+            slot = (slot + 1) & mask
+        slots[slot] = pos + 1
+
+    parts: List[bytes] = [
+        _HEADER.pack(INDEX_MAGIC, node_count, slot_count, offset, hashlib.sha256(header_line).digest())
+    ]
+    nid_offset = 0
+    for pos in range(node_count):
+        parts.append(
+            _RECORD.pack(
+                offsets[pos], lengths[pos], parents[pos], subtree_end[pos], nid_offset, len(nids[pos])
+            )
+        )
+        nid_offset += len(nids[pos])
+    parts.append(struct.pack(f"<{slot_count}I", *slots))
+    parts.extend(nids)
+    return b"".join(parts)
+
+
+def write_ir_index(path: Path, sidecar_path: Path) -> None:
+    """Write the offset index of the sidecar at ``sidecar_path``."""
+    ensure_writable(path)
+    data = build_offset_index(sidecar_path)
+    with path.open("wb") as f:
+        f.write(data)
+
+
+def _map(path: Path) -> mmap.mmap:
+    with path.open("rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class IRIndexReader:
+    """Random access to single nodes of a sidecar through its offset index.
+
+    Opening maps both files and checks that the index still describes the
+    sidecar; lookups hash the nid and decode only the requested lines.
+    """
+
+    def __init__(self, sidecar_path: Path, index_path: Optional[Path] = None) -> None:
+        sidecar_path = Path(sidecar_path)
+        self.sidecar_path = sidecar_path
+        self.index_path = Path(index_path) if index_path is not None else index_path_for(sidecar_path)
+        self._idx = _map(self.index_path)
+        try:
+            self._data = _map(sidecar_path)
+        except Exception:
+            self._idx.close()
+            raise
+        try:
+            self._check()
+        except Exception:
+            self.close()
+            raise
+
+    def _check(self) -> None:
+        magic, node_count, slot_count, sidecar_size, header_digest = _HEADER.unpack_from(self._idx, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"Not a RegDoc IR offset index: {self.index_path}")
+        header_end = self._data.find(b"\n") + 1
+        if (
+            len(self._data) != sidecar_size
+            or hashlib.sha256(self._data[:header_end]).digest() != header_digest
+        ):
+            raise ValueError(f"Stale RegDoc IR offset index: {self.index_path}")
+        self._node_count = node_count
+        self._mask = slot_count - 1
+        self._records_at = _HEADER.size
+        self._slots_at = self._records_at + node_count * _RECORD.size
+        self._nids_at = self._slots_at + slot_count * _SLOT.size
+        self._header: Optional[Dict[str, Any]] = None
+
+    def close(self) -> None:
+        self._idx.close()
+        self._data.close()
+
+    def __enter__(self) -> "IRIndexReader":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._node_count
+
+    def __contains__(self, nid: object) -> bool:
+        return isinstance(nid, str) and self.position(nid) is not None
+
+    @property
+    def header(self) -> Dict[str, Any]:
+        if self._header is None:
+            self._header = json.loads(self._data[: self._data.find(b"\n") + 1])
+        return self._header
+
+    def _record(self, pos: int) -> Tuple[int, int, int, int, int, int]:
+        return _RECORD.unpack_from(self._idx, self._records_at + pos * _RECORD.size)
+
+    def _nid_at(self, pos: int) -> str:
+        record = self._record(pos)
+        start = self._nids_at + record[4]
+        return self._idx[start : start + record[5]].decode("utf-8")
+
+    def position(self, nid: str) -> Optional[int]:
+        """Pre-order position of ``nid`` or ``None`` when absent."""
+        key = nid.encode("utf-8")
+        slot = zlib.crc32(key) & self._mask
+        while True:
+            (entry,) = _SLOT.unpack_from(self._idx, self._slots_at + slot * _SLOT.size)
+            if not entry:
+                return None
+            record = self._record(entry - 1)
+            start = self._nids_at + record[4]
+            if record[5] == len(key) and self._idx[start : start + record[5]] == key:
+                return entry - 1
+            slot = (slot + 1) & self._mask
+
+    def _require(self, nid: str) -> int:
+        pos = self.position(nid)
+        if pos is None:
+            raise KeyError(nid)
+        return pos
+
+    def byte_range(self, nid: str) -> Tuple[int, int]:
+        """Byte range of the node's own line in the sidecar."""
+        offset, length = self._record(self._require(nid))[:2]
+        return offset, offset + length
+
+    def subtree_range(self, nid: str) -> Tuple[int, int]:
+        """Byte range covering the node and all of its descendants."""
+        pos = self._require(nid)
+        offset, _, _, end = self._record(pos)[:4]
+        stop = self._record(end)[0] if end < self._node_count else len(self._data)
+        return offset, stop
+
+    def parent(self, nid: str) -> Optional[str]:
+        parent = self._record(self._require(nid))[2]
+        return None if parent < 0 else self._nid_at(parent)
+
+    def children(self, nid: str) -> List[str]:
+        """Direct child nids in document order."""
+        pos = self._require(nid)
+        end = self._record(pos)[3]
+        out: List[str] = []
+        child = pos + 1
+        while child < end:
+            out.append(self._nid_at(child))
+            child = self._record(child)[3]
+        return out
+
+    def _load_node(self, pos: int) -> Node:
+        offset, length = self._record(pos)[:2]
+        payload = json.loads(self._data[offset : offset + length])
+        payload.pop("parent")
+        return Node(**payload)
+
+    def node(self, nid: str) -> Node:
+        """The node alone (``children`` left empty)."""
+        return self._load_node(self._require(nid))
+
+    def with_ancestors(self, nid: str) -> List[Node]:
+        """The node and its ancestors, root first, each without children."""
+        pos: int = self._require(nid)
+        chain: List[Node] = []
+        while pos >= 0:
+            chain.append(self._load_node(pos))
+            pos = self._record(pos)[2]
+        chain.reverse()
+        return chain
+
+    def subtree(self, nid: str) -> Node:
+        """The node with its full subtree, decoding only that byte range."""
+        pos = self._require(nid)
+        start, stop = self.subtree_range(nid)
+        nodes: List[Node] = []
+        loads = json.loads
+        for line in self._data[start:stop].split(b"\n")[:-1]:
+            payload = loads(line)
+            parent = payload.pop("parent")
+            node = Node(**payload)
+            if nodes:
+                nodes[parent - pos].children.append(node)
+            nodes.append(node)
+        return nodes[0]
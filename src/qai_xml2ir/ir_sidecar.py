@@ -0,0 +1,139 @@
+"""JSON Lines sidecar for RegDoc IR and the ``load_ir`` fast loader.
+
+The YAML IR stays canonical; the sidecar is a derived copy for consumers that
+reload IR often.  Line 1 is a header carrying the document fields and the
+sha256 of the YAML it was derived from; every following line is one node in
+pre-order with the position of its parent node (``null`` for the root).
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .digest import sha256_file
+from .models_ir import IRDocument, Node
+from .serialize import ensure_writable
+from .yaml_io import load_yaml
+
+SIDECAR_SCHEMA = "qai.regdoc_ir_jsonl.v1"
+SIDECAR_SUFFIX = ".regdoc_ir.jsonl"
+# "index" also writes the offset index of ``ir_offsets`` next to the sidecar.
+SIDECAR_FORMATS = ("jsonl", "index")
+YAML_SUFFIX = ".regdoc_ir.yaml"
+
+_NODE_FIELDS = (
+    "nid",
+    "kind",
+    "kind_raw",
+    "num",
+    "ord",
+    "heading",
+    "text",
+    "role",
+    "normativity",
+    "tags",
+    "refs",
+    "source_spans",
+)
+
+
+def sidecar_path_for(ir_path: Path) -> Path:
+    name = ir_path.name
+    if name.endswith(YAML_SUFFIX):
+        name = name[: -len(YAML_SUFFIX)]
+    return ir_path.with_name(name + SIDECAR_SUFFIX)
+
+
+def _dumps(payload: Any) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def iter_sidecar_lines(ir_doc: IRDocument, *, ir_sha256: Optional[str]) -> Iterator[str]:
+    nodes: List[Node] = []
+    parents: List[Optional[int]] = []
+    stack: List[tuple] = [(ir_doc.content, None)]
+    while stack:
+        node, parent = stack.pop()
+        nodes.append(node)
+        parents.append(parent)
+        position = len(nodes) - 1
+        stack.extend((child, position) for child in reversed(node.children))
+
+    yield _dumps(
+        {
+            "schema": SIDECAR_SCHEMA,
+            "ir_schema": ir_doc.schema,
+            "doc_id": ir_doc.doc_id,
+            "ir_sha256": ir_sha256,
+            "node_count": len(nodes),
+            "index": ir_doc.index,
+        }
+    ) + "\n"
+    for node, parent in zip(nodes, parents):
+        payload: Dict[str, Any] = {name: getattr(node, name) for name in _NODE_FIELDS}
+        if node.data:
+            payload["data"] = node.data
+        payload["parent"] = parent
+        yield _dumps(payload) + "\n"
+
+
+def write_ir_jsonl(path: Path, ir_doc: IRDocument, *, ir_yaml_path: Optional[Path] = None) -> None:
+    """Write the sidecar of ``ir_doc``, bound to the YAML at ``ir_yaml_path`` by its sha256."""
+    ensure_writable(path)
+    ir_sha256 = sha256_file(ir_yaml_path) if ir_yaml_path is not None else None
+    with path.open("w", encoding="utf-8", newline="\n") as f:
+        f.writelines(iter_sidecar_lines(ir_doc, ir_sha256=ir_sha256))
+
+
+def load_ir(path: Path, *, prefer_sidecar: bool = True) -> IRDocument:
+    """Load an IR document from ``*.regdoc_ir.yaml`` or its ``*.regdoc_ir.jsonl`` sidecar.
+
+    Given the YAML path, a sibling sidecar is used when ``prefer_sidecar`` is set
+    and it was derived from exactly that YAML (sha256 match); otherwise the YAML
+    is parsed.
+    """
+    path = Path(path)
+    if path.name.endswith(SIDECAR_SUFFIX):
+        return _load_sidecar(path)
+    if prefer_sidecar:
+        sidecar = sidecar_path_for(path)
+        if sidecar.exists():
+            header = _read_header(sidecar)
+            if header.get("ir_sha256") == sha256_file(path):
+                return _load_sidecar(sidecar)
+    with path.open("r", encoding="utf-8") as f:
+        return IRDocument.from_dict(load_yaml(f))
+
+
+def _read_header(path: Path) -> Dict[str, Any]:
+    with path.open("r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+    if not isinstance(header, dict) or header.get("schema") != SIDECAR_SCHEMA:
+        raise ValueError(f"Not a RegDoc IR sidecar: {path}")
+    return header
+
+
+def _load_sidecar(path: Path) -> IRDocument:
+    loads = json.loads
+    with path.open("r", encoding="utf-8") as f:
+        header = loads(f.readline())
+        if not isinstance(header, dict) or header.get("schema") != SIDECAR_SCHEMA:
+            raise ValueError(f"Not a RegDoc IR sidecar: {path}")
+        nodes: List[Node] = []
+        for line in f:
+            payload = loads(line)
+            parent = payload.pop("parent")
+            node = Node(**payload)
+            nodes.append(node)
+            if parent is not None:
+                nodes[parent].children.append(node)
+    if len(nodes) != header.get("node_count") or not nodes:
+        raise ValueError(f"Truncated RegDoc IR sidecar: {path}")
+    return IRDocument(
+        doc_id=header["doc_id"],
+        content=nodes[0],
+        index=header.get("index") or {},
+        schema=header.get("ir_schema", "qai.regdoc_ir.v4"),
+    )
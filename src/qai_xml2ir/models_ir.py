@@ -43,6 +43,25 @@ class Node:
             payload["data"] = self.data
         return payload
 
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "Node":
+        return cls(
+            nid=payload["nid"],
+            kind=payload["kind"],
+            kind_raw=payload.get("kind_raw"),
+            num=payload.get("num"),
+            ord=payload.get("ord"),
+            heading=payload.get("heading"),
+            text=payload.get("text"),
+            role=payload["role"],
+            normativity=payload.get("normativity"),
+            tags=list(payload.get("tags") or []),
+            refs=payload.get("refs") or {"internal": [], "external": []},
+            source_spans=list(payload.get("source_spans") or []),
+            data=payload.get("data") or {},
+            children=[cls.from_dict(c) for c in payload.get("children") or []],
+        )
+
 
 @dataclass
 class IRDocument:
@@ -59,6 +78,15 @@ class IRDocument:
             "index": self.index,
         }
 
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "IRDocument":
+        return cls(
+            doc_id=payload["doc_id"],
+            content=Node.from_dict(payload["content"]),
+            index=payload.get("index") or {},
+            schema=payload.get("schema", "qai.regdoc_ir.v4"),
+        )
+
 
 def build_root(children: List[Node]) -> Node:
     return Node(
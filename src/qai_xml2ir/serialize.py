@@ -1,20 +1,21 @@
 from __future__ import annotations
 
-import hashlib
+import io
+import os
+import re
+import shutil
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Set
 
 import yaml
+from yaml.events import ScalarEvent
+from yaml.nodes import ScalarNode
 
-_OVERWRITE_APPROVED: Optional[bool] = None
-
+from .digest import sha256_file  # noqa: F401 - re-exported
+from .models_ir import IRDocument, Node
+from .yaml_io import dump_yaml
 
-def sha256_file(path: Path) -> str:
-    h = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
-    return h.hexdigest()
+_OVERWRITE_APPROVED: Optional[bool] = None
 
 
 def _can_write(path: Path) -> bool:
@@ -30,18 +31,256 @@ def _can_write(path: Path) -> bool:
     return _OVERWRITE_APPROVED
 
 
-def write_yaml(path: Path, data: Dict[str, Any]) -> None:
+_NODE_SCALAR_FIELDS = ("nid", "kind", "kind_raw", "num", "ord", "heading", "text", "role", "normativity")
+
+
+def ensure_writable(path: Path) -> None:
+    """Check the overwrite rule for ``path`` and remove an existing file there.
+
+    Writers then create a fresh file instead of truncating the old one, which
+    may be a hard link into the bundle cache (``--cache-hardlink``).
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
     if not _can_write(path):
         raise FileExistsError(
             f"Refusing to overwrite existing file: {path} (type exact 'Yes' once to allow overwrite)"
         )
+    if path.exists():
+        path.unlink()
+
+
+def write_yaml(path: Path, data: Dict[str, Any]) -> None:
+    ensure_writable(path)
     with path.open("w", encoding="utf-8", newline="\n") as f:
-        yaml.dump(
-            data,
-            f,
-            Dumper=yaml.SafeDumper,
+        dump_yaml(data, f)
+
+
+def place_file(src: Path, dst: Path, *, hardlink: bool = False) -> None:
+    """Copy (or hard-link) ``src`` to ``dst`` under the same overwrite rule as write_yaml."""
+    ensure_writable(dst)
+    if hardlink:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
+
+
+def write_ir_yaml(path: Path, ir_doc: IRDocument) -> None:
+    """Write ``ir_doc`` exactly as ``write_yaml(path, ir_doc.to_dict())`` would.
+
+    The Node tree is written block by block straight to the file; only scalars
+    go through the PyYAML emitter, so no nested dict copy, representation graph
+    or event stream of the whole document is ever built.  This holds with or
+    without libyaml: ``CSafeDumper`` would need the dict copy, which costs far
+    more memory (about 22 MB against 1.5 MB peak on the largest JP law).
+    """
+    ensure_writable(path)
+    with path.open("w", encoding="utf-8", newline="\n") as f:
+        if not _has_shared_containers(ir_doc):
+            try:
+                _IRBlockWriter(f.write).document(ir_doc)
+                return
+            except Exception:  # noqa: BLE001 - _UnsupportedValue, or PyYAML emitter internals that changed
+                f.seek(0)
+                f.truncate()
+        # Aliased containers, values outside plain block style and emitter changes need the full dumper.
+        dump_yaml(ir_doc.to_dict(), f)
+
+
+def _has_shared_containers(ir_doc: IRDocument) -> bool:
+    seen: Set[int] = set()
+
+    def visit(value: Any) -> bool:
+        if isinstance(value, (dict, list)):
+            if id(value) in seen:
+                return True
+            seen.add(id(value))
+            items = value.values() if isinstance(value, dict) else value
+            return any(visit(v) for v in items if isinstance(v, (dict, list)))
+        return False
+
+    if visit(ir_doc.index):
+        return True
+    stack = [ir_doc.content]
+    while stack:
+        node = stack.pop()
+        # tags, source_spans and children are copied by to_dict(); only their items can be shared.
+        if visit(node.refs) or (node.data and visit(node.data)):
+            return True
+        if any(visit(span) for span in node.source_spans):
+            return True
+        stack.extend(node.children)
+    return False
+
+
+class _UnsupportedValue(Exception):
+    pass
+
+
+_LINE_BREAK_RUN = re.compile("([\n\x85\u2028\u2029])(?=[^\n\x85\u2028\u2029])")
+_SCALAR_CACHE_MAX_LEN = 64
+
+
+class _ScalarRenderer:
+    """Renders one scalar exactly as the SafeDumper emitter does in block context.
+
+    Output is rendered at continuation indent 2 (a top-level mapping value or
+    sequence item); ``value`` shifts continuation lines for deeper positions.
+    """
+
+    def __init__(self) -> None:
+        self.buffer = io.StringIO()
+        self.dumper = yaml.SafeDumper(
+            self.buffer,
+            default_flow_style=False,
             allow_unicode=True,
             sort_keys=False,
             width=float("inf"),
         )
+        # Normally set up by the document start event.
+        self.dumper.tag_prefixes = dict(self.dumper.DEFAULT_TAG_PREFIXES)
+        self.keys: Dict[Any, str] = {}
+        self.values: Dict[Any, str] = {}
+
+    def key(self, data: Any) -> str:
+        cache_key = (type(data), data)
+        text = self.keys.get(cache_key)
+        if text is None:
+            text = self._render(data, simple_key=True)
+            self.keys[cache_key] = text
+        return text
+
+    def value(self, data: Any, shift: int) -> str:
+        cache_key = (type(data), data)
+        text = self.values.get(cache_key)
+        if text is None:
+            text = self._render(data, simple_key=False)
+            if type(data) is not str or len(data) <= _SCALAR_CACHE_MAX_LEN:
+                self.values[cache_key] = text
+        if shift and "'" in text[:1] and len(text) > 2:
+            text = _LINE_BREAK_RUN.sub(lambda m: m.group(1) + " " * shift, text)
+        return text
+
+    def _render(self, data: Any, *, simple_key: bool) -> str:
+        dumper = self.dumper
+        rep = dumper.represent_data(data)
+        dumper.represented_objects.clear()
+        if not isinstance(rep, ScalarNode):
+            raise _UnsupportedValue(type(data).__name__)
+        implicit = (
+            rep.tag == dumper.resolve(ScalarNode, rep.value, (True, False)),
+            rep.tag == dumper.resolve(ScalarNode, rep.value, (False, True)),
+        )
+        dumper.event = ScalarEvent(None, rep.tag, implicit, rep.value, style=rep.style)
+        dumper.analysis = None
+        dumper.style = None
+        dumper.prepared_tag = None
+        if simple_key and not dumper.check_simple_key():
+            raise _UnsupportedValue("complex mapping key")
+        dumper.simple_key_context = simple_key
+        dumper.flow_level = 0
+        dumper.indent = 2
+        dumper.column = 0
+        dumper.whitespace = True
+        dumper.indention = False
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        dumper.process_tag()
+        dumper.process_scalar()
+        dumper.prepared_tag = None
+        return self.buffer.getvalue()
+
+
+class _IRBlockWriter:
+    """Writes ``IRDocument.to_dict()`` in SafeDumper block layout without building it."""
+
+    def __init__(self, write: Callable[[str], Any]) -> None:
+        self.write = write
+        self.scalars = _ScalarRenderer()
+
+    def document(self, ir_doc: IRDocument) -> None:
+        key = self.scalars.key
+        self.write(f"{key('schema')}:")
+        self.after_key(ir_doc.schema, 0)
+        self.write(f"{key('doc_id')}:")
+        self.after_key(ir_doc.doc_id, 0)
+        self.write(f"{key('content')}:\n")
+        self.node(ir_doc.content, 2, inline=False)
+        self.write(f"{key('index')}:")
+        self.after_key(ir_doc.index, 0)
+
+    def node(self, node: Node, indent: int, *, inline: bool) -> None:
+        write = self.write
+        key = self.scalars.key
+        after_key = self.after_key
+        pad = " " * indent
+        first = True
+        for name in _NODE_SCALAR_FIELDS:
+            write(f"{'' if first and inline else pad}{key(name)}:")
+            after_key(getattr(node, name), indent)
+            first = False
+        write(f"{pad}{key('tags')}:")
+        after_key(node.tags, indent)
+        write(f"{pad}{key('refs')}:")
+        after_key(node.refs, indent)
+        write(f"{pad}{key('source_spans')}:")
+        after_key(node.source_spans, indent)
+        write(f"{pad}{key('children')}:")
+        if node.children:
+            write("\n")
+            for child in node.children:
+                write(f"{pad}- ")
+                self.node(child, indent + 2, inline=True)
+        else:
+            write(" []\n")
+        if node.data:
+            write(f"{pad}{key('data')}:")
+            after_key(node.data, indent)
+
+    def after_key(self, data: Any, indent: int) -> None:
+        # ``indent`` is the column of the key just written.
+        kind = type(data)
+        if kind is dict:
+            if data:
+                self.write("\n")
+                self.mapping(data, indent + 2, inline=False)
+            else:
+                self.write(" {}\n")
+        elif kind is list:
+            if data:
+                self.write("\n")
+                self.sequence(data, indent, inline=False)
+            else:
+                self.write(" []\n")
+        else:
+            self.write(f" {self.scalars.value(data, indent)}\n")
+
+    def mapping(self, data: Dict[Any, Any], indent: int, *, inline: bool) -> None:
+        pad = " " * indent
+        first = True
+        for key, value in data.items():
+            self.write(f"{'' if first and inline else pad}{self.scalars.key(key)}:")
+            self.after_key(value, indent)
+            first = False
+
+    def sequence(self, data: List[Any], indent: int, *, inline: bool) -> None:
+        pad = " " * indent
+        first = True
+        for item in data:
+            self.write(f"{'' if first and inline else pad}-")
+            first = False
+            kind = type(item)
+            if kind is dict and item:
+                self.write(" ")
+                self.mapping(item, indent + 2, inline=True)
+            elif kind is list and item:
+                self.write(" ")
+                self.sequence(item, indent + 2, inline=True)
+            elif kind is dict:
+                self.write(" {}\n")
+            elif kind is list:
+                self.write(" []\n")
+            else:
+                self.write(f" {self.scalars.value(item, indent)}\n")
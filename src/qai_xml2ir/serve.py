@@ -0,0 +1,407 @@
+"""Local lookup server over RegDoc bundles (``regdoc-serve``).
+
+Every bundle found under the roots (by its ``{doc_id}.meta.yaml``, so both
+xml2ir and text2ir outputs, with the other files named after it) is loaded
+once and kept in memory with a ``NodeIndex``.  The server answers JSON over
+HTTP/1.1 on localhost:
+
+* ``GET /docs`` and ``GET /docs/{doc_id}``
+* ``GET /docs/{doc_id}/display_names`` (the IR's ``display_name_by_nid``)
+* ``GET /docs/{doc_id}/nodes/{nid}``, ``.../ancestors`` and
+  ``.../context?purpose=...`` (``purpose`` may be omitted when the bundle has
+  one).  Contexts come from the bundle's ``{doc_id}.regdoc_contexts.json``
+  when it is present and current; other nodes, or bundles without it, are
+  resolved through a shared ``ContextCache``.
+* ``GET /stats`` and ``POST /reload``
+
+Nodes are returned without their subtree: the sidecar fields plus
+``display_name``, ``parent`` and the ``children`` nids.  The roots are
+rescanned every ``--poll-interval`` seconds; a bundle whose meta file sha256
+changed is reloaded off the event loop and swapped in, and its cache entries
+are invalidated.  A bundle that fails to load keeps serving its previous
+version.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import typer
+
+from .context_display import CONTEXT_CACHE_SIZE, ContextCache, NodeIndex, purpose_profile_digest
+from .digest import sha256_file
+from .ir_contexts import IRContexts, contexts_path_for, load_ir_contexts
+from .ir_sidecar import _NODE_FIELDS, YAML_SUFFIX, load_ir
+from .models_ir import IRDocument, Node
+from .yaml_io import load_yaml
+
+META_SUFFIX = ".meta.yaml"
+REGDOC_PROFILE_SUFFIX = ".regdoc_profile.yaml"
+DEFAULT_ROOTS = (Path("data/normalized"),)
+
+logger = logging.getLogger(__name__)
+app = typer.Typer(add_completion=False)
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+@dataclass
+class LoadedBundle:
+    doc_id: str
+    meta_path: Path
+    meta_sha256: str
+    ir_sha256: str
+    ir_doc: IRDocument
+    index: NodeIndex
+    purpose_profiles: Dict[str, Dict[str, Any]]
+    profile_digests: Dict[str, str]
+    display_names: Dict[str, str]
+    loaded_at: float
+    contexts: Optional[IRContexts] = None
+    _node_json: Dict[int, str] = field(default_factory=dict, repr=False)
+
+    def node_json(self, node: Node) -> str:
+        """JSON of ``node`` without its subtree, encoded once per node."""
+        encoded = self._node_json.get(id(node))
+        if encoded is None:
+            pos = self.index.positions.get(node.nid)
+            parent = self.index.parents[pos] if pos is not None and self.index.nodes[pos] is node else -1
+            payload: Dict[str, Any] = {name: getattr(node, name) for name in _NODE_FIELDS}
+            if node.data:
+                payload["data"] = node.data
+            payload["display_name"] = self.display_names.get(node.nid)
+            payload["parent"] = self.index.nodes[parent].nid if parent >= 0 else None
+            payload["children"] = [child.nid for child in node.children]
+            encoded = self._node_json[id(node)] = _dumps(payload)
+        return encoded
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "doc_id": self.doc_id,
+            "meta_path": str(self.meta_path),
+            "meta_sha256": self.meta_sha256,
+            "ir_sha256": self.ir_sha256,
+            "node_count": len(self.index),
+            "purposes": sorted(self.purpose_profiles),
+            "contexts": self.contexts is not None,
+        }
+
+
+def _dumps(payload: Any) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_bundle(meta_path: Path) -> LoadedBundle:
+    """Load the bundle of ``meta_path`` from the files named after it (IR through ``load_ir``).
+
+    The meta file itself is only hashed: it is the bundle's change signal,
+    and is not parsed since older bundles carry unquoted ``%VAR%`` paths.
+    """
+    # Hashed before the other files are read: a bundle rewritten mid-load changes it and is reloaded again.
+    meta_sha256 = sha256_file(meta_path)
+    stem = meta_path.name[: -len(META_SUFFIX)] if meta_path.name.endswith(META_SUFFIX) else meta_path.stem
+    ir_path = meta_path.with_name(stem + YAML_SUFFIX)
+    regdoc_profile: Dict[str, Any] = {}
+    regdoc_profile_path = meta_path.with_name(stem + REGDOC_PROFILE_SUFFIX)
+    if regdoc_profile_path.exists():
+        with regdoc_profile_path.open("r", encoding="utf-8") as f:
+            regdoc_profile = load_yaml(f) or {}
+    ir_sha256 = sha256_file(ir_path)
+    ir_doc = load_ir(ir_path)
+    contexts: Optional[IRContexts] = None
+    contexts_path = contexts_path_for(ir_path)
+    if contexts_path.exists():
+        try:
+            contexts = load_ir_contexts(contexts_path, ir_yaml_path=ir_path, regdoc_profile=regdoc_profile)
+        except ValueError as exc:
+            logger.warning("ignoring %s", exc)
+    purpose_profiles = {
+        str(name): profile
+        for name, profile in (regdoc_profile.get("profiles") or {}).items()
+        if isinstance(profile, dict)
+    }
+    return LoadedBundle(
+        doc_id=ir_doc.doc_id,
+        meta_path=meta_path,
+        meta_sha256=meta_sha256,
+        ir_sha256=ir_sha256,
+        ir_doc=ir_doc,
+        index=NodeIndex(ir_doc.content),
+        purpose_profiles=purpose_profiles,
+        profile_digests={name: purpose_profile_digest(profile) for name, profile in purpose_profiles.items()},
+        display_names=dict(ir_doc.index.get("display_name_by_nid") or {}),
+        loaded_at=time.time(),
+        contexts=contexts,
+    )
+
+
+@dataclass
+class StoreScan:
+    """Result of ``BundleStore.scan``: what to serve next, and what changed."""
+
+    bundles: Dict[str, LoadedBundle]
+    loaded: List[str] = field(default_factory=list)
+    reloaded: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    # meta path -> sha256 that failed to load, including earlier failures still unchanged on disk
+    failed_shas: Dict[Path, str] = field(default_factory=dict)
+
+
+class BundleStore:
+    """The bundles under ``roots``, keyed by doc_id, with one ``ContextCache`` shared across them.
+
+    ``scan`` does all disk work and may run in a worker thread; ``apply``
+    swaps the result in and must run where requests are served.  A doc_id
+    found under several meta files is served from the first one in root
+    order.
+    """
+
+    def __init__(self, roots: Sequence[Path], *, cache: Optional[ContextCache] = None) -> None:
+        self.roots = [Path(root) for root in roots]
+        self.cache = cache if cache is not None else ContextCache()
+        self.bundles: Dict[str, LoadedBundle] = {}
+        # meta path -> sha256 that failed to load, so it is not retried until the file changes again
+        self._failed: Dict[Path, str] = {}
+
+    def meta_paths(self) -> List[Path]:
+        out: List[Path] = []
+        for root in self.roots:
+            if root.is_file():
+                out.append(root)
+            elif root.is_dir():
+                out.extend(sorted(root.rglob("*" + META_SUFFIX)))
+        return out
+
+    def scan(self) -> StoreScan:
+        current = {bundle.meta_path: bundle for bundle in self.bundles.values()}
+        result = StoreScan(bundles={})
+        for meta_path in self.meta_paths():
+            try:
+                meta_sha256 = sha256_file(meta_path)
+            except OSError as exc:
+                result.failed[str(meta_path)] = f"{type(exc).__name__}: {exc}"
+                continue
+            bundle = current.get(meta_path)
+            if bundle is None or bundle.meta_sha256 != meta_sha256:
+                if self._failed.get(meta_path) == meta_sha256:
+                    result.failed_shas[meta_path] = meta_sha256
+                else:
+                    try:
+                        loaded = load_bundle(meta_path)
+                    except Exception as exc:  # noqa: BLE001 - keep serving the other bundles
+                        result.failed[str(meta_path)] = f"{type(exc).__name__}: {exc}"
+                        result.failed_shas[meta_path] = meta_sha256
+                    else:
+                        (result.loaded if bundle is None else result.reloaded).append(loaded.doc_id)
+                        bundle = loaded
+            if bundle is None:
+                continue
+            if bundle.doc_id in result.bundles:
+                served_from = result.bundles[bundle.doc_id].meta_path
+                logger.warning("duplicate doc_id %s in %s; serving %s", bundle.doc_id, meta_path, served_from)
+                continue
+            result.bundles[bundle.doc_id] = bundle
+        served = {bundle.meta_path for bundle in result.bundles.values()}
+        result.dropped = sorted(b.doc_id for b in self.bundles.values() if b.meta_path not in served)
+        return result
+
+    def apply(self, result: StoreScan) -> Dict[str, Any]:
+        previous = self.bundles
+        self.bundles = result.bundles
+        self._failed = result.failed_shas
+        for bundle in previous.values():
+            if self.bundles.get(bundle.doc_id) is not bundle:
+                self.cache.invalidate(bundle.ir_sha256)
+        return {
+            "loaded": result.loaded,
+            "reloaded": result.reloaded,
+            "dropped": result.dropped,
+            "failed": result.failed,
+        }
+
+    def refresh(self) -> Dict[str, Any]:
+        return self.apply(self.scan())
+
+
+def _error(status: int, message: str) -> Tuple[int, str]:
+    return status, _dumps({"error": message})
+
+
+class LookupHandler:
+    """Maps one request to ``(status, JSON body)``; no I/O, so it can be timed and tested without sockets."""
+
+    def __init__(self, store: BundleStore) -> None:
+        self.store = store
+
+    def __call__(self, method: str, target: str) -> Tuple[int, str]:
+        split = urlsplit(target)
+        parts = [unquote(part) for part in split.path.split("/") if part]
+        if method == "POST":
+            if parts == ["reload"]:
+                return 200, _dumps(self.store.refresh())
+            return _error(405, f"POST not allowed on {split.path}")
+        if method not in {"GET", "HEAD"}:
+            return _error(405, f"Method not allowed: {method}")
+        if parts == ["docs"]:
+            return 200, _dumps([self.store.bundles[doc_id].summary() for doc_id in sorted(self.store.bundles)])
+        if parts == ["stats"]:
+            return 200, _dumps({"bundles": len(self.store.bundles), "context_cache": self.store.cache.stats()})
+        if len(parts) < 2 or parts[0] != "docs":
+            return _error(404, f"No route: {split.path}")
+        bundle = self.store.bundles.get(parts[1])
+        if bundle is None:
+            return _error(404, f"Unknown doc_id: {parts[1]}")
+        rest = parts[2:]
+        if not rest:
+            return 200, _dumps(bundle.summary())
+        if rest == ["display_names"]:
+            return 200, _dumps(bundle.display_names)
+        if rest[0] != "nodes" or len(rest) not in {2, 3}:
+            return _error(404, f"No route: {split.path}")
+        nid = rest[1]
+        node = bundle.index.get(nid)
+        if node is None:
+            return _error(404, f"Unknown nid in {bundle.doc_id}: {nid}")
+        if len(rest) == 2:
+            return 200, bundle.node_json(node)
+        if rest[2] == "ancestors":
+            return 200, "[" + ",".join(bundle.node_json(anc) for anc in bundle.index.ancestors(nid)) + "]"
+        if rest[2] == "context":
+            return self._context(bundle, nid, parse_qs(split.query).get("purpose"))
+        return _error(404, f"No route: {split.path}")
+
+    def _context(self, bundle: LoadedBundle, nid: str, purpose_values: Optional[List[str]]) -> Tuple[int, str]:
+        if purpose_values:
+            purpose = purpose_values[-1]
+        elif len(bundle.purpose_profiles) == 1:
+            purpose = next(iter(bundle.purpose_profiles))
+        else:
+            return _error(400, f"purpose is required; one of {sorted(bundle.purpose_profiles)}")
+        purpose_profile = bundle.purpose_profiles.get(purpose)
+        if purpose_profile is None:
+            return _error(404, f"Unknown purpose for {bundle.doc_id}: {purpose}")
+        context_nids = None
+        if bundle.contexts is not None and purpose in bundle.contexts.purposes:
+            context_nids = bundle.contexts.context_nids(purpose, nid)
+        if context_nids is not None:
+            nodes = [bundle.index.nodes[bundle.index.positions[context_nid]] for context_nid in context_nids]
+        else:
+            nodes = self.store.cache.resolve(
+                bundle.ir_doc.content,
+                nid,
+                purpose_profile,
+                ir_digest=bundle.ir_sha256,
+                profile_digest=bundle.profile_digests[purpose],
+            )
+        head = _dumps({"doc_id": bundle.doc_id, "nid": nid, "purpose": purpose})
+        return 200, head[:-1] + ',"nodes":[' + ",".join(bundle.node_json(node) for node in nodes) + "]}"
+
+
+class LookupServer:
+    def __init__(self, store: BundleStore, *, poll_interval: float = 2.0) -> None:
+        self.store = store
+        self.handler = LookupHandler(store)
+        self.poll_interval = poll_interval
+        self._refresh_lock = asyncio.Lock()
+        self._poll_task: Optional["asyncio.Task[None]"] = None
+
+    async def refresh(self) -> Dict[str, Any]:
+        async with self._refresh_lock:
+            summary = self.store.apply(await asyncio.to_thread(self.store.scan))
+        for key in ("loaded", "reloaded", "dropped"):
+            for doc_id in summary[key]:
+                logger.info("%s %s", key, doc_id)
+        for path, error in summary["failed"].items():
+            logger.warning("failed %s: %s", path, error)
+        return summary
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh()
+            except Exception:  # noqa: BLE001 - a failed scan must not stop the server
+                logger.exception("refresh failed")
+
+    async def _respond(self, method: str, target: str) -> Tuple[int, str]:
+        if method == "POST" and urlsplit(target).path.strip("/") == "reload":
+            return 200, _dumps(await self.refresh())
+        return self.handler(method, target)
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                fields = request_line.decode("latin-1").split()
+                if len(fields) != 3:
+                    break
+                method, target, version = fields
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length:
+                    await reader.readexactly(length)
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                status, body = await self._respond(method, target)
+                payload = body.encode("utf-8")
+                head = (
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                    "Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                ).encode("latin-1")
+                writer.write(head if method == "HEAD" else head + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str, port: int) -> asyncio.AbstractServer:
+        """Load the bundles, start polling (if ``poll_interval`` > 0) and listen."""
+        await self.refresh()
+        if self.poll_interval > 0:
+            self._poll_task = asyncio.get_running_loop().create_task(self._poll())
+        return await asyncio.start_server(self._client, host, port)
+
+
+async def _serve(store: BundleStore, host: str, port: int, poll_interval: float) -> None:
+    server = await LookupServer(store, poll_interval=poll_interval).start(host, port)
+    address = server.sockets[0].getsockname()
+    typer.echo(f"[serve] {len(store.bundles)} bundles on http://{address[0]}:{address[1]}", err=True)
+    async with server:
+        await server.serve_forever()
+
+
+@app.command()
+def serve(
+    roots: Optional[List[Path]] = typer.Option(None, "--root"),
+    host: str = typer.Option("127.0.0.1", "--host"),
+    port: int = typer.Option(8765, "--port"),
+    poll_interval: float = typer.Option(2.0, "--poll-interval"),
+    cache_size: int = typer.Option(CONTEXT_CACHE_SIZE, "--cache-size"),
+) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    store = BundleStore(roots or list(DEFAULT_ROOTS), cache=ContextCache(cache_size))
+    try:
+        asyncio.run(_serve(store, host, port, poll_interval))
+    except KeyboardInterrupt:
+        pass
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
 import re
-from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Type
+
+if TYPE_CHECKING:
+    from .ir_contexts import IRContexts
 
 
 def _get(node, key: str):
@@ -34,18 +39,6 @@ def collect_nids(root) -> List[str]:
     return nids
 
 
-def assert_unique_nids(root) -> None:
-    seen = set()
-    duplicates = []
-    for nid in collect_nids(root):
-        if nid in seen:
-            duplicates.append(nid)
-        else:
-            seen.add(nid)
-    if duplicates:
-        raise AssertionError(f"Duplicate nids detected: {sorted(set(duplicates))}")
-
-
 def summarize_kinds(root) -> Dict[str, int]:
     counts: Dict[str, int] = {}
     for node in walk_nodes(root):
@@ -55,119 +48,261 @@ def summarize_kinds(root) -> Dict[str, int]:
     return counts
 
 
-def check_annex_article_nids(root) -> Tuple[List[str], List[str]]:
-    main = []
-    annex = []
-    for node in walk_nodes(root):
-        if _get(node, "kind") != "article":
-            continue
-        nid = _get(node, "nid")
-        if not nid:
-            continue
-        if nid.startswith("annex"):
-            annex.append(nid)
-        else:
-            main.append(nid)
-    collisions = sorted(set(main).intersection(set(annex)))
-    invalid_annex = [nid for nid in annex if ".art" not in nid]
-    return collisions, invalid_annex
+@dataclass(frozen=True)
+class VerifyProblem:
+    """One failed invariant; ``check`` names the rule, ``nid`` the node it concerns."""
+
+    check: str
+    nid: Optional[str]
+    message: str
 
 
 _APPDX_RE = re.compile(r"(appdx_(?:table|note|style|fig|format)|appdx)([0-9_]+)$")
-def check_appendix_scoped_indices(root) -> List[str]:
-    problems: List[str] = []
-    for parent in walk_nodes(root):
-        children = _get_children(parent)
-        appdx_children = [c for c in children if _get(c, "kind") == "appendix"]
-        if not appdx_children:
-            continue
-        by_key: Dict[str, List[int]] = {}
-        for child in appdx_children:
-            nid = _get(child, "nid") or ""
-            m = _APPDX_RE.search(nid)
-            if not m:
-                continue
-            key, num_str = m.group(1), m.group(2)
-            head = num_str.split("_", 1)[0]
-            try:
-                num = int(head)
-            except ValueError:
-                continue
-            by_key.setdefault(key, []).append(num)
-        for key, nums in by_key.items():
-            if not nums:
-                continue
-            count = len(nums)
-            if any(num > count for num in nums):
-                continue
-            expected = list(range(1, count + 1))
-            if sorted(nums) != expected:
-                parent_nid = _get(parent, "nid")
-                problems.append(
-                    f"appendix index for {key} under {parent_nid} is not contiguous: {sorted(nums)}"
-                )
-    return problems
 
 
-def check_ord_format_and_order(root) -> List[str]:
-    problems: List[str] = []
-    seen: set[int] = set()
+def _accessors(root) -> Tuple[Callable, Callable, Callable, Callable]:
+    # Dispatch once on the root's type instead of on every attribute access.
+    if isinstance(root, dict):
+        return (
+            lambda n: n.get("nid"),
+            lambda n: n.get("kind"),
+            lambda n: n.get("ord"),
+            lambda n: n.get("children") or (),
+        )
+    return (
+        attrgetter("nid"),
+        attrgetter("kind"),
+        attrgetter("ord"),
+        lambda n: n.children or (),
+    )
+
+
+def verify_tree(root) -> List[VerifyProblem]:
+    """Check every IR invariant in a single pre-order walk.
+
+    Works on ``Node`` trees and on their ``to_dict()`` form. Problems are
+    grouped by check and, within a check, listed in document order.
+    """
+    nid_of, kind_of, ord_of, children_of = _accessors(root)
+    seen_nids: Set[str] = set()
+    duplicates: List[VerifyProblem] = []
+    main_articles: Set[str] = set()
+    annex_articles: List[str] = []
+    invalid_annex: List[VerifyProblem] = []
+    appendix: List[VerifyProblem] = []
+    ords: List[VerifyProblem] = []
+    seen_ords: Set[int] = set()
     prev_ord: Optional[int] = None
-    for node in walk_nodes(root):
-        nid = _get(node, "nid")
-        ord_val = _get(node, "ord")
+
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        nid = nid_of(node)
+        if nid:
+            if nid in seen_nids:
+                duplicates.append(VerifyProblem("duplicate_nid", nid, f"duplicate nid: {nid}"))
+            else:
+                seen_nids.add(nid)
+            if kind_of(node) == "article":
+                if nid.startswith("annex"):
+                    annex_articles.append(nid)
+                    if ".art" not in nid:
+                        invalid_annex.append(
+                            VerifyProblem("invalid_annex_article_nid", nid, f"invalid annex article nid: {nid}")
+                        )
+                else:
+                    main_articles.add(nid)
+
         if nid != "root":
+            ord_val = ord_of(node)
             if not isinstance(ord_val, int):
-                problems.append(f"invalid ord type at {nid}: {ord_val!r}")
+                ords.append(VerifyProblem("ord", nid, f"invalid ord type at {nid}: {ord_val!r}"))
             else:
                 if ord_val <= 0:
-                    problems.append(f"invalid ord value at {nid}: {ord_val}")
-                if ord_val in seen:
-                    problems.append(f"duplicate ord value at {nid}: {ord_val}")
+                    ords.append(VerifyProblem("ord", nid, f"invalid ord value at {nid}: {ord_val}"))
+                if ord_val in seen_ords:
+                    ords.append(VerifyProblem("ord", nid, f"duplicate ord value at {nid}: {ord_val}"))
                 else:
-                    seen.add(ord_val)
+                    seen_ords.add(ord_val)
                 if prev_ord is not None and ord_val <= prev_ord:
-                    problems.append(
-                        f"ord is not strictly increasing at {nid}: {ord_val} <= {prev_ord}"
+                    ords.append(
+                        VerifyProblem("ord", nid, f"ord is not strictly increasing at {nid}: {ord_val} <= {prev_ord}")
                     )
                 prev_ord = ord_val
-        children = _get_children(node)
+
+        children = children_of(node)
         if not children:
             continue
-        ords: List[int] = []
+
+        child_ords: List[int] = []
         has_invalid_child = False
+        appdx_nums: Dict[str, List[int]] = {}
         for child in children:
-            child_nid = _get(child, "nid")
-            child_ord = _get(child, "ord")
+            child_nid = nid_of(child)
+            child_ord = ord_of(child)
             if not isinstance(child_ord, int):
-                problems.append(f"missing ord at {child_nid}")
+                ords.append(VerifyProblem("ord", child_nid, f"missing ord at {child_nid}"))
                 has_invalid_child = True
+            else:
+                child_ords.append(child_ord)
+            if kind_of(child) != "appendix":
                 continue
-            ords.append(child_ord)
-        if has_invalid_child:
-            continue
-        if ords != sorted(ords):
-            parent_nid = _get(node, "nid")
-            problems.append(f"children ord not sorted under {parent_nid}")
+            m = _APPDX_RE.search(child_nid or "")
+            if not m:
+                continue
+            key, num_str = m.group(1), m.group(2)
+            try:
+                num = int(num_str.split("_", 1)[0])
+            except ValueError:
+                continue
+            appdx_nums.setdefault(key, []).append(num)
+        if not has_invalid_child and child_ords != sorted(child_ords):
+            ords.append(VerifyProblem("ord", nid, f"children ord not sorted under {nid}"))
+        for key, nums in appdx_nums.items():
+            count = len(nums)
+            if any(num > count for num in nums):
+                continue
+            if sorted(nums) != list(range(1, count + 1)):
+                appendix.append(
+                    VerifyProblem(
+                        "appendix_index",
+                        nid,
+                        f"appendix index for {key} under {nid} is not contiguous: {sorted(nums)}",
+                    )
+                )
+        stack.extend(reversed(children))
+
+    collisions = [
+        VerifyProblem("annex_nid_collision", nid, f"annex nid collision: {nid}")
+        for nid in sorted(main_articles.intersection(annex_articles))
+    ]
+    return [*duplicates, *collisions, *invalid_annex, *appendix, *ords]
+
+
+def verify_contexts(
+    root,
+    contexts: "IRContexts",
+    regdoc_profile: Optional[Dict[str, Any]] = None,
+) -> List[VerifyProblem]:
+    """Check a contexts file against the IR tree (and the regdoc profile it claims to follow).
+
+    The nid table must be the tree's pre-order; every reference must be in
+    range, each context must contain its selected node, and each group key
+    must be an ancestor of it.  With ``regdoc_profile`` the purposes must match
+    and exactly the nodes of the selectable kinds must be listed.
+    """
+    nids: List[Optional[str]] = []
+    kinds: List[Optional[str]] = []
+    parents: List[int] = []
+    stack: List[Tuple[Any, int]] = [(root, -1)]
+    while stack:
+        node, parent = stack.pop()
+        nids.append(_get(node, "nid"))
+        kinds.append(_get(node, "kind"))
+        parents.append(parent)
+        pos = len(nids) - 1
+        stack.extend((child, pos) for child in reversed(_get_children(node)))
+    if contexts.nids != nids:
+        return [VerifyProblem("contexts_nids", None, "contexts nid table does not match the IR pre-order")]
+
+    problems: List[VerifyProblem] = []
+    profiles = (regdoc_profile or {}).get("profiles") or {}
+    if regdoc_profile is not None and sorted(profiles) != contexts.purposes:
+        problems.append(
+            VerifyProblem(
+                "contexts_purposes", None, f"purposes {contexts.purposes} != regdoc profile {sorted(profiles)}"
+            )
+        )
+    count = len(nids)
+    for purpose in contexts.purposes:
+        listed: Set[int] = set()
+        for pos, context, group in contexts.entries(purpose):
+            if not 0 <= pos < count or any(not 0 <= p < count for p in context):
+                problems.append(VerifyProblem("contexts_reference", None, f"{purpose}: reference out of range"))
+                continue
+            nid = nids[pos]
+            listed.add(pos)
+            if pos not in context:
+                problems.append(VerifyProblem("contexts_selected", nid, f"{purpose}: {nid} missing from its context"))
+            if group is not None:
+                anc = parents[pos]
+                while anc >= 0 and anc != group:
+                    anc = parents[anc]
+                if anc < 0:
+                    problems.append(VerifyProblem("contexts_group", nid, f"{purpose}: group of {nid} is no ancestor"))
+        purpose_profile = profiles.get(purpose)
+        if isinstance(purpose_profile, dict):
+            selectable = set(purpose_profile.get("selectable_kinds") or [])
+            first = {}
+            for pos, nid in enumerate(nids):
+                first.setdefault(nid, pos)
+            expected = {pos for pos, kind in enumerate(kinds) if kind in selectable and first[nids[pos]] == pos}
+            if listed != expected:
+                problems.append(
+                    VerifyProblem(
+                        "contexts_selectable",
+                        None,
+                        f"{purpose}: {len(listed ^ expected)} nodes differ from the selectable kinds",
+                    )
+                )
     return problems
 
 
-def verify_document(ir_doc: Dict) -> None:
-    root = ir_doc.get("content")
-    if root is None:
-        raise AssertionError("regdoc_ir content is missing")
-    assert_unique_nids(root)
-    collisions, invalid_annex = check_annex_article_nids(root)
-    appendix_problems = check_appendix_scoped_indices(root)
-    ord_problems = check_ord_format_and_order(root)
+def _by_check(problems: Iterable[VerifyProblem], check: str) -> List[VerifyProblem]:
+    return [p for p in problems if p.check == check]
+
+
+def format_problems(problems: List[VerifyProblem]) -> str:
+    """Summarize problems (other than duplicate nids) in the historical one-line form."""
     errors: List[str] = []
+    collisions = [p.nid for p in _by_check(problems, "annex_nid_collision")]
+    invalid_annex = [p.nid for p in _by_check(problems, "invalid_annex_article_nid")]
+    appendix = [p.message for p in _by_check(problems, "appendix_index")]
+    ords = [p.message for p in _by_check(problems, "ord")]
+    contexts = [p.message for p in problems if p.check.startswith("contexts_")]
     if collisions:
         errors.append(f"annex nid collisions: {collisions}")
     if invalid_annex:
         errors.append(f"invalid annex article nids: {invalid_annex}")
-    if appendix_problems:
-        errors.append(f"appendix index problems: {appendix_problems}")
-    if ord_problems:
-        errors.append(f"ord problems: {ord_problems}")
-    if errors:
-        raise AssertionError("verify failed: " + " | ".join(errors))
+    if appendix:
+        errors.append(f"appendix index problems: {appendix}")
+    if ords:
+        errors.append(f"ord problems: {ords}")
+    if contexts:
+        errors.append(f"context problems: {contexts}")
+    return " | ".join(errors)
+
+
+def raise_for_problems(problems: List[VerifyProblem], *, error: Type[Exception] = AssertionError) -> None:
+    duplicates = [p.nid for p in _by_check(problems, "duplicate_nid")]
+    if duplicates:
+        raise AssertionError(f"Duplicate nids detected: {sorted(set(duplicates))}")
+    if problems:
+        raise error("verify failed: " + format_problems(problems))
+
+
+def assert_unique_nids(root) -> None:
+    raise_for_problems(_by_check(verify_tree(root), "duplicate_nid"))
+
+
+def check_annex_article_nids(root) -> Tuple[List[str], List[str]]:
+    problems = verify_tree(root)
+    return (
+        [p.nid for p in _by_check(problems, "annex_nid_collision")],
+        [p.nid for p in _by_check(problems, "invalid_annex_article_nid")],
+    )
+
+
+def check_appendix_scoped_indices(root) -> List[str]:
+    return [p.message for p in _by_check(verify_tree(root), "appendix_index")]
+
+
+def check_ord_format_and_order(root) -> List[str]:
+    return [p.message for p in _by_check(verify_tree(root), "ord")]
+
+
+def verify_document(ir_doc) -> None:
+    root = _get(ir_doc, "content")
+    if root is None:
+        raise AssertionError("regdoc_ir content is missing")
+    raise_for_problems(verify_tree(root))
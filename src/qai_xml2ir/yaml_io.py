@@ -0,0 +1,96 @@
+"""Shared YAML reading/writing with the libyaml fast path when it is available.
+
+Every YAML file in the toolchain is read with ``load_yaml`` and written with
+``dump_yaml``.  Loading uses ``CSafeLoader`` when PyYAML was built against
+libyaml.  Dumping uses ``CSafeDumper`` only for documents the C emitter renders
+byte-for-byte like the pure-Python ``SafeDumper``; everything else goes through
+``SafeDumper`` so output never depends on how PyYAML was installed.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import IO, Any, Optional
+
+import yaml
+
+try:
+    from yaml import CSafeDumper, CSafeLoader
+except ImportError:  # PyYAML built without libyaml
+    CSafeDumper = None  # type: ignore[assignment,misc]
+    CSafeLoader = None  # type: ignore[assignment,misc]
+
+HAS_LIBYAML = CSafeLoader is not None and CSafeDumper is not None
+
+# libyaml takes an int width; this is effectively the pure-Python float("inf").
+_C_WIDTH = 2**31 - 1
+# Where the two emitters disagree: NEL and astral-plane characters are escaped by
+# libyaml only, and libyaml measures the 128 simple-key limit in bytes (and
+# without the tag) while PyYAML counts characters plus the tag.
+_C_UNSAFE_CHARS = re.compile("[\x85\U00010000-\U0010FFFF]")
+_C_UNSAFE_KEY_CHARS = re.compile("[\n\r\x85\u2028\u2029]")
+_C_MAX_KEY_BYTES = 122
+
+
+def load_yaml(stream: Any, *, use_libyaml: Optional[bool] = None) -> Any:
+    """Like ``yaml.safe_load``; ``use_libyaml`` forces (True) or disables (False) the C loader."""
+    loader = CSafeLoader if _want_libyaml(use_libyaml) else yaml.SafeLoader
+    return yaml.load(stream, Loader=loader)
+
+
+def dump_yaml(data: Any, stream: IO[str], *, use_libyaml: Optional[bool] = None) -> None:
+    """Write ``data`` with the toolchain's dump settings (unicode, key order kept, no wrapping)."""
+    if _want_libyaml(use_libyaml) and libyaml_emits_same(data):
+        yaml.dump(
+            data,
+            stream,
+            Dumper=CSafeDumper,
+            allow_unicode=True,
+            sort_keys=False,
+            width=_C_WIDTH,
+        )
+        return
+    yaml.dump(
+        data,
+        stream,
+        Dumper=yaml.SafeDumper,
+        allow_unicode=True,
+        sort_keys=False,
+        width=float("inf"),
+    )
+
+
+def libyaml_emits_same(data: Any) -> bool:
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            if _C_UNSAFE_CHARS.search(value):
+                return False
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if isinstance(key, str) and not _c_simple_key(key):
+                    return False
+                if isinstance(key, (dict, list)):
+                    return False
+                stack.append(item)
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return True
+
+
+def _c_simple_key(key: str) -> bool:
+    return (
+        bool(key)
+        and len(key.encode("utf-8")) <= _C_MAX_KEY_BYTES
+        and not _C_UNSAFE_CHARS.search(key)
+        and not _C_UNSAFE_KEY_CHARS.search(key)
+    )
+
+
+def _want_libyaml(use_libyaml: Optional[bool]) -> bool:
+    if use_libyaml is None:
+        return HAS_LIBYAML
+    if use_libyaml and not HAS_LIBYAML:
+        raise RuntimeError("PyYAML was built without libyaml; CSafeLoader/CSafeDumper are unavailable")
+    return use_libyaml
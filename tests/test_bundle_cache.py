@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+
+import pytest
+import yaml
+
+from qai_text2ir import cli as text_cli
+from qai_xml2ir import bundle_cache, cli, digest, serialize
+from qai_xml2ir.bundle_cache import BundleCache
+
+from test_bundle_gmp import write_sample_xml
+
+
+def _bundle_files(out_dir: Path) -> dict[str, bytes]:
+    return {p.name: p.read_bytes() for p in sorted(out_dir.iterdir()) if p.suffix == ".yaml"}
+
+
+def _xml_bundle(xml_path: Path, out_dir: Path, cache_dir: Path, **kwargs) -> None:
+    cli.bundle(
+        input=xml_path,
+        out_dir=out_dir,
+        doc_id="jp_cache_doc",
+        retrieved_at="2026-02-02",
+        emit_only="all",
+        cache_dir=cache_dir,
+        **kwargs,
+    )
+
+
+def test_xml2ir_cache_hit_reuses_bundle_without_parsing(tmp_path: Path, monkeypatch) -> None:
+    xml_path = tmp_path / "416M60000100179_20260501_507M60000100117.xml"
+    write_sample_xml(xml_path)
+    cache_dir = tmp_path / "cache"
+
+    _xml_bundle(xml_path, tmp_path / "run1", cache_dir)
+    first = _bundle_files(tmp_path / "run1")
+    assert len(first) == 4
+
+    def fail_parse(*args, **kwargs):
+        raise AssertionError("cache hit must not re-parse")
+
+    monkeypatch.setattr(cli, "parse_egov_xml", fail_parse)
+    _xml_bundle(xml_path, tmp_path / "run2", cache_dir, cache_hardlink=True)
+    assert _bundle_files(tmp_path / "run2") == first
+    ir_name = "jp_cache_doc.regdoc_ir.yaml"
+    assert (tmp_path / "run2" / ir_name).stat().st_ino == next(
+        p for p in cache_dir.rglob(ir_name)
+    ).stat().st_ino
+
+    # A changed input or changed options must miss the cache.
+    xml_path.write_text(xml_path.read_text(encoding="utf-8").replace("テスト法", "別の法"), encoding="utf-8")
+    with pytest.raises(AssertionError, match="must not re-parse"):
+        _xml_bundle(xml_path, tmp_path / "run3", cache_dir)
+    with pytest.raises(AssertionError, match="must not re-parse"):
+        cli.bundle(
+            input=xml_path,
+            out_dir=tmp_path / "run4",
+            doc_id="jp_cache_doc",
+            retrieved_at="2026-03-03",
+            emit_only="all",
+            cache_dir=cache_dir,
+        )
+
+
+def test_text2ir_cache_hit_reuses_bundle_and_manifest_details(tmp_path: Path, monkeypatch) -> None:
+    fixture = Path("tests/fixtures/CFR_PART11_SubpartA.txt")
+    input_path = tmp_path / fixture.name
+    input_path.write_text(fixture.read_text(encoding="utf-8"), encoding="utf-8", newline="\n")
+    cache_dir = tmp_path / "cache"
+    kwargs = dict(
+        input=input_path,
+        doc_id="us_cfr_21_part_11_subpart_a",
+        cfr_title="21",
+        cfr_part="11",
+        retrieved_at="2026-02-10",
+        emit_only="all",
+        cache_dir=cache_dir,
+    )
+
+    text_cli.bundle(out_dir=tmp_path / "run1", **kwargs)
+    first = _bundle_files(tmp_path / "run1")
+
+    def fail_parse(*args, **kwargs):
+        raise AssertionError("cache hit must not re-parse")
+
+    monkeypatch.setattr(text_cli, "parse_text_to_ir", fail_parse)
+    text_cli.bundle(out_dir=tmp_path / "run2", **kwargs)
+    second = _bundle_files(tmp_path / "run2")
+
+    manifests = [second.pop("manifest.yaml"), first.pop("manifest.yaml")]
+    assert second == first
+    refine = [yaml.safe_load(m)["refine"] for m in manifests]
+    assert refine[0] == refine[1]
+
+
+def test_bundle_cache_ignores_incomplete_entries(tmp_path: Path) -> None:
+    cache = BundleCache(tmp_path / "cache")
+    src = tmp_path / "doc.regdoc_ir.yaml"
+    src.write_text("a: 1\n", encoding="utf-8")
+    key = "ab" * 32
+    cache.store(key, doc_id="doc", files=[src])
+    assert cache.lookup(key)["files"] == ["doc.regdoc_ir.yaml"]
+    (cache.entry_dir(key) / "doc.regdoc_ir.yaml").unlink()
+    assert cache.lookup(key) is None
+
+
+def test_rebuild_into_hardlinked_out_dir_leaves_cache_intact(tmp_path: Path, monkeypatch) -> None:
+    xml_path = tmp_path / "416M60000100179_20260501_507M60000100117.xml"
+    write_sample_xml(xml_path)
+    cache_dir = tmp_path / "cache"
+    _xml_bundle(xml_path, tmp_path / "run1", cache_dir)
+    first = _bundle_files(tmp_path / "run1")
+    _xml_bundle(xml_path, tmp_path / "linked", cache_dir, cache_hardlink=True)
+
+    changed = tmp_path / "changed" / xml_path.name
+    changed.parent.mkdir()
+    changed.write_text(xml_path.read_text(encoding="utf-8").replace("テスト法", "別の法"), encoding="utf-8")
+    monkeypatch.setattr(serialize, "_OVERWRITE_APPROVED", True)
+    _xml_bundle(changed, tmp_path / "linked", cache_dir)
+    assert "別の法" in (tmp_path / "linked" / "jp_cache_doc.meta.yaml").read_text(encoding="utf-8")
+
+    _xml_bundle(xml_path, tmp_path / "run3", cache_dir)
+    assert _bundle_files(tmp_path / "run3") == first
+
+
+def test_bundle_cache_rejects_modified_files(tmp_path: Path) -> None:
+    cache = BundleCache(tmp_path / "cache")
+    src = tmp_path / "doc.regdoc_ir.yaml"
+    src.write_text("a: 1\n", encoding="utf-8")
+    key = "cd" * 32
+    cache.store(key, doc_id="doc", files=[src])
+    (cache.entry_dir(key) / "doc.regdoc_ir.yaml").write_text("a: 2\n", encoding="utf-8")
+    assert cache.lookup(key) is None
+
+
+def test_xml2ir_cache_key_uses_resolved_retrieved_at(tmp_path: Path, monkeypatch) -> None:
+    xml_path = tmp_path / "416M60000100179_20260501_507M60000100117.xml"
+    write_sample_xml(xml_path)
+    cache_dir = tmp_path / "cache"
+    url = "https://laws.e-gov.go.jp/law/416M60000100179"
+
+    class _Day:
+        @staticmethod
+        def today() -> date:
+            return date(2026, 2, 2)
+
+    monkeypatch.setattr(cli, "date", _Day)
+    cli.bundle(
+        input=xml_path, out_dir=tmp_path / "day1", doc_id="jp_cache_doc", source_url=url, emit_only="all", cache_dir=cache_dir
+    )
+    monkeypatch.setattr(_Day, "today", staticmethod(lambda: date(2026, 2, 3)))
+    cli.bundle(
+        input=xml_path, out_dir=tmp_path / "day2", doc_id="jp_cache_doc", source_url=url, emit_only="all", cache_dir=cache_dir
+    )
+    meta = yaml.safe_load((tmp_path / "day2" / "jp_cache_doc.meta.yaml").read_text(encoding="utf-8"))
+    assert meta["doc"]["sources"][0]["retrieved_at"] == "2026-02-03"
+
+
+def test_digest_helpers_stay_importable_from_old_modules() -> None:
+    assert bundle_cache.sha256_data is digest.sha256_data
+    assert serialize.sha256_file is bundle_cache.sha256_file is digest.sha256_file
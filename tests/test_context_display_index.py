@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from qai_xml2ir.context_display import (
+    ContextCache,
+    NodeIndex,
+    _find_with_ancestors,
+    resolve_context_batch,
+    purpose_profile_digest,
+    resolve_context_nodes,
+)
+from qai_xml2ir import load_ir
+from qai_xml2ir.models_ir import Node, build_root
+from qai_xml2ir.models_profiles import build_regdoc_profile
+
+NORMALIZED_IR = Path(
+    "data/normalized/jp_egov_336M50000100002_20260501_507M60000100117/"
+    "jp_egov_336M50000100002_20260501_507M60000100117.regdoc_ir.yaml"
+)
+
+
+def _node(nid: str, kind: str, *children: Node) -> Node:
+    return Node(
+        nid=nid,
+        kind=kind,
+        kind_raw=None,
+        num=None,
+        ord=None,
+        heading=None,
+        text=None,
+        role="normative",
+        normativity=None,
+        children=list(children),
+    )
+
+
+def test_index_matches_tree_search() -> None:
+    root = build_root(
+        [
+            _node("a", "article", _node("a.p1", "paragraph", _node("a.p1.i1", "item")), _node("a.p2", "paragraph")),
+            _node("b", "article", _node("dup", "paragraph"), _node("b.n", "note", _node("dup", "item"))),
+        ]
+    )
+    index = NodeIndex(root)
+    for nid in ["root", "a", "a.p1", "a.p1.i1", "a.p2", "b", "dup", "b.n"]:
+        found = _find_with_ancestors(root, nid)
+        assert index.get(nid) is found.node
+        assert index.ancestors(nid) == found.ancestors
+        assert index.depth(nid) == len(found.ancestors)
+    assert index.parent("dup").nid == "b"
+    assert index.parent("root") is None
+    assert index.get("missing") is None and "missing" not in index
+    assert index.is_descendant("a.p1.i1", "a") and index.is_descendant("a.p2", "root")
+    assert not index.is_descendant("a", "a") and not index.is_descendant("b.n", "a")
+    assert len(index) == 9
+
+
+def test_resolve_with_index_matches_search() -> None:
+    root = load_ir(NORMALIZED_IR, prefer_sidecar=False).content
+    purpose_profile = build_regdoc_profile("doc")["profiles"]["dq_gmp_checklist"]
+    index = NodeIndex(root)
+    selectable = set(purpose_profile["selectable_kinds"])
+    nids = [node.nid for node in index.nodes if node.kind in selectable]
+    assert nids
+    for nid in nids:
+        expected = resolve_context_nodes(root, nid, purpose_profile)
+        assert resolve_context_nodes(root, nid, purpose_profile, index=index) == expected
+    assert resolve_context_nodes(root, "missing", purpose_profile, index=index) == []
+
+
+def test_batch_matches_per_nid_calls() -> None:
+    root = load_ir(NORMALIZED_IR, prefer_sidecar=False).content
+    checklist = build_regdoc_profile("doc")["profiles"]["dq_gmp_checklist"]
+    variants = [
+        checklist,
+        {
+            "context_display_policy": [
+                {"when_kind": "paragraph", "include_descendants": True, "include_descendants_of": "both"},
+                {
+                    "when_kind": "item",
+                    "include_ancestors_until_kind": "paragraph",
+                    "include_descendants": True,
+                    "include_descendants_of": "ancestors",
+                    "include_descendants_max_depth": 1,
+                },
+            ]
+        },
+        {},
+    ]
+    nids = [node.nid for node in NodeIndex(root).nodes][::3] + ["missing", "root"]
+    for purpose_profile in variants:
+        expected = [(nid, [n.nid for n in resolve_context_nodes(root, nid, purpose_profile)]) for nid in nids]
+        assert list(resolve_context_batch(root, nids, purpose_profile)) == expected
+
+
+def test_context_cache_counts_evicts_and_invalidates() -> None:
+    root = load_ir(NORMALIZED_IR, prefer_sidecar=False).content
+    purpose_profile = build_regdoc_profile("doc")["profiles"]["dq_gmp_checklist"]
+    digest = purpose_profile_digest(purpose_profile)
+    nids = [node.nid for node in NodeIndex(root).nodes][:40] + ["missing"]
+    cache = ContextCache(maxsize=len(nids))
+    for _ in range(2):
+        for nid in nids:
+            expected = resolve_context_nodes(root, nid, purpose_profile)
+            assert cache.resolve(root, nid, purpose_profile, ir_digest="ir-a", profile_digest=digest) == expected
+    assert cache.stats() == {"hits": len(nids), "misses": len(nids), "size": len(nids), "maxsize": len(nids)}
+
+    # A different profile hash is a different key; the oldest entry makes room for it.
+    other = {**purpose_profile, "context_display_policy": []}
+    assert cache.resolve(root, nids[1], other, ir_digest="ir-a") == resolve_context_nodes(root, nids[1], other)
+    assert len(cache) == len(nids)
+    cache.resolve(root, nids[0], purpose_profile, ir_digest="ir-a", profile_digest=digest)
+    assert cache.misses == len(nids) + 2
+
+    cache.resolve(root, nids[2], purpose_profile, ir_digest="ir-b", profile_digest=digest)
+    assert cache.invalidate("ir-a") == len(nids) - 1
+    assert len(cache) == 1
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "size": 0, "maxsize": len(nids)}
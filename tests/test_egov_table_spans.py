@@ -1,8 +1,18 @@
 from __future__ import annotations
 
+import copy
+import random
+
 from lxml import etree
 
-from qai_xml2ir.egov_parser import _extract_table_payload
+from qai_xml2ir.egov_parser import (
+    _build_table_grid,
+    _can_absorb_anchor,
+    _extract_table_payload,
+    _flatten_grid_to_rows,
+    _infer_border_spans,
+    _rebuild_cover_from_anchors,
+)
 
 
 def test_extract_table_payload_infers_vertical_span_from_borders_and_fills_rows() -> None:
@@ -63,3 +73,117 @@ def test_extract_table_payload_handles_explicit_rowspan_without_column_shift() -
     cell00 = next(c for c in table_layout["cells"] if c["r"] == 0 and c["c"] == 0)
     assert cell00["rowspan"] == 2
     assert cell00["span_source"] == "attr"
+
+
+def _reference_infer_border_spans(anchors, cover, nrows):
+    # Previous implementation: full cover rebuild after every merge.
+    changed = True
+    while changed:
+        changed = False
+        ordered_ids = sorted(
+            (aid for aid, a in anchors.items() if not a.get("covered")),
+            key=lambda aid: (int(anchors[aid]["r"]), int(anchors[aid]["c"])),
+        )
+        for anchor_id in ordered_ids:
+            anchor = anchors[anchor_id]
+            if anchor.get("covered") or anchor["text"].strip():
+                continue
+            r, c = int(anchor["r"]), int(anchor["c"])
+            rowspan, colspan = int(anchor["rowspan"]), int(anchor["colspan"])
+            if r > 0 and anchor["border_top"] == "none":
+                above_id = cover.get((r - 1, c))
+                if above_id and above_id != anchor_id and not anchors[above_id].get("covered"):
+                    above = anchors[above_id]
+                    if above["border_bottom"] == "none" and _can_absorb_anchor(
+                        source_anchor_id=above_id, target_anchor_id=anchor_id, anchors=anchors, cover=cover
+                    ):
+                        needed = (r + rowspan) - int(above["r"])
+                        if needed > int(above["rowspan"]):
+                            above["rowspan"] = needed
+                            if above["span_source"] == "none":
+                                above["span_source"] = "border"
+                        anchor["covered"] = True
+                        cover, _ = _rebuild_cover_from_anchors(anchors, nrows)
+                        changed = True
+                        continue
+            if c > 0 and anchor["border_left"] == "none":
+                left_id = cover.get((r, c - 1))
+                if left_id and left_id != anchor_id and not anchors[left_id].get("covered"):
+                    left = anchors[left_id]
+                    if left["border_right"] == "none" and _can_absorb_anchor(
+                        source_anchor_id=left_id, target_anchor_id=anchor_id, anchors=anchors, cover=cover
+                    ):
+                        needed = (c + colspan) - int(left["c"])
+                        if needed > int(left["colspan"]):
+                            left["colspan"] = needed
+                            if left["span_source"] == "none":
+                                left["span_source"] = "border"
+                        anchor["covered"] = True
+                        cover, _ = _rebuild_cover_from_anchors(anchors, nrows)
+                        changed = True
+                        continue
+    cover, ncols = _rebuild_cover_from_anchors(anchors, nrows)
+    return anchors, cover, ncols
+
+
+def _random_raw_rows(rng: random.Random):
+    rows = []
+    for _ in range(rng.randint(1, 8)):
+        cells = []
+        for _ in range(rng.randint(1, 6)):
+            cells.append(
+                {
+                    "text": "" if rng.random() < 0.6 else f"t{rng.randint(0, 99)}",
+                    "rowspan": 1 if rng.random() < 0.8 else rng.randint(2, 3),
+                    "colspan": 1 if rng.random() < 0.8 else rng.randint(2, 3),
+                    "border_top": rng.choice(["none", "solid"]),
+                    "border_bottom": rng.choice(["none", "solid"]),
+                    "border_left": rng.choice(["none", "solid"]),
+                    "border_right": rng.choice(["none", "solid"]),
+                    "is_header": False,
+                }
+            )
+        rows.append({"is_header_row": False, "has_header_cell": False, "cells": cells})
+    return rows
+
+
+def test_incremental_border_spans_match_full_rebuild_reference() -> None:
+    rng = random.Random(20260218)
+    for _ in range(500):
+        raw_rows = _random_raw_rows(rng)
+        anchors, cover, nrows, _ = _build_table_grid(raw_rows)
+        ref_anchors, ref_cover, _, _ = _build_table_grid(copy.deepcopy(raw_rows))
+
+        anchors, cover, ncols = _infer_border_spans(anchors, cover, nrows)
+        ref_anchors, ref_cover, ref_ncols = _reference_infer_border_spans(ref_anchors, ref_cover, nrows)
+
+        assert anchors == ref_anchors
+        assert cover == ref_cover
+        assert ncols == ref_ncols
+        assert _flatten_grid_to_rows(anchors, cover, nrows, ncols) == _flatten_grid_to_rows(
+            ref_anchors, ref_cover, nrows, ref_ncols
+        )
+
+
+def test_extract_table_payload_merges_large_empty_bordered_table() -> None:
+    nrows, ncols = 200, 20
+    rows = []
+    for r in range(nrows):
+        cells = []
+        for c in range(ncols):
+            text = f"R{r}" if c == 0 and r % 10 == 0 else ""
+            top = "solid" if r % 10 == 0 else "none"
+            bottom = "solid" if r % 10 == 9 else "none"
+            cells.append(
+                f'<TableColumn BorderTop="{top}" BorderBottom="{bottom}" BorderLeft="none" BorderRight="none">'
+                f"<Sentence>{text}</Sentence></TableColumn>"
+            )
+        rows.append(f"<TableRow>{''.join(cells)}</TableRow>")
+    xml = f"<TableStruct><Table>{''.join(rows)}</Table></TableStruct>"
+    wrapper = etree.fromstring(xml.encode("utf-8"))
+    _, _, data_rows, _, table_layout = _extract_table_payload(wrapper)
+
+    assert table_layout is not None
+    assert len(table_layout["cells"]) == nrows // 10
+    assert all(c["rowspan"] == 10 and c["colspan"] == ncols for c in table_layout["cells"])
+    assert data_rows[1] == " | ".join(["R0"] * ncols)
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from lxml import etree
+
+from qai_xml2ir.egov_parser import TagIndex, find_all, find_first, lname, tag_index_scope
+
+
+XML = """\
+<Law>
+  <LawNum>令和元年法律第一号</LawNum>
+  <LawBody>
+    <LawTitle>索引テスト法</LawTitle>
+    <MainProvision>
+      <Article Num="1">
+        <ArticleTitle>第一条</ArticleTitle>
+        <Paragraph Num="1">
+          <ParagraphSentence><Sentence>本文</Sentence></ParagraphSentence>
+          <Item Num="1">
+            <ItemTitle>一</ItemTitle>
+            <ItemSentence><Sentence>号</Sentence></ItemSentence>
+            <Subitem1 Num="1">
+              <Subitem1Title>イ</Subitem1Title>
+              <Subitem1Sentence><Sentence>細目</Sentence></Subitem1Sentence>
+            </Subitem1>
+          </Item>
+        </Paragraph>
+      </Article>
+      <Article Num="2">
+        <ArticleTitle>第二条</ArticleTitle>
+        <ArticleCaption>（見出し）</ArticleCaption>
+        <Paragraph Num="1">
+          <ParagraphSentence><Sentence>二条本文</Sentence></ParagraphSentence>
+        </Paragraph>
+      </Article>
+    </MainProvision>
+  </LawBody>
+</Law>
+"""
+
+
+def _linear_first(elem: etree._Element, tag: str):
+    for child in elem.iter():
+        if lname(child) == tag:
+            return child
+    return None
+
+
+def test_tag_index_first_matches_linear_scan_for_every_element_and_tag() -> None:
+    root = etree.fromstring(XML.encode("utf-8"))
+    index = TagIndex(root)
+    tags = {lname(e) for e in root.iter()} | {"Missing"}
+    for elem in root.iter():
+        for tag in tags:
+            assert index.first(elem, tag) is _linear_first(elem, tag)
+
+
+def test_tag_index_elements_are_in_document_order() -> None:
+    root = etree.fromstring(XML.encode("utf-8"))
+    index = TagIndex(root)
+    titles = [e.text for e in index.elements("ArticleTitle")]
+    assert titles == ["第一条", "第二条"]
+    assert index.elements("Missing") == []
+
+
+def test_find_first_uses_active_index_and_falls_back_outside_scope() -> None:
+    root = etree.fromstring(XML.encode("utf-8"))
+    articles = root.findall(".//Article")
+    other = etree.fromstring(b"<Article><ArticleCaption>x</ArticleCaption></Article>")
+    with tag_index_scope(root):
+        assert find_first(articles[0], "ArticleCaption") is None
+        assert find_first(articles[1], "ArticleCaption").text == "（見出し）"
+        assert find_first(other, "ArticleCaption").text == "x"
+    assert find_first(articles[1], "ArticleCaption").text == "（見出し）"
+
+
+def test_tag_index_descendants_match_findall_for_every_element_and_tag() -> None:
+    root = etree.fromstring(XML.encode("utf-8"))
+    root.find(".//Paragraph").append(etree.Comment("trailing comment"))
+    index = TagIndex(root)
+    tags = {lname(e) for e in root.iter()} | {"Missing"}
+    for elem in root.iter(etree.Element):
+        for tag in tags:
+            assert index.descendants(elem, tag) == elem.findall(f".//{tag}")
+    with tag_index_scope(root):
+        assert [s.text for s in find_all(root.find(".//Item"), "Sentence")] == ["号", "細目"]
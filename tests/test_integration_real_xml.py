@@ -8,6 +8,7 @@ import yaml
 from typer.testing import CliRunner
 
 from qai_xml2ir.cli import app
+from qai_xml2ir.egov_parser import parse_egov_xml
 from qai_xml2ir.verify import (
     assert_unique_nids,
     check_annex_article_nids,
@@ -94,3 +95,6 @@ def test_integration_real_xml(tmp_path: Path) -> None:
         assert meta["bundle"]["ir"]["path"] == ir_path.name
         assert meta["bundle"]["parser_profile"]["path"] == parser_profile_path.name
         assert meta["bundle"]["regdoc_profile"]["path"] == regdoc_profile_path.name
+
+        streamed = parse_egov_xml(xml_path, streaming=True)
+        assert streamed.root.to_dict() == parse_egov_xml(xml_path).root.to_dict()
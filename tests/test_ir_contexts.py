@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from qai_text2ir import cli as text2ir_cli
+from qai_xml2ir import cli, load_ir
+from qai_xml2ir.context_display import NodeIndex, resolve_context_nodes
+from qai_xml2ir.ir_contexts import contexts_path_for, load_ir_contexts, write_ir_contexts
+from qai_xml2ir.verify import verify_contexts
+from qai_xml2ir.yaml_io import load_yaml
+
+from test_bundle_gmp import write_sample_xml
+
+BUNDLE_DIR = Path("data/normalized/jp_egov_336M50000100002_20260501_507M60000100117")
+IR_NAME = "jp_egov_336M50000100002_20260501_507M60000100117.regdoc_ir.yaml"
+PROFILE_NAME = "jp_egov_336M50000100002_20260501_507M60000100117.regdoc_profile.yaml"
+
+
+def _bundle(tmp_path: Path):
+    ir_path = tmp_path / IR_NAME
+    ir_path.write_bytes((BUNDLE_DIR / IR_NAME).read_bytes())
+    with (BUNDLE_DIR / PROFILE_NAME).open("r", encoding="utf-8") as f:
+        regdoc_profile = load_yaml(f)
+    return ir_path, load_ir(ir_path, prefer_sidecar=False), regdoc_profile
+
+
+def test_contexts_match_resolution_and_group_keys(tmp_path: Path) -> None:
+    ir_path, ir_doc, regdoc_profile = _bundle(tmp_path)
+    path = contexts_path_for(ir_path)
+    write_ir_contexts(path, ir_doc, regdoc_profile, ir_yaml_path=ir_path)
+    contexts = load_ir_contexts(path, ir_yaml_path=ir_path, regdoc_profile=regdoc_profile)
+    assert verify_contexts(ir_doc.content, contexts, regdoc_profile) == []
+
+    root = ir_doc.content
+    index = NodeIndex(root)
+    purpose = "dq_gmp_checklist"
+    purpose_profile = regdoc_profile["profiles"][purpose]
+    group_under = {p["when_kind"]: p["group_under_kind"] for p in purpose_profile["grouping_policy"]}
+    selected = [node for node in index.nodes if node.kind in purpose_profile["selectable_kinds"]]
+    assert selected
+    for node in selected:
+        expected = [n.nid for n in resolve_context_nodes(root, node.nid, purpose_profile)]
+        assert contexts.context_nids(purpose, node.nid) == expected
+        group = next((a for a in reversed(index.ancestors(node.nid)) if a.kind == group_under[node.kind]), None)
+        assert contexts.group_key(purpose, node.nid) == (group.nid if group is not None else None)
+    assert contexts.context_nids(purpose, "root") is None
+
+
+def test_verify_and_load_reject_bad_files(tmp_path: Path) -> None:
+    ir_path, ir_doc, regdoc_profile = _bundle(tmp_path)
+    path = contexts_path_for(ir_path)
+    write_ir_contexts(path, ir_doc, regdoc_profile, ir_yaml_path=ir_path)
+    payload = json.loads(path.read_text(encoding="utf-8"))
+
+    contexts = payload["profiles"]["dq_gmp_checklist"]
+    contexts["contexts"][0] = [len(payload["nids"])]
+    contexts["groups"][1] = 1
+    contexts["selected"].pop()
+    path.write_text(json.dumps(payload), encoding="utf-8")
+    checks = {p.check for p in verify_contexts(ir_doc.content, load_ir_contexts(path), regdoc_profile)}
+    assert checks == {"contexts_reference", "contexts_group", "contexts_selectable"}
+
+    changed = {**regdoc_profile, "profiles": {"dq_gmp_checklist": {"grouping_policy": []}}}
+    with pytest.raises(ValueError, match=r"Stale .*regdoc profile"):
+        load_ir_contexts(path, regdoc_profile=changed)
+    with ir_path.open("a", encoding="utf-8") as f:
+        f.write("\n")
+    with pytest.raises(ValueError, match="Stale"):
+        load_ir_contexts(path, ir_yaml_path=ir_path)
+    path.write_text('{"schema": "other"}', encoding="utf-8")
+    with pytest.raises(ValueError, match="Not a RegDoc contexts file"):
+        load_ir_contexts(path)
+
+
+def test_bundles_emit_contexts_on_request(tmp_path: Path) -> None:
+    xml_path = tmp_path / "416M60000100179_20260501_507M60000100117.xml"
+    write_sample_xml(xml_path)
+    cli.bundle(input=xml_path, out_dir=tmp_path / "xml", doc_id="jp_test_doc", contexts=True)
+    assert load_ir_contexts(
+        tmp_path / "xml" / "jp_test_doc.regdoc_contexts.json",
+        ir_yaml_path=tmp_path / "xml" / "jp_test_doc.regdoc_ir.yaml",
+    ).purposes == ["dq_gmp_checklist"]
+
+    input_path = tmp_path / "CFR_PART11_SubpartA.txt"
+    input_path.write_text(Path("tests/fixtures/CFR_PART11_SubpartA.txt").read_text(encoding="utf-8"), encoding="utf-8")
+    text2ir_cli.bundle(input=input_path, out_dir=tmp_path / "text", doc_id="part11", emit_only="all", contexts=True)
+    written = load_ir_contexts(tmp_path / "text" / "part11.regdoc_contexts.json")
+    assert any(written.context_nids("dq_gmp_checklist", nid) for nid in written.nids)
+    text2ir_cli.bundle(
+        input=input_path, out_dir=tmp_path / "plain", doc_id="part11", emit_only="all", write_manifest=False
+    )
+    assert not (tmp_path / "plain" / "part11.regdoc_contexts.json").exists()
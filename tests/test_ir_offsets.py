@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from qai_xml2ir import cli, load_ir, serialize
+from qai_xml2ir.ir_offsets import IRIndexReader, index_path_for, write_ir_index
+from qai_xml2ir.ir_sidecar import write_ir_jsonl
+from qai_xml2ir.models_ir import Node
+
+from test_bundle_gmp import write_sample_xml
+from test_ir_sidecar import _random_doc
+
+
+def _walk(root: Node) -> List[Tuple[Node, List[Node]]]:
+    out: List[Tuple[Node, List[Node]]] = []
+    stack: List[Tuple[Node, List[Node]]] = [(root, [])]
+    while stack:
+        node, ancestors = stack.pop()
+        out.append((node, ancestors))
+        stack.extend((child, [*ancestors, node]) for child in reversed(node.children))
+    return out
+
+
+def _shallow(node: Node) -> dict:
+    payload = node.to_dict()
+    payload["children"] = []
+    return payload
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_reader_fetches_nodes_ancestors_and_subtrees(tmp_path: Path, seed: int) -> None:
+    serialize._OVERWRITE_APPROVED = None
+    ir_doc = _random_doc(seed)
+    jsonl_path = tmp_path / "doc.regdoc_ir.jsonl"
+    write_ir_jsonl(jsonl_path, ir_doc)
+    index_path = index_path_for(jsonl_path)
+    write_ir_index(index_path, jsonl_path)
+    assert index_path.name == "doc.regdoc_ir.idx"
+
+    walked = _walk(ir_doc.content)
+    raw = jsonl_path.read_bytes()
+    with IRIndexReader(jsonl_path) as reader:
+        assert len(reader) == len(walked)
+        assert reader.header["doc_id"] == "doc"
+        for node, ancestors in walked:
+            assert node.nid in reader
+            assert _shallow(reader.node(node.nid)) == _shallow(node)
+            chain = reader.with_ancestors(node.nid)
+            assert [n.nid for n in chain] == [a.nid for a in ancestors] + [node.nid]
+            assert reader.parent(node.nid) == (ancestors[-1].nid if ancestors else None)
+            assert reader.children(node.nid) == [c.nid for c in node.children]
+            assert reader.subtree(node.nid).to_dict() == node.to_dict()
+            start, end = reader.byte_range(node.nid)
+            assert raw[start:end].startswith(b'{"nid":') and raw[end - 1 : end] == b"\n"
+        assert "missing" not in reader
+        with pytest.raises(KeyError):
+            reader.node("missing")
+
+
+def test_reader_rejects_stale_index(tmp_path: Path) -> None:
+    serialize._OVERWRITE_APPROVED = None
+    jsonl_path = tmp_path / "doc.regdoc_ir.jsonl"
+    write_ir_jsonl(jsonl_path, _random_doc(0))
+    write_ir_index(index_path_for(jsonl_path), jsonl_path)
+
+    serialize._OVERWRITE_APPROVED = True
+    write_ir_jsonl(jsonl_path, _random_doc(1))
+    with pytest.raises(ValueError, match="Stale"):
+        IRIndexReader(jsonl_path)
+
+
+def test_bundle_writes_offset_index(tmp_path: Path) -> None:
+    serialize._OVERWRITE_APPROVED = None
+    xml_path = tmp_path / "416M60000100179_20260501_507M60000100117.xml"
+    write_sample_xml(xml_path)
+    out_dir = tmp_path / "out"
+    cli.bundle(
+        input=xml_path,
+        out_dir=out_dir,
+        doc_id="jp_test_doc",
+        retrieved_at="2026-02-02",
+        emit_only="all",
+        sidecar="index",
+    )
+    assert (out_dir / "jp_test_doc.regdoc_ir.idx").exists()
+    ir_doc = load_ir(out_dir / "jp_test_doc.regdoc_ir.yaml", prefer_sidecar=False)
+    node, ancestors = _walk(ir_doc.content)[-1]
+    with IRIndexReader(out_dir / "jp_test_doc.regdoc_ir.jsonl") as reader:
+        chain = reader.with_ancestors(node.nid)
+    assert [n.nid for n in chain] == [a.nid for a in ancestors] + [node.nid]
+    assert chain[0].kind == "document"
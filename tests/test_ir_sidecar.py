@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import pytest
+
+from qai_xml2ir import cli, ir_sidecar, load_ir, serialize
+from qai_xml2ir.ir_sidecar import sidecar_path_for, write_ir_jsonl
+from qai_xml2ir.models_ir import IRDocument, build_root
+from qai_xml2ir.yaml_io import load_yaml
+
+from test_bundle_gmp import write_sample_xml
+from test_serialize_ir_stream import _node
+
+
+def _random_doc(seed: int) -> IRDocument:
+    rng = random.Random(seed)
+    root = build_root([_node(rng, f"n{i}", 0) for i in range(3)])
+    return IRDocument(doc_id="doc", content=root, index={"display_name_by_nid": {"n0": "第一条"}})
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sidecar_round_trips_ir_document(tmp_path: Path, seed: int) -> None:
+    serialize._OVERWRITE_APPROVED = None
+    ir_doc = _random_doc(seed)
+    ir_path = tmp_path / "doc.regdoc_ir.yaml"
+    serialize.write_ir_yaml(ir_path, ir_doc)
+    jsonl_path = sidecar_path_for(ir_path)
+    write_ir_jsonl(jsonl_path, ir_doc, ir_yaml_path=ir_path)
+
+    assert jsonl_path.name == "doc.regdoc_ir.jsonl"
+    assert load_ir(jsonl_path).to_dict() == ir_doc.to_dict()
+    assert load_ir(ir_path).to_dict() == ir_doc.to_dict()
+
+
+def test_load_ir_uses_sidecar_only_when_it_matches_the_yaml(tmp_path: Path, monkeypatch) -> None:
+    serialize._OVERWRITE_APPROVED = None
+    ir_doc = _random_doc(0)
+    ir_path = tmp_path / "doc.regdoc_ir.yaml"
+    serialize.write_ir_yaml(ir_path, ir_doc)
+    write_ir_jsonl(sidecar_path_for(ir_path), ir_doc, ir_yaml_path=ir_path)
+
+    def fail_yaml(*args, **kwargs):
+        raise AssertionError("YAML must not be parsed while the sidecar is fresh")
+
+    with monkeypatch.context() as m:
+        m.setattr(ir_sidecar, "load_yaml", fail_yaml)
+        assert load_ir(ir_path).doc_id == "doc"
+
+    # Editing the canonical YAML makes the sidecar stale.
+    ir_path.write_text(ir_path.read_text(encoding="utf-8").replace("doc_id: doc", "doc_id: edited"), encoding="utf-8")
+    assert load_ir(ir_path).doc_id == "edited"
+    assert load_ir(ir_path, prefer_sidecar=False).doc_id == "edited"
+
+
+def test_bundle_writes_sidecar_matching_yaml(tmp_path: Path) -> None:
+    xml_path = tmp_path / "416M60000100179_20260501_507M60000100117.xml"
+    write_sample_xml(xml_path)
+    out_dir = tmp_path / "out"
+    cli.bundle(
+        input=xml_path,
+        out_dir=out_dir,
+        doc_id="jp_test_doc",
+        retrieved_at="2026-02-02",
+        emit_only="all",
+        sidecar="jsonl",
+    )
+    ir_path = out_dir / "jp_test_doc.regdoc_ir.yaml"
+    jsonl_path = out_dir / "jp_test_doc.regdoc_ir.jsonl"
+    assert jsonl_path.exists()
+    with ir_path.open("r", encoding="utf-8") as f:
+        assert load_ir(jsonl_path).to_dict() == load_yaml(f)
+
+
+def test_sidecar_rejects_truncated_file(tmp_path: Path) -> None:
+    serialize._OVERWRITE_APPROVED = None
+    path = tmp_path / "doc.regdoc_ir.jsonl"
+    write_ir_jsonl(path, _random_doc(1))
+    text = path.read_text(encoding="utf-8")
+    path.write_text(text.rstrip("\n").rsplit("\n", 1)[0] + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Truncated"):
+        load_ir(path)
@@ -302,6 +302,20 @@ def test_ir_structure(tmp_path: Path) -> None:
     assert all(n.num != "第十三条" for n in articles)
 
 
+def test_streaming_parse_matches_in_memory_parse(tmp_path: Path) -> None:
+    xml_path = tmp_path / "416M60000100179_20260501_507M60000100117.xml"
+    write_sample_xml(xml_path)
+    parsed = parse_egov_xml(xml_path)
+    streamed = parse_egov_xml(xml_path, streaming=True)
+
+    assert streamed.title == parsed.title == "テスト法"
+    assert streamed.law_number == parsed.law_number
+    assert streamed.law_id == parsed.law_id
+    assert streamed.as_of == parsed.as_of
+    assert streamed.revision_id == parsed.revision_id
+    assert streamed.root.to_dict() == parsed.root.to_dict()
+
+
 def test_appendix_scoped_indexing(tmp_path: Path) -> None:
     xml = """<?xml version="1.0" encoding="UTF-8"?>
 <Law>
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from qai_text2ir.profile_loader import load_parser_profile
+from qai_text2ir.text_parser import REFINE_PARALLEL_MIN_LINES, _resolve_refine_workers, parse_text_to_ir
+
+
+def test_parallel_refinement_matches_serial_output() -> None:
+    input_path = Path("tests/fixtures/pics_annexes_refine_fallback_excerpt.txt")
+    profile = load_parser_profile(path=Path("src/qai_text2ir/profiles/pics_annexes_default_v3.yaml"))
+
+    serial = parse_text_to_ir(
+        input_path=input_path, doc_id="d", parser_profile=profile, refine_workers=1
+    ).to_dict()
+    parallel = parse_text_to_ir(
+        input_path=input_path, doc_id="d", parser_profile=profile, refine_workers=2
+    ).to_dict()
+
+    assert parallel == serial
+    refined = [n for n in serial["content"]["children"] if any(t.startswith("refined_by=") for t in n["tags"])]
+    assert len(refined) >= 2
+
+
+def test_refine_workers_resolution() -> None:
+    small = [{"lines": ["x"]}, {"lines": ["y"]}]
+    large = [{"lines": ["x"] * REFINE_PARALLEL_MIN_LINES}, {"lines": ["y"]}, {"lines": ["z"]}]
+    assert _resolve_refine_workers(1, large) == 1
+    assert _resolve_refine_workers(8, large[:1]) == 1
+    assert _resolve_refine_workers(8, large) == 3
+    assert _resolve_refine_workers(2, small) == 2
+    assert _resolve_refine_workers(None, large) == 1
+    assert _resolve_refine_workers(0, small) == 1
+    assert _resolve_refine_workers(0, large) == min(os.cpu_count() or 1, 3)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import pytest
+import yaml
+
+from qai_xml2ir import serialize
+from qai_xml2ir.models_ir import IRDocument, Node, build_root
+
+
+TRICKY_STRINGS = [
+    "",
+    " ",
+    "plain text",
+    "第一条　本文",
+    "123",
+    "1.5",
+    "true",
+    "null",
+    "~",
+    "yes",
+    "- dash",
+    "key: value",
+    "trailing space ",
+    " leading space",
+    "hash # inside",
+    "#comment",
+    "quote ' inside",
+    'double " inside',
+    "line one\nline two",
+    "para\n\nafter blank\n",
+    "\nstarts with break",
+    "sep\u2028unicode line separator",
+    "para\u2029sep",
+    "tab\tinside",
+    "bell\x07control",
+    "bom\ufeff",
+    "next\x85line",
+    "&anchor",
+    "*alias",
+    "!tag",
+    "%percent",
+    "@at",
+    "`tick",
+    "{flow}",
+    "[flow]",
+    "a" * 200,
+    "x: " + "b" * 140,
+]
+
+
+def _node(rng: random.Random, nid: str, depth: int) -> Node:
+    text = rng.choice(TRICKY_STRINGS + [None])
+    node = Node(
+        nid=nid,
+        kind=rng.choice(["article", "paragraph", "item"]),
+        kind_raw=rng.choice([None, "Article"]),
+        num=rng.choice([None, "1", "2-3", "01"]),
+        ord=rng.choice([None, 0, 7]),
+        heading=rng.choice(TRICKY_STRINGS + [None]),
+        text=text,
+        role=rng.choice(["structural", "normative"]),
+        normativity=None,
+        tags=rng.sample(TRICKY_STRINGS, k=rng.randint(0, 3)),
+        refs={"internal": [rng.choice(TRICKY_STRINGS)] if rng.random() < 0.3 else [], "external": []},
+        source_spans=[{"start": "1", "end": rng.choice([None, "x\ny"])}] if rng.random() < 0.5 else [],
+    )
+    if rng.random() < 0.4:
+        node.data = {
+            "table": {
+                "rows": [[rng.choice(TRICKY_STRINGS) for _ in range(2)] for _ in range(2)],
+                "empty_list": [],
+                "empty_map": {},
+                "nested": [{}, [], {"k": [1, True, None, 2.5]}],
+            },
+            rng.choice(TRICKY_STRINGS[1:]): rng.choice(TRICKY_STRINGS),
+        }
+    if depth < 3:
+        node.children = [_node(rng, f"{nid}.{i}", depth + 1) for i in range(rng.randint(0, 3))]
+    return node
+
+
+def _assert_same_bytes(tmp_path: Path, doc: IRDocument) -> None:
+    serialize._OVERWRITE_APPROVED = None
+    streamed = tmp_path / "streamed.yaml"
+    reference = tmp_path / "reference.yaml"
+    streamed.unlink(missing_ok=True)
+    reference.unlink(missing_ok=True)
+    serialize.write_ir_yaml(streamed, doc)
+    serialize.write_yaml(reference, doc.to_dict())
+    assert streamed.read_bytes() == reference.read_bytes()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_write_ir_yaml_matches_write_yaml_bytes(tmp_path: Path, seed: int) -> None:
+    rng = random.Random(seed)
+    root = build_root([_node(rng, f"n{i}", 0) for i in range(4)])
+    index = {"display_name_by_nid": {f"n{i}": rng.choice(TRICKY_STRINGS) for i in range(4)}}
+    _assert_same_bytes(tmp_path, IRDocument(doc_id="doc", content=root, index=index))
+
+
+def test_write_ir_yaml_falls_back_for_shared_and_complex_values(tmp_path: Path) -> None:
+    shared = {"internal": ["x"], "external": []}
+    a = Node("a", "item", None, None, None, None, "a", "normative", None, refs=shared)
+    b = Node("b", "item", None, None, None, None, "b", "normative", None, refs=shared)
+    _assert_same_bytes(tmp_path, IRDocument(doc_id="shared", content=build_root([a, b])))
+
+    long_key = Node("c", "item", None, None, None, None, "c", "normative", None, data={"k" * 130: "v"})
+    _assert_same_bytes(tmp_path, IRDocument(doc_id="long_key", content=build_root([long_key])))
+
+
+def test_write_ir_yaml_falls_back_when_emitter_internals_change(tmp_path: Path, monkeypatch) -> None:
+    def changed_emitter(self, data, *, simple_key):
+        raise AttributeError("'SafeDumper' object has no attribute 'process_scalar'")
+
+    monkeypatch.setattr(serialize._ScalarRenderer, "_render", changed_emitter)
+    rng = random.Random(0)
+    _assert_same_bytes(tmp_path, IRDocument(doc_id="doc", content=build_root([_node(rng, "n0", 0)])))
+
+
+def test_write_ir_yaml_reproduces_normalized_ir_file(tmp_path: Path) -> None:
+    doc_id = "jp_egov_416M60000100179_20260501_507M60000100117"
+    source = Path("data/normalized") / doc_id / f"{doc_id}.regdoc_ir.yaml"
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    ir_doc = IRDocument.from_dict(yaml.load(source.read_text(encoding="utf-8"), Loader=loader))
+
+    serialize._OVERWRITE_APPROVED = None
+    out = tmp_path / source.name
+    serialize.write_ir_yaml(out, ir_doc)
+    assert out.read_bytes() == source.read_bytes()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import shutil
+from pathlib import Path
+
+from qai_xml2ir import serialize
+from qai_xml2ir.context_display import resolve_context_nodes
+from qai_xml2ir.ir_contexts import contexts_path_for, write_ir_contexts
+from qai_xml2ir.serve import BundleStore, LookupHandler, LookupServer
+from qai_xml2ir.yaml_io import load_yaml
+
+BUNDLE_DIR = Path("data/normalized/jp_egov_336M50000100002_20260501_507M60000100117")
+DOC_ID = "jp_egov_336M50000100002_20260501_507M60000100117"
+
+
+def _store(tmp_path: Path) -> BundleStore:
+    shutil.copytree(BUNDLE_DIR, tmp_path / DOC_ID)
+    (tmp_path / "broken").mkdir()
+    (tmp_path / "broken" / "broken.meta.yaml").write_text("schema: qai.regdoc_meta.v1\n", encoding="utf-8")
+    return BundleStore([tmp_path])
+
+
+def _get(handler: LookupHandler, target: str):
+    status, body = handler("GET", target)
+    return status, json.loads(body)
+
+
+def test_lookups_match_ir(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+    summary = store.refresh()
+    assert summary["loaded"] == [DOC_ID] and list(summary["failed"]) == [str(tmp_path / "broken" / "broken.meta.yaml")]
+    handler = LookupHandler(store)
+    bundle = store.bundles[DOC_ID]
+    root = bundle.ir_doc.content
+    purpose_profile = bundle.purpose_profiles["dq_gmp_checklist"]
+    selected = next(node for node in bundle.index.nodes if node.kind == "item")
+
+    status, node = _get(handler, f"/docs/{DOC_ID}/nodes/{selected.nid}")
+    assert status == 200
+    assert node["text"] == selected.text and node["parent"] == bundle.index.parent(selected.nid).nid
+    assert node["display_name"] == bundle.display_names.get(selected.nid)
+    _, ancestors = _get(handler, f"/docs/{DOC_ID}/nodes/{selected.nid}/ancestors")
+    assert [a["nid"] for a in ancestors] == [a.nid for a in bundle.index.ancestors(selected.nid)]
+    for _ in range(2):
+        _, context = _get(handler, f"/docs/{DOC_ID}/nodes/{selected.nid}/context")
+        assert context["purpose"] == "dq_gmp_checklist"
+        assert [n["nid"] for n in context["nodes"]] == [
+            n.nid for n in resolve_context_nodes(root, selected.nid, purpose_profile)
+        ]
+    assert store.cache.stats()["hits"] == 1
+    _, names = _get(handler, f"/docs/{DOC_ID}/display_names")
+    assert names == bundle.ir_doc.index["display_name_by_nid"]
+
+    assert _get(handler, "/docs/missing")[0] == 404
+    assert _get(handler, f"/docs/{DOC_ID}/nodes/missing")[0] == 404
+    assert _get(handler, f"/docs/{DOC_ID}/nodes/{selected.nid}/context?purpose=other")[0] == 404
+    assert handler("DELETE", "/docs")[0] == 405
+
+
+def test_context_served_from_contexts_file(tmp_path: Path, monkeypatch) -> None:
+    store = _store(tmp_path)
+    store.refresh()
+    bundle = store.bundles[DOC_ID]
+    ir_path = tmp_path / DOC_ID / f"{DOC_ID}.regdoc_ir.yaml"
+    with (tmp_path / DOC_ID / f"{DOC_ID}.regdoc_profile.yaml").open("r", encoding="utf-8") as f:
+        regdoc_profile = load_yaml(f)
+    write_ir_contexts(contexts_path_for(ir_path), bundle.ir_doc, regdoc_profile, ir_yaml_path=ir_path)
+    with (tmp_path / DOC_ID / f"{DOC_ID}.meta.yaml").open("a", encoding="utf-8") as f:
+        f.write("# contexts added\n")
+    store.refresh()
+    bundle = store.bundles[DOC_ID]
+    assert bundle.contexts is not None
+    handler = LookupHandler(store)
+    root = bundle.ir_doc.content
+    purpose_profile = bundle.purpose_profiles["dq_gmp_checklist"]
+    selectable = set(purpose_profile["selectable_kinds"])
+    selected = [node.nid for node in bundle.index.nodes if node.kind in selectable][:20]
+    for nid in selected:
+        _, context = _get(handler, f"/docs/{DOC_ID}/nodes/{nid}/context")
+        expected = [n.nid for n in resolve_context_nodes(root, nid, purpose_profile)]
+        assert [n["nid"] for n in context["nodes"]] == expected
+    assert store.cache.stats()["misses"] == 0
+
+    # Nodes the file does not cover are still resolved.
+    _, context = _get(handler, f"/docs/{DOC_ID}/nodes/root/context")
+    assert [n["nid"] for n in context["nodes"]] == ["root"]
+    assert store.cache.stats()["misses"] == 1
+
+    # A file computed from another regdoc profile is ignored.
+    monkeypatch.setattr(serialize, "_OVERWRITE_APPROVED", True)
+    changed = {**regdoc_profile, "profiles": {"dq_gmp_checklist": {**purpose_profile, "grouping_policy": []}}}
+    write_ir_contexts(contexts_path_for(ir_path), bundle.ir_doc, changed, ir_yaml_path=ir_path)
+    with (tmp_path / DOC_ID / f"{DOC_ID}.meta.yaml").open("a", encoding="utf-8") as f:
+        f.write("# stale contexts\n")
+    store.refresh()
+    assert store.bundles[DOC_ID].contexts is None
+
+
+def test_reload_on_meta_change(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+    store.refresh()
+    before = store.bundles[DOC_ID]
+    handler = LookupHandler(store)
+    nid = next(node.nid for node in before.index.nodes if node.kind == "item")
+    _get(handler, f"/docs/{DOC_ID}/nodes/{nid}/context")
+    assert store.refresh() == {"loaded": [], "reloaded": [], "dropped": [], "failed": {}}
+    assert store.bundles[DOC_ID] is before
+
+    ir_path = tmp_path / DOC_ID / f"{DOC_ID}.regdoc_ir.yaml"
+    ir_text = ir_path.read_text(encoding="utf-8")
+    ir_path.write_text(ir_text.replace(f"nid: {nid}\n", f"nid: {nid}x\n", 1), encoding="utf-8")
+    meta_path = tmp_path / DOC_ID / f"{DOC_ID}.meta.yaml"
+    with meta_path.open("a", encoding="utf-8") as f:
+        f.write("# regenerated\n")
+    assert store.refresh()["reloaded"] == [DOC_ID]
+    assert len(store.cache) == 0
+    assert _get(handler, f"/docs/{DOC_ID}/nodes/{nid}")[0] == 404
+    assert _get(handler, f"/docs/{DOC_ID}/nodes/{nid}x")[0] == 200
+
+    shutil.rmtree(tmp_path / DOC_ID)
+    assert store.refresh()["dropped"] == [DOC_ID]
+    assert store.bundles == {}
+
+
+def test_http_keep_alive(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+
+    async def run() -> list:
+        server = await LookupServer(store, poll_interval=0).start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        responses = []
+        for request in (
+            f"GET /docs/{DOC_ID} HTTP/1.1\r\n\r\n",
+            "POST /reload HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}",
+            "GET /stats HTTP/1.1\r\nConnection: close\r\n\r\n",
+        ):
+            writer.write(request.encode("latin-1"))
+            status = (await reader.readline()).split()[1]
+            headers = {}
+            while (line := await reader.readline()) != b"\r\n":
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.lower()] = value.strip()
+            body = json.loads(await reader.readexactly(int(headers["content-length"])))
+            responses.append((int(status), headers["connection"], body))
+        assert await reader.read() == b""
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return responses
+
+    (doc, doc_conn, doc_body), (reload_status, _, reloaded), (_, stats_conn, stats) = asyncio.run(run())
+    assert doc == 200 and doc_conn == "keep-alive" and doc_body["doc_id"] == DOC_ID
+    assert reload_status == 200 and reloaded["loaded"] == [] and reloaded["failed"] == {}
+    assert stats_conn == "close" and stats["bundles"] == 1
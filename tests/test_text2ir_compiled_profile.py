@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+
+from qai_text2ir import profile_loader
+from qai_text2ir.profile_loader import (
+    CompiledProfile,
+    clear_compiled_profiles,
+    compile_parser_profile,
+    load_parser_profile,
+)
+from qai_text2ir.text_parser import parse_text_to_ir
+
+ANNEXES_PROFILE = Path("src/qai_text2ir/profiles/pics_annexes_default_v3.yaml")
+ANNEXES_FIXTURE = Path("tests/fixtures/pics_annexes_refine_fallback_excerpt.txt")
+
+
+def test_compiled_profile_is_cached_by_resolved_digest() -> None:
+    clear_compiled_profiles()
+    profile = load_parser_profile(profile_id="us_cfr_default_v2")
+    compiled = compile_parser_profile(profile)
+    assert isinstance(compiled, CompiledProfile)
+    assert compile_parser_profile(load_parser_profile(profile_id="us_cfr_default_v2")) is compiled
+
+    # The cache holds its own copy: editing the caller's dict yields a new digest.
+    profile["structural_kinds"] = ["part"]
+    edited = compile_parser_profile(profile)
+    assert edited is not compiled
+    assert "subpart" in compiled.structural_kinds and "subpart" not in edited.structural_kinds
+    assert compiled.child_kinds("document") == frozenset(compiled.profile["structure"]["root"]["children"])
+
+
+def test_compiled_profile_lru_evicts_least_recently_used(monkeypatch) -> None:
+    clear_compiled_profiles()
+    monkeypatch.setattr(profile_loader, "COMPILED_PROFILE_CACHE_SIZE", 2)
+    first = compile_parser_profile({"id": "a"})
+    compile_parser_profile({"id": "b"})
+    assert compile_parser_profile({"id": "a"}) is first
+    compile_parser_profile({"id": "c"})
+    assert compile_parser_profile({"id": "a"}) is first
+    assert len(profile_loader._COMPILED_PROFILES) == 2
+
+
+def test_refinement_compiles_each_sub_profile_once(monkeypatch) -> None:
+    clear_compiled_profiles()
+    built: Counter = Counter()
+    original = profile_loader._build_compiled_profile
+
+    def counting(profile, digest):
+        built[profile.get("id")] += 1
+        return original(profile, digest)
+
+    monkeypatch.setattr(profile_loader, "_build_compiled_profile", counting)
+    profile = load_parser_profile(path=ANNEXES_PROFILE)
+    first = parse_text_to_ir(input_path=ANNEXES_FIXTURE, doc_id="d", parser_profile=profile).to_dict()
+    second = parse_text_to_ir(
+        input_path=ANNEXES_FIXTURE, doc_id="d", parser_profile=compile_parser_profile(profile)
+    ).to_dict()
+
+    assert first == second
+    assert len(built) >= 2
+    assert set(built.values()) == {1}
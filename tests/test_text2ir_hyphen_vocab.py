@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from qai_text2ir.hyphen_vocab import (
+    corpus_sources,
+    load_hyphen_vocabulary,
+    refresh_hyphen_vocabulary,
+    stale_hyphen_sources,
+)
+from qai_text2ir.profile_loader import load_parser_profile
+from qai_text2ir.text_parser import parse_text_to_ir
+
+from test_text2ir_normalization import _flatten
+
+
+def _write(path: Path, text: str) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8", newline="\n")
+    return path
+
+
+def test_refresh_rescans_only_changed_sources(tmp_path: Path) -> None:
+    corpus = tmp_path / "corpus"
+    _write(corpus / "a.txt", "Avoid cross-contamination of sterile products.")
+    _write(corpus / "b.md", "Self-inspection is performed.")
+    _write(corpus / "ignored.pdf", "not-scanned words")
+    store = tmp_path / "vocab.txt"
+
+    vocab, stats = refresh_hyphen_vocabulary(store, corpus_sources([corpus]))
+    assert stats == {"scanned": 2, "kept": 0, "removed": 0}
+    assert vocab.hyphen_words == {"cross-contamination", "self-inspection"}
+    assert {"avoid", "sterile", "inspection"} <= vocab.plain_words
+    assert load_hyphen_vocabulary(store) == vocab
+
+    again, stats = refresh_hyphen_vocabulary(store, corpus_sources([corpus]))
+    assert stats == {"scanned": 0, "kept": 2, "removed": 0}
+    assert again == vocab
+
+    _write(corpus / "a.txt", "Time-stamped records.")
+    (corpus / "b.md").unlink()
+    updated, stats = refresh_hyphen_vocabulary(store, corpus_sources([corpus]))
+    assert stats == {"scanned": 1, "kept": 0, "removed": 1}
+    assert updated.hyphen_words == {"time-stamped"}
+    assert "sterile" not in updated.plain_words
+    assert updated.corpus_digest != vocab.corpus_digest
+    assert load_hyphen_vocabulary(store) == updated
+
+
+def test_stale_sources_are_found_from_any_working_directory(tmp_path: Path, monkeypatch) -> None:
+    repo = tmp_path / "repo"
+    corpus = repo / "data" / "corpus"
+    _write(corpus / "a.txt", "Avoid cross-contamination.")
+    _write(corpus / "b.txt", "Self-inspection.")
+    store = repo / "out" / "vocab.txt"
+    monkeypatch.chdir(repo)
+    refresh_hyphen_vocabulary(store, corpus_sources([Path("data/corpus")]), roots=[Path("data/corpus")])
+    assert '"sources":[["data/corpus/a.txt",' in store.read_text(encoding="utf-8").splitlines()[0]
+
+    monkeypatch.chdir(tmp_path)
+    assert stale_hyphen_sources(store) == []
+    _write(corpus / "a.txt", "Time-stamped records.")
+    (corpus / "b.txt").unlink()
+    _write(corpus / "c.md", "New-source.")
+    assert stale_hyphen_sources(store) == ["data/corpus/a.txt", "data/corpus/b.txt", "data/corpus/c.md"]
+
+    # A refresh from another working directory with the same base rescans only what changed.
+    _, stats = refresh_hyphen_vocabulary(store, corpus_sources([corpus]), roots=[corpus], base=repo)
+    assert stats == {"scanned": 2, "kept": 0, "removed": 1}
+    assert stale_hyphen_sources(store) == []
+
+
+def test_load_rejects_foreign_files(tmp_path: Path) -> None:
+    bogus = _write(tmp_path / "vocab.txt", '{"schema": "other"}\n')
+    with pytest.raises(ValueError, match="Not a hyphenation vocabulary"):
+        load_hyphen_vocabulary(bogus)
+
+
+def test_parse_consults_corpus_vocabulary(tmp_path: Path) -> None:
+    corpus = tmp_path / "corpus"
+    _write(corpus / "gmp.txt", "Measures against cross-contamination.")
+    vocab, _ = refresh_hyphen_vocabulary(tmp_path / "vocab.txt", corpus_sources([corpus]))
+    input_path = _write(tmp_path / "short.txt", "§ 11.10 Controls.\n(a) Prevent cross-\ncontamination.")
+    profile = load_parser_profile(family="US_CFR")
+
+    def _paragraph_text(**kwargs) -> str:
+        ir = parse_text_to_ir(input_path=input_path, doc_id="short", parser_profile=profile, **kwargs).to_dict()
+        return next(n for n in _flatten(ir["content"]) if n["kind"] == "paragraph")["text"]
+
+    assert _paragraph_text() == "Prevent crosscontamination."
+    assert _paragraph_text(hyphen_vocabulary=vocab) == "Prevent cross-contamination."
+
+
+def test_text2ir_warns_about_stale_vocabulary(tmp_path: Path, capsys) -> None:
+    from qai_text2ir import cli
+
+    corpus = tmp_path / "corpus"
+    _write(corpus / "gmp.txt", "Measures against cross-contamination.")
+    store = tmp_path / "vocab.txt"
+    refresh_hyphen_vocabulary(store, corpus_sources([corpus]), roots=[corpus])
+    _write(corpus / "gmp.txt", "Measures against mix-ups.")
+    input_path = _write(tmp_path / "short.txt", "§ 11.10 Controls.\n(a) Prevent cross-\ncontamination.")
+    cli.bundle(
+        input=input_path,
+        out_dir=tmp_path / "out",
+        doc_id="short",
+        family="US_CFR",
+        emit_only="regdoc_ir",
+        write_manifest=False,
+        hyphen_vocab_path=store,
+    )
+    assert "[hyphen-vocab] 1 source(s) changed" in capsys.readouterr().err
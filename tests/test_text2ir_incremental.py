@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from qai_text2ir import cli
+from qai_text2ir.incremental import (
+    load_incremental_state,
+    parse_text_to_ir_incremental,
+    save_incremental_state,
+)
+from qai_text2ir.profile_loader import compile_parser_profile, load_parser_profile
+from qai_text2ir.text_parser import parse_text_to_ir
+
+
+def _write(path: Path, lines: List[str]) -> Path:
+    path.write_text("\n".join(lines), encoding="utf-8", newline="\n")
+    return path
+
+
+def _edit(lines: List[str], rng: random.Random) -> None:
+    pos = rng.randrange(len(lines))
+    op = rng.choice(["word", "insert", "delete", "copy"])
+    if op == "word":
+        lines[pos] = lines[pos] + " amended"
+    elif op == "insert":
+        lines.insert(pos, "An inserted sentence.")
+    elif op == "delete":
+        del lines[pos]
+    else:
+        lines.insert(pos, lines[rng.randrange(len(lines))])
+
+
+@pytest.mark.parametrize(
+    ("profile_id", "source"),
+    [
+        ("pics_part1_default_v3", "data/human-readable/pics/pe009-17_part1_2023-08-25_en.txt"),
+        ("who_lbm_3rd_default_v4", "data/human-readable/who/WHO_LBM_3rd.txt"),
+    ],
+)
+def test_random_edits_match_full_parse(tmp_path: Path, profile_id: str, source: str) -> None:
+    compiled = compile_parser_profile(load_parser_profile(profile_id=profile_id))
+    lines = Path(source).read_text(encoding="utf-8").splitlines()
+    input_path = _write(tmp_path / "doc.txt", lines)
+    ir, state, stats = parse_text_to_ir_incremental(input_path=input_path, doc_id="d", parser_profile=compiled)
+    assert ir.to_dict() == parse_text_to_ir(input_path=input_path, doc_id="d", parser_profile=compiled).to_dict()
+    assert stats["reused"] == 0 and stats["regions"] > 5
+
+    rng = random.Random(20)
+    reused = 0
+    for _ in range(8):
+        _edit(lines, rng)
+        _write(input_path, lines)
+        ir, state, stats = parse_text_to_ir_incremental(
+            input_path=input_path, doc_id="d", parser_profile=compiled, previous=state
+        )
+        full = parse_text_to_ir(input_path=input_path, doc_id="d", parser_profile=compiled)
+        assert ir.to_dict() == full.to_dict()
+        assert stats["parsed_lines"] < len(lines)
+        reused += stats["reused"]
+    assert reused > 0
+
+
+def test_state_round_trip_and_line_map(tmp_path: Path) -> None:
+    profile = load_parser_profile(path=Path("src/qai_text2ir/profiles/pics_annexes_default_v2.yaml"))
+    lines = Path("tests/fixtures/pics_annexes_refine_excerpt.txt").read_text(encoding="utf-8").splitlines()
+    input_path = _write(tmp_path / "annexes.txt", lines)
+    _, state, _ = parse_text_to_ir_incremental(input_path=input_path, doc_id="d", parser_profile=profile)
+    store = tmp_path / "state.json"
+    save_incremental_state(store, state)
+    loaded = load_incremental_state(store)
+    assert loaded.to_dict() == state.to_dict()
+
+    last = loaded.regions[-1]
+    assert loaded.region_at(last.start + 1) is last
+    assert loaded.region_at(len(lines)) is last
+
+    lines.append("Text added at the end.")
+    _write(input_path, lines)
+    ir, _, stats = parse_text_to_ir_incremental(
+        input_path=input_path, doc_id="d", parser_profile=profile, previous=loaded
+    )
+    assert ir.to_dict() == parse_text_to_ir(input_path=input_path, doc_id="d", parser_profile=profile).to_dict()
+    assert stats["reused"] == len(loaded.regions) - 1
+    assert stats["refined_reused"] > 0
+
+    other = load_parser_profile(path=Path("src/qai_text2ir/profiles/pics_annexes_default_v3.yaml"))
+    _, _, stats = parse_text_to_ir_incremental(input_path=input_path, doc_id="d", parser_profile=other, previous=loaded)
+    assert stats["reused"] == 0
+
+
+def test_load_rejects_foreign_files(tmp_path: Path) -> None:
+    bogus = tmp_path / "state.json"
+    bogus.write_text('{"schema": "other"}', encoding="utf-8")
+    with pytest.raises(ValueError, match="Not a text2ir incremental state"):
+        load_incremental_state(bogus)
+
+
+def test_bundle_keeps_incremental_state(tmp_path: Path) -> None:
+    input_path = tmp_path / "CFR_PART11_SubpartA.txt"
+    input_path.write_text(
+        Path("tests/fixtures/CFR_PART11_SubpartA.txt").read_text(encoding="utf-8"), encoding="utf-8", newline="\n"
+    )
+    store = tmp_path / "state" / "part11.json"
+    outputs = []
+    for run in ("first", "second"):
+        out_dir = tmp_path / run
+        cli.bundle(
+            input=input_path,
+            out_dir=out_dir,
+            doc_id="part11",
+            emit_only="regdoc_ir",
+            write_manifest=False,
+            incremental_state_path=store,
+        )
+        outputs.append((out_dir / "part11.regdoc_ir.yaml").read_text(encoding="utf-8"))
+    assert store.exists()
+    assert outputs[0] == outputs[1]
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import pytest
+
+from qai_text2ir import text_parser
+from qai_text2ir.preprocess import InlineStripper, PreparedLine
+from qai_text2ir.profile_loader import load_parser_profile
+from qai_text2ir.text_parser import (
+    _collect_md_table_block,
+    _collect_note_block,
+    _collect_table_notes,
+    _find_table_caption,
+    _LineBuffer,
+    _LineSource,
+    _MarkerMatcher,
+    parse_text_to_ir,
+)
+
+LINES = [
+    "Table 1: Limits [p. 3]",
+    "| Grade | Limit | [p. 3]",
+    "|---|---|",
+    "| A | 1 |",
+    "| B | 10 |",
+    "Note: values per m3",
+    "  measured at rest",
+    "1. Next clause",
+]
+
+
+def _prepared(lines, regexes=()):
+    stripper = InlineStripper(regexes) if regexes else None
+    return (PreparedLine(line, stripper) for line in lines)
+
+
+class _CountingPattern:
+    def __init__(self, pattern: re.Pattern[str]) -> None:
+        self.pattern = pattern.pattern
+        self.flags = pattern.flags
+        self._compiled = pattern
+        self.calls: list = []
+
+    def sub(self, repl: str, text: str) -> str:
+        self.calls.append(text)
+        return self._compiled.sub(repl, text)
+
+
+def _buffer(lines=LINES, page_pattern=None) -> _LineBuffer:
+    matcher = _MarkerMatcher([({"kind": "paragraph"}, re.compile(r"^(?P<n>\d+)\.\s+"))])
+    return _LineBuffer(_prepared(lines, [page_pattern or re.compile(r"\s*\[p\. \d+\]")]), matcher)
+
+
+def test_line_buffer_strips_inline_patterns_once_where_present() -> None:
+    page_pattern = _CountingPattern(re.compile(r"\s*\[p\. \d+\]"))
+    buffer = _buffer(page_pattern=page_pattern)
+    assert page_pattern.calls == []
+    assert buffer.has(len(LINES) - 1) and not buffer.has(len(LINES))
+    # Lines without the required literal "[p. " skip the substitution entirely.
+    assert page_pattern.calls == LINES[:2]
+    assert buffer.stripped(0) == "Table 1: Limits"
+    assert buffer.stripped(1) == "| Grade | Limit |"
+
+    table = _collect_md_table_block(buffer, 1)
+    assert table is not None
+    assert table["header_line"] == "| Grade | Limit |"
+    assert table["rows"] == [(3, "| A | 1 |"), (4, "| B | 10 |")]
+    assert _find_table_caption(buffer, 1) == (0, "Table 1: Limits")
+    notes, end_idx = _collect_table_notes(buffer, table["end_idx"], [], set())
+    assert notes == [(5, "Note: values per m3"), (6, "measured at rest")]
+    assert end_idx == 7
+    assert page_pattern.calls == LINES[:2]
+
+
+def test_line_buffer_flags_and_consumed_lines() -> None:
+    buffer = _buffer()
+    assert buffer.is_table_header(1) and not buffer.is_table_separator(1)
+    assert buffer.is_table_separator(2) and not buffer.is_table_header(2)
+    assert buffer.starts_with_marker(7) and not buffer.starts_with_marker(5)
+    assert buffer.is_indented(6) and buffer.raw_indent(6) == 2
+
+    start = [re.compile(r"^Note:")]
+    notes, _ = _collect_note_block(
+        buffer, 5, drop_line_regexes=[], drop_line_exact=set(), start_patterns=start, max_lines=5
+    )
+    assert [idx for idx, _ in notes] == [5, 6]
+
+    for idx in (1, 2, 3, 4):
+        buffer.consume(idx)
+    assert buffer.is_consumed(1) and not buffer.is_consumed(5)
+    assert buffer.is_blank(1) and buffer.stripped(1) == "" and not buffer.is_table_header(1)
+    assert _collect_md_table_block(buffer, 1) is None
+
+
+def test_released_lines_keep_caption_lookup_and_pinned_prefix(monkeypatch) -> None:
+    monkeypatch.setattr(text_parser, "LINE_BUFFER_RELEASE_BATCH", 4)
+    lines = ["Table 2: Pinned", "| a | b |", "|---|---|", "Table 3: Later", "", "", "", "", "| c | d |", "|---|---|"]
+    buffer = _LineBuffer(_prepared(lines), _MarkerMatcher([]), pinned=2)
+    assert buffer.has(len(lines) - 1)
+    buffer.release(8)
+    with pytest.raises(IndexError):
+        buffer.stripped(3)
+    assert buffer.stripped(0) == "Table 2: Pinned" and buffer.is_table_header(1)
+    assert _find_table_caption(buffer, 8) == (3, "Table 3: Later")
+    assert _find_table_caption(buffer, 1) == (0, "Table 2: Pinned")
+
+
+@pytest.mark.parametrize("chunk_chars", [1, 3, 7, 1 << 16])
+def test_line_source_splits_like_splitlines(tmp_path: Path, monkeypatch, chunk_chars: int) -> None:
+    monkeypatch.setattr(text_parser, "STREAM_READ_CHUNK_CHARS", chunk_chars)
+    text = "alpha\r\nbeta\rgamma\n\r\n\u2028delta\x0cend\r\n\r\nlast"
+    path = tmp_path / "input.txt"
+    path.write_bytes(text.encode("utf-8"))
+    source = _LineSource(path)
+    assert list(source) == path.read_text(encoding="utf-8").splitlines()
+    assert source.line_count == len(path.read_text(encoding="utf-8").splitlines())
+    assert source.slices([(1, 3), (0, 2), (6, 9)]) == [
+        path.read_text(encoding="utf-8").splitlines()[start:end] for start, end in [(1, 3), (0, 2), (6, 9)]
+    ]
+
+
+def test_streaming_parse_keeps_a_bounded_window(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(text_parser, "LINE_BUFFER_RELEASE_BATCH", 64)
+    monkeypatch.setattr(text_parser, "STREAM_READ_CHUNK_CHARS", 512)
+    body = []
+    for section in range(1, 401):
+        body += [f"\u00a7 11.{section} Controls {section}.", f"(a) Keep records for item {section}.", ""]
+    path = tmp_path / "long.txt"
+    path.write_text("\n".join(body), encoding="utf-8")
+
+    peak = []
+    original = _LineBuffer.release
+
+    def tracking(self, upto):
+        original(self, upto)
+        peak.append(len(self._raw))
+
+    monkeypatch.setattr(_LineBuffer, "release", tracking)
+    profile = load_parser_profile(family="US_CFR")
+    streamed = parse_text_to_ir(input_path=path, doc_id="long", parser_profile=profile).to_dict()
+    listed = parse_text_to_ir(
+        input_path=path, doc_id="long", parser_profile=profile, lines_override=body
+    ).to_dict()
+    assert streamed == listed
+    assert len(body) == 1200 and max(peak) <= 64 + 2 + len(profile.get("skip_blocks") or [])
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import pytest
+
+from qai_text2ir.profile_loader import load_parser_profile
+from qai_text2ir.text_parser import _compile_markers, _first_char_pattern, _MarkerMatcher
+
+PROFILES_DIR = Path(__file__).resolve().parents[1] / "src" / "qai_text2ir" / "profiles"
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+def _fixture_lines() -> list[str]:
+    lines = {"", " ", "(", "ANNEX"}
+    for path in sorted(FIXTURES_DIR.iterdir()):
+        if path.suffix not in {".txt", ".md"}:
+            continue
+        for line in path.read_text(encoding="utf-8").splitlines():
+            lines.update({line, line.lstrip()})
+    return sorted(lines)
+
+
+@pytest.mark.parametrize(
+    "regex, accepted, rejected",
+    [
+        (r"^\((?P<n>[a-z])\)\s+", "(", "a"),
+        (r"(?i)^\s*ANNEX\s+(?P<n>\d+)", "a \t", "B"),
+        (r"(?i:^(Authority|Source)):\s+", "as", "x"),
+        (r"^(?P<n>\d{1,2})\.\s+(?=[A-Z])", "0９", "a"),
+        (r"^[^•]\s", "a", "•"),
+    ],
+)
+def test_first_char_pattern_accepts_exactly_the_possible_first_characters(
+    regex: str, accepted: str, rejected: str
+) -> None:
+    head = _first_char_pattern(re.compile(regex))
+    assert head is not None
+    assert all(head.match(ch) for ch in accepted)
+    assert not any(head.match(ch) for ch in rejected)
+
+
+@pytest.mark.parametrize("regex", [r"^.*$", r"^\s*$", r"(?:x)?", r"^(a|)b?"])
+def test_first_char_pattern_is_unconstrained_for_wildcards_and_nullable_patterns(regex: str) -> None:
+    assert _first_char_pattern(re.compile(regex)) is None
+
+
+@pytest.mark.parametrize("profile_path", sorted(PROFILES_DIR.glob("*.yaml")), ids=lambda p: p.stem)
+def test_marker_matcher_matches_every_marker_in_profile_order(profile_path: Path) -> None:
+    compiled = _compile_markers(load_parser_profile(profile_id=profile_path.stem))
+    matcher = _MarkerMatcher(compiled)
+    kinds = {marker["kind"] for marker, _ in compiled}
+    for line in _fixture_lines():
+        expected = [order for order, (_, pattern) in enumerate(compiled) if pattern.match(line)]
+        assert [m.order for m in matcher.match_all(line)] == expected
+        assert matcher.starts_with_any(line) is bool(expected)
+        first = next(iter(expected), None)
+        structural = matcher.structural_end(line, kinds)
+        if first is None:
+            assert structural is None
+        else:
+            assert structural == (compiled[first][0]["kind"], compiled[first][1].match(line).end())
@@ -3,8 +3,16 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Dict, List
 
+from qai_xml2ir.models_ir import build_root
+
 from qai_text2ir.profile_loader import load_parser_profile
-from qai_text2ir.text_parser import parse_text_to_ir
+from qai_text2ir.text_parser import (
+    HYPHEN_WRAP_PATTERN,
+    _HyphenRepairEngine,
+    _postprocess_node_text,
+    parse_text_to_ir,
+    qualitycheck_document,
+)
 
 
 def _flatten(node: Dict) -> List[Dict]:
@@ -69,6 +77,35 @@ def test_hyphenation_repair_drop_and_keep(tmp_path: Path) -> None:
     assert "compo- nents" not in text_a
 
 
+def test_hyphen_repair_engine_settles_chains_in_one_scan() -> None:
+    engine = _HyphenRepairEngine(hyphen_words={"co-op"}, plain_words={"sterile", "sterilisation"})
+    text = "co- op and steri- lisa- tion of ste- rile goods"
+
+    def _fixpoint(value: str) -> str:
+        while True:
+            updated = HYPHEN_WRAP_PATTERN.sub(lambda m: engine.choose(m.group(1), m.group(2)), value)
+            if updated == value:
+                return updated
+            value = updated
+
+    repair = engine.repair(text)
+    assert repair.text == _fixpoint(text) == "co-op and sterilisation of sterile goods"
+    assert [text[start:end] for start, end, _ in repair.changes] == ["co- op", "steri- lisa- tion", "ste- rile"]
+    assert engine.repair(repair.text).changes == ()
+
+
+def test_qualitycheck_reuses_repair_results() -> None:
+    root = build_root([])
+    root.text = "elec- tronic records\n\nand compo-\n\nnents"
+    repairs = _postprocess_node_text(root, hyphen_words=set(), plain_words=set())
+    assert root.text == "electronic records\n\nand components"
+    assert repairs[(root.nid, "text")].text is root.text
+    assert not any("hyphen" in w for w in qualitycheck_document(root, repairs=repairs))
+
+    root.text = "edited- later"
+    assert any("unresolved hyphen-space" in w for w in qualitycheck_document(root, repairs=repairs))
+
+
 def test_preformatted_block_keeps_newlines_and_indent(tmp_path: Path) -> None:
     text = "\n".join(
         [
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import random
+import re
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from qai_text2ir import preprocess
+from qai_text2ir.preprocess import FilterStage, InlineStripper, LineCursor, register_stage, strip_inline_patterns
+from qai_text2ir.profile_loader import clear_compiled_profiles, compile_parser_profile, load_parser_profile
+from qai_text2ir.text_parser import parse_text_to_ir
+
+WHO_PROFILE = "who_lbm_3rd_default_v4"
+
+
+def test_profile_options_compile_to_ordered_stages() -> None:
+    compiled = compile_parser_profile(load_parser_profile(profile_id=WHO_PROFILE))
+    assert [spec.stage.name for spec in compiled.preprocess_stages] == [
+        "strip_inline_regexes",
+        "join_mid_sentence_marker_refs_into_prev",
+        "merge_structural_heading_continuations",
+        "skip_blocks",
+        "drop_repeated_structural_headers",
+        "drop_line_regexes",
+    ]
+    cfr = compile_parser_profile(load_parser_profile(family="US_CFR"))
+    assert "skip_blocks" not in [spec.stage.name for spec in cfr.preprocess_stages]
+
+
+def test_stage_stats_count_each_stage_without_changing_output() -> None:
+    profile = load_parser_profile(profile_id=WHO_PROFILE)
+    input_path = Path("tests/fixtures/who_lbm_contents_block_excerpt.txt")
+    stats: list = []
+    with_stats = parse_text_to_ir(input_path=input_path, doc_id="d", parser_profile=profile, preprocess_stats=stats)
+    plain = parse_text_to_ir(input_path=input_path, doc_id="d", parser_profile=profile)
+
+    assert with_stats.to_dict() == plain.to_dict()
+    by_name = {entry.name: entry for entry in stats}
+    assert by_name["skip_blocks"].counters == {"blocks": 1, "dropped": 6}
+    assert by_name["merge_structural_heading_continuations"].counters == {"merged": 1}
+    assert by_name["drop_line_regexes"].lines == by_name["drop_repeated_structural_headers"].lines
+    assert all(entry.seconds >= 0.0 for entry in stats)
+
+    joined: list = []
+    parse_text_to_ir(
+        input_path=Path("tests/fixtures/who_annex_mid_sentence_ref.txt"),
+        doc_id="d",
+        parser_profile=profile,
+        preprocess_stats=joined,
+    )
+    assert {entry.name: entry.counters for entry in joined}["join_mid_sentence_marker_refs_into_prev"] == {
+        "joined": 1
+    }
+
+
+def test_registered_stage_is_driven_by_profile_options(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(preprocess, "_REGISTERED_STAGES", list(preprocess._REGISTERED_STAGES))
+    clear_compiled_profiles()
+
+    class DropPrefixStage(FilterStage):
+        name = "drop_line_prefixes"
+
+        def __init__(self, *, prefixes: tuple) -> None:
+            super().__init__()
+            self._prefixes = prefixes
+
+        @classmethod
+        def compile(cls, compiled) -> Optional[Dict[str, Any]]:
+            prefixes = (compiled.profile.get("preprocess") or {}).get("drop_line_prefixes")
+            return {"prefixes": tuple(prefixes)} if prefixes else None
+
+        def admit(self, cursor: LineCursor) -> bool:
+            return not cursor.stripped.startswith(self._prefixes)
+
+    register_stage(DropPrefixStage)
+    input_path = tmp_path / "short.txt"
+    input_path.write_text("§ 11.10 Controls.\n(a) Validate systems.\nDRAFT ONLY\n(b) Keep records.", encoding="utf-8")
+    profile = load_parser_profile(family="US_CFR")
+    profile.setdefault("preprocess", {})["drop_line_prefixes"] = ["DRAFT"]
+    stats: list = []
+    ir = parse_text_to_ir(input_path=input_path, doc_id="d", parser_profile=profile, preprocess_stats=stats)
+
+    assert "DRAFT" not in str(ir.to_dict())
+    assert {entry.name: entry.counters for entry in stats}["drop_line_prefixes"] == {"dropped": 1}
+    clear_compiled_profiles()
+
+
+def test_inline_stripper_matches_sequential_substitution() -> None:
+    patterns = [
+        re.compile(r"(?i)(?<=\S)\s+PE\s*009-17\s*\(Annexes\)\s*-\s*\d+\s*-\s*25\s+August\s+2023\s*$"),
+        re.compile(r"(?i)kiss me"),
+        re.compile(r"Ki?ss"),
+        re.compile(r"•\s*[0-9ivxlcdm]+\s*•"),
+        re.compile(r"[\x00-\x1F]"),
+        re.compile(r"abc|xyz"),
+    ]
+    pieces = list("abcxyzKkSsſK•iv() -\x01") + ["KISS ME", "kiſſ me", " PE 009-17 (Annexes) - 4 - 25 August 2023"]
+    rng = random.Random(7)
+    for _ in range(5000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 10)))
+        chosen = rng.sample(patterns, rng.randint(1, len(patterns)))
+        assert InlineStripper(chosen)(text) == strip_inline_patterns(text, chosen)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from qai_xml2ir.models_ir import Node, build_root
+
+from qai_text2ir.text_parser import _should_drop_repeated_structural_header_line, _StructuralHeaderIndex
+
+
+def _node(nid: str, kind: str, num: str, heading: str) -> Node:
+    return Node(
+        nid=nid,
+        kind=kind,
+        kind_raw=kind,
+        num=num,
+        ord=None,
+        heading=heading,
+        text=None,
+        role="structural",
+        normativity=None,
+        children=[],
+    )
+
+
+def test_index_tracks_new_root_children_and_heading_updates() -> None:
+    root = build_root([_node("part1", "part", "i", "Basic Requirements")])
+    index = _StructuralHeaderIndex(root)
+    assert [n.nid for n in index.siblings("part", "I")] == ["part1"]
+    assert index.siblings("chapter", "1") == []
+
+    chapter = _node("chap1", "chapter", "1", "Pharmaceutical")
+    root.children.append(chapter)
+    assert index.siblings("chapter", "1") == [chapter]
+    assert index.heading(chapter) == "pharmaceutical"
+    chapter.heading = "Pharmaceutical Quality System."
+    assert index.heading(chapter) == "pharmaceutical quality system"
+
+
+def test_drop_uses_indexed_root_siblings() -> None:
+    part = _node("part1", "part", "I", "Basic Requirements for Medicinal Products")
+    chapter = _node("chap2", "chapter", "2", "Personnel")
+    root = build_root([part, chapter, _node("chap3", "chapter", "3", "Premises and Equipment")])
+    index = _StructuralHeaderIndex(root)
+    kinds = {"part", "chapter", "annex"}
+    stack = [root, chapter]
+
+    assert _should_drop_repeated_structural_header_line("PART I Basic Requirements", stack, kinds, index)
+    assert _should_drop_repeated_structural_header_line("3. Premises", stack, kinds, index)
+    assert _should_drop_repeated_structural_header_line("Chapter 2", stack, kinds, index)
+    assert not _should_drop_repeated_structural_header_line("3. Documentation", stack, kinds, index)
+    assert not _should_drop_repeated_structural_header_line("PART II Other", stack, kinds, index)
+    assert not _should_drop_repeated_structural_header_line("Annex 1", stack, kinds, index)
+
+    annex = _node("annex1", "annex", "1", "Sterile")
+    assert _should_drop_repeated_structural_header_line("Annex 1 Anything", [root, annex], kinds, index)
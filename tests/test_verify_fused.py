@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import pytest
+
+from qai_xml2ir.models_ir import IRDocument, Node, build_root
+from qai_xml2ir.verify import (
+    VerifyProblem,
+    check_annex_article_nids,
+    check_appendix_scoped_indices,
+    check_ord_format_and_order,
+    format_problems,
+    verify_document,
+    verify_tree,
+)
+
+from test_ir_sidecar import _random_doc
+
+
+def _n(nid: str, kind: str, ord_val, children=None) -> Node:
+    return Node(
+        nid=nid,
+        kind=kind,
+        kind_raw=None,
+        num=None,
+        ord=ord_val,
+        heading=None,
+        text=None,
+        role="structural",
+        normativity=None,
+        children=list(children or []),
+    )
+
+
+def _broken_root() -> Node:
+    return build_root(
+        [
+            _n("art1", "article", 1),
+            _n("annex1", "article", 3),
+            _n(
+                "annex2.art1",
+                "article",
+                2,
+                [
+                    _n("appdx_table1", "appendix", 4),
+                    _n("appdx_table3", "appendix", 5),
+                    _n("appdx_table3_2", "appendix", None),
+                ],
+            ),
+        ]
+    )
+
+
+def test_verify_tree_reports_structured_problems_in_one_pass() -> None:
+    problems = verify_tree(_broken_root())
+    assert VerifyProblem("invalid_annex_article_nid", "annex1", "invalid annex article nid: annex1") in problems
+    assert [p.check for p in problems] == [
+        "invalid_annex_article_nid",
+        "appendix_index",
+        "ord",
+        "ord",
+        "ord",
+        "ord",
+    ]
+    assert [p.nid for p in problems if p.check == "ord"] == ["root", "annex2.art1", "appdx_table3_2", "appdx_table3_2"]
+    assert format_problems(problems) == (
+        "invalid annex article nids: ['annex1'] | "
+        "appendix index problems: ['appendix index for appdx_table under annex2.art1 is not contiguous: [1, 3, 3]'] | "
+        "ord problems: ['children ord not sorted under root', 'ord is not strictly increasing at annex2.art1: 2 <= 3', "
+        "'missing ord at appdx_table3_2', 'invalid ord type at appdx_table3_2: None']"
+    )
+
+
+def test_legacy_checks_and_dict_input_match_node_input() -> None:
+    root = _broken_root()
+    as_dict = root.to_dict()
+    assert verify_tree(as_dict) == verify_tree(root)
+    assert check_annex_article_nids(as_dict) == ([], ["annex1"])
+    assert check_appendix_scoped_indices(root) == check_appendix_scoped_indices(as_dict)
+    assert len(check_ord_format_and_order(root)) == 4
+    for seed in range(3):
+        content = _random_doc(seed).content
+        assert verify_tree(content) == verify_tree(content.to_dict())
+
+
+def test_verify_document_raises_on_duplicates_before_other_problems() -> None:
+    root = build_root([_n("art1", "article", 2), _n("art1", "article", 1)])
+    with pytest.raises(AssertionError, match=r"Duplicate nids detected: \['art1'\]"):
+        verify_document(IRDocument(doc_id="d", content=root))
+    ok = build_root([_n("art1", "article", 1), _n("art2", "article", 2)])
+    verify_document(IRDocument(doc_id="d", content=ok))
+    verify_document({"content": ok.to_dict()})
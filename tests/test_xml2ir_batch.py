@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+import typer
+import yaml
+
+from qai_xml2ir import cli
+from qai_xml2ir.digest import sha256_file
+
+from test_bundle_gmp import write_sample_xml
+
+
+def _make_inputs(root: Path) -> list[Path]:
+    good_a = root / "laws" / "416M60000100179_20260501_507M60000100117.xml"
+    good_b = root / "laws" / "nested" / "417M60000100001_20250401_506M60000100002.xml"
+    for path in (good_a, good_b):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_sample_xml(path)
+    return [good_a, good_b]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_writes_bundle_per_law_and_manifest(tmp_path: Path, workers: int) -> None:
+    _make_inputs(tmp_path)
+    out_dir = tmp_path / "out"
+
+    cli.batch(inputs=[str(tmp_path / "laws")], out_dir=out_dir, workers=workers, retrieved_at="2026-02-02")
+
+    manifest = yaml.safe_load((out_dir / "manifest.yaml").read_text(encoding="utf-8"))
+    assert manifest["schema"] == "qai.batch_manifest.v1"
+    assert manifest["summary"]["total"] == 2
+    assert manifest["summary"]["failed"] == 0
+    for record in manifest["laws"]:
+        assert record["status"] == "ok"
+        assert record["input_sha256"] == sha256_file(Path(record["input"]))
+        assert set(record["timings_sec"]) == {"parse", "verify", "write", "total"}
+        law_dir = Path(record["out_dir"])
+        assert law_dir.parent == out_dir
+        meta = yaml.safe_load((law_dir / f"{record['doc_id']}.meta.yaml").read_text(encoding="utf-8"))
+        source = meta["doc"]["sources"][0]
+        assert source["retrieved_at"] == "2026-02-02"
+        assert source["url"].startswith(f"https://laws.e-gov.go.jp/law/{meta['doc']['identifiers']['e_gov_law_id']}/")
+        assert (law_dir / f"{record['doc_id']}.regdoc_ir.yaml").exists()
+
+
+def test_batch_isolates_failures_and_exits_nonzero(tmp_path: Path) -> None:
+    good_a, good_b = _make_inputs(tmp_path)
+    bad = tmp_path / "broken.xml"
+    bad.write_text("<Law><LawBody>", encoding="utf-8")
+    list_file = tmp_path / "inputs.txt"
+    list_file.write_text(f"# laws\n{good_a.relative_to(tmp_path)}\n\nbroken.xml\n", encoding="utf-8")
+    out_dir = tmp_path / "out"
+
+    with pytest.raises(typer.Exit):
+        cli.batch(inputs=[str(list_file), str(good_b), str(good_a)], out_dir=out_dir, workers=2)
+
+    manifest = yaml.safe_load((out_dir / "manifest.yaml").read_text(encoding="utf-8"))
+    assert manifest["summary"] == {**manifest["summary"], "total": 3, "ok": 2, "failed": 1}
+    statuses = {Path(r["input"]).name: r["status"] for r in manifest["laws"]}
+    assert statuses == {good_a.name: "ok", "broken.xml": "error", good_b.name: "ok"}
+    failed = next(r for r in manifest["laws"] if r["status"] == "error")
+    assert failed["error"] and failed["input_sha256"] == sha256_file(bad)
+
+
+def test_batch_cache_hits_on_unchanged_inputs(tmp_path: Path) -> None:
+    _make_inputs(tmp_path)
+    cache_dir = tmp_path / "cache"
+    for run in ("run1", "run2"):
+        cli.batch(inputs=[str(tmp_path / "laws")], out_dir=tmp_path / run, workers=1, cache_dir=cache_dir)
+
+    first = yaml.safe_load((tmp_path / "run1" / "manifest.yaml").read_text(encoding="utf-8"))
+    second = yaml.safe_load((tmp_path / "run2" / "manifest.yaml").read_text(encoding="utf-8"))
+    assert first["summary"]["cache_hits"] == 0
+    assert second["summary"]["cache_hits"] == 2
+    for record in second["laws"]:
+        assert record["input_sha256"] == sha256_file(Path(record["input"]))
+        ir_name = f"{record['doc_id']}.regdoc_ir.yaml"
+        cached = (tmp_path / "run2" / record["doc_id"] / ir_name).read_bytes()
+        assert cached == (tmp_path / "run1" / record["doc_id"] / ir_name).read_bytes()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import io
+from pathlib import Path
+
+import pytest
+
+from qai_xml2ir import yaml_io
+from qai_xml2ir.models_meta import build_meta
+
+from test_serialize_ir_stream import TRICKY_STRINGS
+
+pytestmark = pytest.mark.skipif(not yaml_io.HAS_LIBYAML, reason="PyYAML built without libyaml")
+
+GMP_DOC_ID = "jp_egov_416M60000100179_20260501_507M60000100117"
+
+
+def _dump(data, use_libyaml: bool) -> str:
+    buf = io.StringIO()
+    yaml_io.dump_yaml(data, buf, use_libyaml=use_libyaml)
+    return buf.getvalue()
+
+
+def _documents():
+    normalized = Path("data/normalized") / GMP_DOC_ID
+    paths = sorted(normalized.glob("*.yaml")) + sorted(Path("src/qai_text2ir/profiles").glob("*.yaml"))
+    for path in paths:
+        if path.name.endswith(".meta.yaml"):
+            continue
+        yield path
+
+
+@pytest.mark.parametrize("path", list(_documents()), ids=lambda p: p.name)
+def test_libyaml_and_pure_python_agree_on_repo_documents(path: Path) -> None:
+    text = path.read_text(encoding="utf-8")
+    data = yaml_io.load_yaml(text, use_libyaml=False)
+    assert yaml_io.load_yaml(text, use_libyaml=True) == data
+    assert yaml_io.libyaml_emits_same(data)
+    assert _dump(data, use_libyaml=True) == _dump(data, use_libyaml=False)
+
+
+def test_libyaml_and_pure_python_agree_on_meta() -> None:
+    meta = build_meta(
+        doc_id="doc",
+        title="テスト法",
+        short_title=None,
+        doc_type="statute",
+        law_id="416M60000100179",
+        law_number="平成十年厚生省令第〇号",
+        as_of="2026-05-01",
+        revision_id="507M60000100117",
+        effective_from=None,
+        effective_to=None,
+        revision_note=None,
+        source_url="https://laws.e-gov.go.jp/law/416M60000100179/20260501_507M60000100117",
+        retrieved_at="2026-02-02",
+        parser_profile_id="jp_law_default_v1",
+        ir_path="doc.regdoc_ir.yaml",
+        parser_profile_path="doc.parser_profile.yaml",
+        regdoc_profile_path="doc.regdoc_profile.yaml",
+        input_path="C:\\data\\law.xml",
+        input_checksum="0" * 64,
+    )
+    assert _dump(meta, use_libyaml=True) == _dump(meta, use_libyaml=False)
+
+
+@pytest.mark.parametrize(
+    "value",
+    TRICKY_STRINGS + ["emoji \U0001F600", "nel\x85", "日" * 60, "k" * 123],
+)
+def test_dump_yaml_output_does_not_depend_on_libyaml(value: str) -> None:
+    data = {"value": value, "items": [value, {"nested": value}], value or "empty": 1, "k" * 200: [value]}
+    assert _dump(data, use_libyaml=True) == _dump(data, use_libyaml=False)